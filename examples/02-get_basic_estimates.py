@@ -50,6 +50,10 @@ for model in ['Beg1997','Haines2009','Wilks1992']:
     Teh = lpi.electron.hot.temperature(model=model)
     print("Hot electron temperature  (model = {})   : {:.4E}".format(model,Teh))
 
+# or get all the registered models at once, in a table
+for model,value in lpi.electron.hot.temperature_all():
+    print("Hot electron temperature  (model = {})   : {:.4E} MeV".format(model,value))
+
 # It is possible to get a shortcut to a specific sub-object as follows
 eh = lpi.electron.hot
 
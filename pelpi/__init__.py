@@ -39,6 +39,12 @@ pelpi objects are :
 - Target, to define target properties (such as material, geometry, ...)
 - LaserPlasmaInteraction, to get estimates from models, with laser and target fundamental properties
 - ParticleInCell, to get estimates of PIC numerical parameters
+- LaserBatch, MaterialBatch and LPIBatch, to store many configurations as columns of arrays, for parameter studies
+
+Large parameter scans of batches can be evaluated by a pool of worker processes with ``pelpi.scan.run``.
+
+Models used by LaserPlasmaInteraction estimates are registered in the ``pelpi.models`` module,
+where new models can also be added.
 
 Units
 =====
@@ -52,6 +58,15 @@ be done under the same unit registry. In pelpi it means that pint units might be
 via pelpi.unit object.
 More informations can be found at http://pint.readthedocs.io/
 
+Estimate results are converted to the units of the ``pelpi.default_unit`` dictionary,
+which can be modified, e.g. ``pelpi.default_unit['temperature'] = pelpi.unit('keV')``.
+Results already cached by existing objects are then recomputed at their next call, in the new units.
+
+pint can be replaced by a lighter unit backend, for the whole process (``PELPI_UNITS`` environment
+variable or ``pelpi.units.use``) or inside a block of code (``with pelpi.units.backend('lite'):``).
+The ``lite`` backend checks units as pint does, and the ``raw`` backend works with trusted SI magnitudes
+(see ``pelpi.units``). ``pelpi.unit`` and ``pelpi.default_unit`` always refer to the backend in use.
+
 Basic example
 =============
 Import the pelpi package
@@ -99,39 +114,154 @@ Finally save one temperature value (model hypotheses are described in the doc)
 
 >>> Teh = eh.temperature(model='Haines2009')
 
+Import time
+===========
+``import pelpi`` is kept cheap (budget : 50 ms, checked in tests/test_init.py) so that short-lived
+processes do not pay for what they do not use. pelpi submodules are only loaded on first access
+to a public class, and pint and its unit registry on first use of ``pelpi.unit`` or ``pelpi.default_unit``
+with the pint unit backend (so never with the other backends).
+
+Building the pint unit registry is the main cost of this first access. It can be reduced by
+caching the parsed unit definitions on disk, by setting the ``PELPI_UNIT_CACHE`` environment variable
+to a folder (or to ``:auto:`` for the default user cache folder) before the first access.
+This needs pint >= 0.18, and is ignored otherwise.
+
 """
 # import _compat
-__all__ = ["Profile","Material","Target","Laser","LaserPlasmaInteraction","ParticleInCell"]
+import os as _os
+import importlib as _importlib
+
+__all__ = ["Profile","Material","Target","Laser","LaserPlasmaInteraction","ParticleInCell","LaserBatch","MaterialBatch","LPIBatch"]
 
 __version__=0.3
 
-import pint
-unit=pint.UnitRegistry()
-
-# TODO: default_unit & temperature via pint @context ?
-default_unit={\
-    'number'            : unit(''),\
-    'length'            : unit('m'),\
-    'time'              : unit('s'),\
-    'mass'              : unit('kg'),\
-    'energy'            : unit('J'),\
-    'angle'             : unit('deg'),\
-    'angular_frequency' : unit('s**-1'),\
-    'density'           : unit('kg * m**-3'),\
-    'number_density'    : unit('m**-3'),\
-    'intensity'         : unit('W/m**2'),\
-    'power'             : unit('W'),\
-    'temperature'       : unit('MeV'),\
-    'conductivity'      : unit('ohm**-1 * m**-1'),\
-    'current'           : unit('A/m**2'),\
-    'momentum'          : unit('kg * m / s'),\
-    'electric_field'    : unit('kg * m / A / s**3'),\
-    'magnetic_field'    : unit('kg / A / s'),\
+# Public classes, and the submodule defining them
+_classes = {
+    "Profile"                   : "profile",
+    "Laser"                     : "laser",
+    "Material"                  : "target",
+    "Target"                    : "target",
+    "LaserPlasmaInteraction"    : "lpi",
+    "ParticleInCell"            : "pic",
+    "LaserBatch"                : "batch",
+    "MaterialBatch"             : "batch",
+    "LPIBatch"                  : "batch",
 }
 
-
-from .profile import Profile
-from .laser import Laser
-from .target import Material,Target
-from .lpi import LaserPlasmaInteraction
-from .pic import ParticleInCell
+def _unit_registry():
+    """
+    Returns
+    -------
+    New pint unit registry, using the definitions cache folder ``PELPI_UNIT_CACHE`` if defined.
+    """
+    import pint
+    cache_folder = _os.environ.get("PELPI_UNIT_CACHE")
+    if cache_folder:
+        try:
+            return pint.UnitRegistry(cache_folder=cache_folder)
+        except TypeError: # pint < 0.18
+            pass
+    return pint.UnitRegistry()
+
+class _DefaultUnits(dict):
+    """
+    Default units dictionary.
+
+    It also contains the cache of the conversion factors to the default units (see ``_constants._convert``),
+    which is cleared each time the dictionary is modified, and a version number incremented at each
+    modification, so that the estimates cached with the previous default units are recomputed (see ``_tools._Default``).
+    """
+    def __init__(self,*args,**kwargs):
+        dict.__init__(self,*args,**kwargs)
+        self._factors = {}
+        self._version = 0
+
+    def _modified(self):
+        self._factors.clear()
+        self._version += 1
+
+    def __setitem__(self,key,value):
+        dict.__setitem__(self,key,value)
+        self._modified()
+
+    def __delitem__(self,key):
+        dict.__delitem__(self,key)
+        self._modified()
+
+    def __ior__(self,other):
+        self.update(other)
+        return self
+
+    def update(self,*args,**kwargs):
+        dict.update(self,*args,**kwargs)
+        self._modified()
+
+    def setdefault(self,key,default=None):
+        self._modified()
+        return dict.setdefault(self,key,default)
+
+    def pop(self,*args):
+        self._modified()
+        return dict.pop(self,*args)
+
+    def popitem(self):
+        self._modified()
+        return dict.popitem(self)
+
+    def clear(self):
+        dict.clear(self)
+        self._modified()
+
+def _default_unit(unit):
+    """
+    Returns
+    -------
+    Default units dictionary, for the `unit` registry.
+    """
+    # TODO: default_unit & temperature via pint @context ?
+    return _DefaultUnits({\
+        'number'            : unit(''),\
+        'length'            : unit('m'),\
+        'time'              : unit('s'),\
+        'mass'              : unit('kg'),\
+        'energy'            : unit('J'),\
+        'angle'             : unit('deg'),\
+        'angular_frequency' : unit('s**-1'),\
+        'density'           : unit('kg * m**-3'),\
+        'number_density'    : unit('m**-3'),\
+        'intensity'         : unit('W/m**2'),\
+        'power'             : unit('W'),\
+        'temperature'       : unit('MeV'),\
+        'conductivity'      : unit('ohm**-1 * m**-1'),\
+        'current'           : unit('A/m**2'),\
+        'momentum'          : unit('kg * m / s'),\
+        'electric_field'    : unit('kg * m / A / s**3'),\
+        'magnetic_field'    : unit('kg / A / s'),\
+    })
+
+def __getattr__(name):
+    """
+    Lazy loading of the unit registry, default units and public classes (PEP 562).
+    Once loaded, values are saved as module attributes so this function is not called anymore.
+    """
+    if name in ("unit","default_unit"):
+        # Proxies to the unit backend in use (see ``pelpi.units``)
+        units = _importlib.import_module(".units", __name__)
+        globals()["unit"] = units.unit
+        globals()["default_unit"] = units.default_unit
+        return globals()[name]
+    elif name in _classes:
+        module = _importlib.import_module("." + _classes[name], __name__)
+        globals()[name] = getattr(module, name)
+        return globals()[name]
+    else:
+        # Submodules (such as pelpi._tools) are also loaded on first access
+        try:
+            return _importlib.import_module("." + name, __name__)
+        except ModuleNotFoundError as e:
+            if e.name != __name__ + "." + name:
+                raise
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_classes) | {"unit", "default_unit"})
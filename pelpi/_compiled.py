@@ -0,0 +1,237 @@
+#coding:utf8
+"""
+Compiled (magnitude only) evaluation of estimates.
+
+Each estimate of the ``LaserPlasmaInteraction`` object graph has a "kernel" here,
+that is a function working only with SI magnitudes (floats or ndarrays),
+with physical constants folded once at import time.
+Kernels of models are declared with the model (see ``models.register``).
+
+Kernels are evaluated in a ``_Namespace``, which contains the user input values
+(leaves, in SI magnitude) and lazily computes & stores intermediate results,
+so that shared sub-expressions are evaluated only once per call.
+"""
+from ._global import *
+from . import _tools
+from ._quadrature import _is_shape,_shape_integral
+from ._constants import _SI
+
+__all__ = ["_CompiledEstimate","_compile"]
+
+################################################################################
+# Physical constants are folded in ``_constants._SI``
+_C_GAUSS = 1./(2 * _np.sqrt(_np.log(2)))
+
+# Short names of the user inputs (leaves), and their path from the LaserPlasmaInteraction instance
+_LEAVES = {
+    'wavelength'    : 'laser.wavelength',
+    'energy'        : 'laser.energy',
+    'time_profile'  : 'laser.time_profile.profile',
+    'time_fwhm'     : 'laser.time_profile.fwhm',
+    'time_radius'   : 'laser.time_profile.radius',
+    'time_order'    : 'laser.time_profile.order',
+    'time_table'    : 'laser.time_profile.table',
+    'space_profile' : 'laser.space_profile.profile',
+    'space_fwhm'    : 'laser.space_profile.fwhm',
+    'space_radius'  : 'laser.space_profile.radius',
+    'space_order'   : 'laser.space_profile.order',
+    'space_table'   : 'laser.space_profile.table',
+    'space_image'   : 'laser.space_profile.image',
+    'density'       : 'target.material.density',
+    'atomic_mass'   : 'target.material.atomic_mass',
+    'Z'             : 'target.material.Z',
+}
+
+################################################################################
+# Kernels
+_KERNELS = {}
+
+def _kernel(path,dimension):
+    """
+    Register the decorated function as the kernel of estimate `path`.
+
+    `dimension` is a key of the default_unit dictionary, or a unit str for results
+    that have no default unit (such as profile integrals).
+    """
+    def decorator(func):
+        _KERNELS[path] = (func,dimension)
+        return func
+    return decorator
+
+@_kernel('laser.time_profile.integral1D','s')
+def _integral1D(p):
+    if p['time_profile']=="gaussian1D":
+        return p['time_fwhm'] * _C_GAUSS * _np.sqrt(_np.pi)
+    elif _is_shape(p['time_profile']):
+        return p['time_fwhm'] * _shape_integral(p['time_profile'],1,p['time_order'])
+    elif p['time_profile']=="tabulated":
+        return _magnitude(p['time_table'].integral(1))
+    else:
+        raise NameError("Unknown laser time profile name.")
+
+@_kernel('laser.space_profile.integral2D','m**2')
+def _integral2D(p):
+    if p['space_profile']=="gaussian2D":
+        return _np.pi * (p['space_fwhm'] * _C_GAUSS)**2
+    elif p['space_profile']=="top-hat":
+        return _np.pi * p['space_radius']**2
+    elif _is_shape(p['space_profile']):
+        return p['space_fwhm']**2 * _shape_integral(p['space_profile'],2,p['space_order'])
+    elif p['space_profile']=="tabulated":
+        return _magnitude(p['space_table'].integral(2))
+    elif p['space_profile']=="image":
+        return _magnitude(p['space_image'].integral2D())
+    else:
+        raise NameError("Unknown laser space profile name.")
+
+@_kernel('laser.angular_frequency','angular_frequency')
+def _angular_frequency(p):
+    return 2 * _np.pi * _SI['c']/p['wavelength']
+
+@_kernel('laser.power','power')
+def _power(p):
+    return p['energy']/p['laser.time_profile.integral1D']
+
+@_kernel('laser.intensity','intensity')
+def _intensity(p):
+    return p['laser.power']/p['laser.space_profile.integral2D']
+
+@_kernel('laser.intensity_peak_normalized','number')
+def _intensity_peak_normalized(p):
+    return (_SI['e'] * p['wavelength'] * _np.sqrt(2 * p['laser.intensity'] * _SI['mu_0'] * _SI['c']))/(2 * _np.pi * _SI['m_e c**2'])
+
+@_kernel('laser.photon.energy','energy')
+def _photon_energy(p):
+    return _SI['h'] * _SI['c']/p['wavelength']
+
+@_kernel('laser.electron.number_density_critical','number_density')
+def _number_density_critical(p):
+    return _SI['m_e'] * _SI['epsilon_0'] * (p['laser.angular_frequency']/_SI['e'])**2
+
+@_kernel('target.material.ion.number_density','number_density')
+def _ion_number_density(p):
+    return p['density']/p['atomic_mass']
+
+@_kernel('target.material.electron.number_density','number_density')
+def _electron_number_density(p):
+    return p['Z'] * p['target.material.ion.number_density']
+
+@_kernel('plasma.electron.length_Debye','length')
+def _length_Debye(p):
+    return _np.sqrt((_SI['epsilon_0'] * p['temperature'])/(p['target.material.electron.number_density'] * _SI['e']**2))
+
+@_kernel('plasma.electron.length_Landau','length')
+def _length_Landau(p):
+    return _SI['e']**2/(4 * _np.pi * _SI['epsilon_0'] * p['temperature'])
+
+@_kernel('plasma.electron.angular_frequency_plasma','angular_frequency')
+def _angular_frequency_plasma_electron(p):
+    return _np.sqrt((p['target.material.electron.number_density'] * _SI['e']**2)/(_SI['m_e'] * _SI['epsilon_0']))
+
+@_kernel('plasma.ion.angular_frequency_plasma','angular_frequency')
+def _angular_frequency_plasma_ion(p):
+    return _np.sqrt((p['target.material.ion.number_density'] * (p['Z'] * _SI['e'])**2)/(p['atomic_mass'] * _SI['epsilon_0']))
+
+################################################################################
+class _Namespace(dict):
+    """
+    Dictionary of SI magnitudes, that computes (and stores) missing estimates with their kernel.
+    """
+    def __missing__(self,key):
+        if key not in _KERNELS:
+            raise KeyError("No input value or compiled kernel for `%s`."%key)
+        value = _KERNELS[key][0](self)
+        self[key] = value
+        return value
+
+def _magnitude(value):
+    """
+    Returns
+    -------
+    SI magnitude of value if it is a Quantity, value otherwise (str, float or ndarray already in SI)
+    """
+    if hasattr(value,'to_base_units'):
+        return value.to_base_units().magnitude
+    return value
+
+class _CompiledEstimate(object):
+    """
+    Plain SI magnitude function of an estimate.
+
+    Parameters
+    ----------
+    path : str
+        Estimate path, with model name after ':' if needed
+    leaves : dict
+        Input values and user defaults, in SI magnitude
+
+    Notes
+    -----
+    Call the instance to get the result in default unit, or use the ``si`` method to get
+    the SI magnitude (float or ndarray) directly. Both methods take optional keyword
+    arguments to override the input values (Quantity, or float/ndarray assumed in SI).
+    """
+    def __init__(self,path,leaves):
+        self.path       = path
+        self._leaves    = leaves
+        self._dim       = _KERNELS[path][1]
+        # Conversion factor from SI to the default unit of the result, folded once
+        unit            = _du[self._dim] if self._dim in _du else 1 * _u(self._dim)
+        self._factor    = (1 * unit.to_base_units().units).to(unit.units).magnitude
+        self._units     = unit.units
+
+    def si(self,**kwargs):
+        """
+        Returns
+        -------
+        Estimate result in SI magnitude : float or ndarray
+        """
+        p = _Namespace(self._leaves)
+        for key,val in kwargs.items():
+            p[key] = _magnitude(val)
+        return p[self.path]
+
+    def __call__(self,**kwargs):
+        return _u.Quantity(self.si(**kwargs) * self._factor,self._units)
+
+def _compile(lpi,path,**kwargs):
+    """
+    Returns
+    -------
+    ``_CompiledEstimate`` instance of estimate `path`, with input values taken from `lpi`
+
+    Parameters
+    ----------
+    lpi : object
+        pelpi ``LaserPlasmaInteraction`` instance
+    path : str
+        Estimate path from `lpi`, with model name after ':' if needed (e.g. 'electron.hot.temperature:Wilks1992')
+    **kwargs
+        Model input parameters (such as `temperature`), and input overrides
+
+    Notes
+    -----
+    Default values set by the user (with ``default.set``) are folded into the compiled function.
+    """
+    if path not in _KERNELS:
+        raise NameError("No compiled kernel for estimate `%s`."%path)
+
+    leaves = {}
+    for name,leaf in _LEAVES.items():
+        obj,key = _tools._resolve(lpi,leaf)
+        leaves[name] = _magnitude(getattr(obj,key)())
+
+    # User defaults replace the kernel of the corresponding estimate
+    for kernel in _KERNELS:
+        try:
+            obj,key = _tools._resolve(lpi,kernel.split(':')[0])
+        except AttributeError: # estimate not available from lpi
+            continue
+        d = obj.default.get(key)
+        if d is not None:
+            leaves[kernel] = _magnitude(d)
+
+    for key,val in kwargs.items():
+        leaves[key] = _magnitude(val)
+
+    return _CompiledEstimate(path,leaves)
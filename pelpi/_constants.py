@@ -0,0 +1,119 @@
+#coding:utf8
+"""
+Folded physical constants and unit conversion factors.
+
+Estimates and models multiply their inputs by composite constants (such as ``m_e c**2``),
+whose Quantities are built here once per unit backend (see ``pelpi.units``), instead of rebuilding them
+(and parsing unit strings) at each call.
+
+Conversion factors from the units of a result to the default unit of its dimension
+are cached in the default units dictionary (see ``pelpi._DefaultUnits``), which clears
+them each time it is modified. So converting a result to its default unit (see ``_Default.result``)
+only costs one multiplication, once the factor is known.
+"""
+from ._global import *
+from .units import _current,_backends
+
+__all__ = ["_Q","_SI","_convert"]
+
+# Composite constants, as functions of the unit registry
+_DEFINITIONS = {
+    'c'                     : lambda u: 1 * u.c,
+    'e'                     : lambda u: 1 * u.e,
+    'm_e'                   : lambda u: 1 * u.m_e,
+    'epsilon_0'             : lambda u: 1 * u.epsilon_0,
+    'mu_0'                  : lambda u: 1 * u.mu_0,
+    'h'                     : lambda u: 1 * u.planck_constant,
+    'keV'                   : lambda u: 1 * u.keV,
+    'W/cm**2'               : lambda u: 1 * u('W/cm**2'),
+    'um**2'                 : lambda u: 1 * u('um**2'),
+    '2 pi c'                : lambda u: 2 * _np.pi * u.c,
+    'h c'                   : lambda u: 1 * u.planck_constant * u.c,
+    'c e'                   : lambda u: 1 * u.c * u.e,
+    'mu_0 c'                : lambda u: 1 * u.mu_0 * u.c,
+    'm_e c'                 : lambda u: 1 * u.m_e * u.c,
+    'm_e c**2'              : lambda u: 1 * u.m_e * u.c**2,
+    'm_e/e'                 : lambda u: 1 * u.m_e / u.e,
+    'm_e c/e'               : lambda u: 1 * u.m_e * u.c / u.e,
+    'e/(2 pi m_e c**2)'     : lambda u: 1 * u.e / (2 * _np.pi * u.m_e * u.c**2),
+    'm_e epsilon_0/e**2'    : lambda u: 1 * u.m_e * u.epsilon_0 / u.e**2,
+    'epsilon_0/e**2'        : lambda u: 1 * u.epsilon_0 / u.e**2,
+    'e**2/epsilon_0'        : lambda u: 1 * u.e**2 / u.epsilon_0,
+    'e**2/(m_e epsilon_0)'  : lambda u: 1 * u.e**2 / (u.m_e * u.epsilon_0),
+    'e**2/(4 pi epsilon_0)' : lambda u: 1 * u.e**2 / (4 * _np.pi * u.epsilon_0),
+    'W/cm**2 um**2'         : lambda u: 1 * u('W/cm**2') * u('um**2'),
+}
+
+class _Constants(object):
+    """
+    Composite constants, as Quantities of the unit backend in use (see ``pelpi.units``).
+
+    The constants of each backend are built at the first access with this backend.
+    """
+    def __init__(self,definitions):
+        self._definitions   = definitions
+        self._tables        = {}
+
+    def table(self,backend):
+        """
+        Returns
+        -------
+        Constants of `backend` (``units._Backend`` instance) : dict
+        """
+        try:
+            return self._tables[backend]
+        except KeyError:
+            u = backend.registry
+            table = self._tables[backend] = {key:f(u) for key,f in self._definitions.items()}
+            return table
+
+    def __getitem__(self,key):
+        return self.table(_current())[key]
+
+    def __contains__(self,key):
+        return key in self._definitions
+
+    def keys(self):
+        return self._definitions.keys()
+
+_Q = _Constants(_DEFINITIONS)
+
+# Same constants, in SI magnitude (from the lite backend, which has the same values as pint)
+_SI = {key:float(val.to_base_units().magnitude) for key,val in _Q.table(_backends['lite']).items()}
+
+def _convert(value,dimension):
+    """
+    Returns
+    -------
+    value converted to the default unit of `dimension` : Quantity
+
+    Parameters
+    ----------
+    value : Quantity
+        Value to convert
+    dimension : str
+        Key of the default_unit dictionary
+
+    Notes
+    -----
+    Conversion factors are cached by (dimension, units of value).
+    Units with an offset (such as degC) are converted by pint at each call.
+    Values already in the default unit are returned as is.
+    """
+    backend = _current()
+    units   = value.units
+    key     = (dimension,units)
+    du      = backend.default_unit
+    factors = du._factors
+    try:
+        factor,target = factors[key]
+    except KeyError:
+        target = du[dimension].units
+        if not value._is_multiplicative:
+            return value.to(target)
+        factor = (1. * units).to(target).magnitude
+        factors[key] = (factor,target)
+    if units is target:
+        # Already in the default unit (always the case with the raw backend)
+        return value
+    return backend.registry.Quantity(value.magnitude * factor,target)
@@ -0,0 +1,198 @@
+#coding:utf8
+"""
+Focal spot images.
+
+Images are kept as given (e.g. 16-bit camera frames, possibly memory-mapped),
+and their radial profile is computed by binning the pixels on the integer radius
+from the centroid with ``np.bincount``, by blocks of rows so that no full-frame
+temporary array is needed. The squared pixel offsets along each axis only depend
+on the image shape, so they are stored in a bounded cache shared by all the images:
+the centroid of each shot can move (pointing jitter) without recomputing them.
+
+The background level of the camera (median of the border pixels, by default) is
+subtracted from the pixel values, so that it does not contribute to the total,
+the peak or the radial profile.
+"""
+from functools import lru_cache as _lru_cache
+from ._global import *
+
+__all__ = ["_Image"]
+
+# Maximum number of pixels binned at once
+_BLOCK = 2**20
+
+@_lru_cache(maxsize=8)
+def _squares(shape):
+    """
+    Returns
+    -------
+    Squared offsets along each axis, from -(n-1) to n-1 : tuple of int ndarray
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Image shape (ny,nx)
+    """
+    squares = []
+    for n in shape:
+        sq = _np.arange(-(n - 1),n,dtype=_np.int64)**2
+        # Shared between images, so must not be modified
+        sq.flags.writeable = False
+        squares.append(sq)
+    return tuple(squares)
+
+def _offsets(shape,center):
+    """
+    Returns
+    -------
+    Squared offsets of the rows and of the columns from center : tuple of int ndarray
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Image shape (ny,nx)
+    center : tuple of int
+        Center pixel (iy,ix), within the image
+    """
+    return tuple(sq[n - 1 - c:2 * n - 1 - c] for sq,n,c in zip(_squares(shape),shape,center))
+
+class _Image(object):
+    """
+    Focal spot image.
+
+    Parameters
+    ----------
+    data : ndarray
+        2D image, with pixel values proportional to the fluence (plus a background level)
+    pixel_size : Quantity
+        Size of a (square) pixel in the focal plane
+    background : float, optional
+        Background pixel value. By default, the median of the border pixels
+
+    Notes
+    -----
+    The radial profile is the azimuthal average around the centroid pixel,
+    in bins of one pixel. All the results are computed at the first call and cached.
+    """
+    def __init__(self,data,pixel_size,background=None):
+        if _np.ndim(data)!=2:
+            raise ValueError("Focal spot image must be a 2D array.")
+        self.data       = data
+        self.pixel_size = pixel_size
+        self._cache     = {}
+        if background is not None:
+            self._cache['background'] = float(background)
+
+    def _cached(self,key,func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def background(self):
+        """
+        Returns
+        -------
+        Background pixel value : float
+        """
+        def background():
+            data = self.data
+            border = _np.concatenate((data[0],data[-1],data[1:-1,0],data[1:-1,-1]))
+            return float(_np.median(border))
+        return self._cached('background',background)
+
+    def total(self):
+        """
+        Returns
+        -------
+        Sum of the pixel values above background : float
+        """
+        return self._cached('total',lambda:float(self.data.sum(dtype=float)) - self.background() * self.data.size)
+
+    def peak(self):
+        """
+        Returns
+        -------
+        Maximum pixel value above background : float
+        """
+        return self._cached('peak',lambda:float(self.data.max()) - self.background())
+
+    def centroid(self):
+        """
+        Returns
+        -------
+        Centroid (y,x) position, in pixels : tuple of float
+        """
+        def centroid():
+            # Projections first, so that no full size temporary array is needed
+            ny,nx = self.data.shape
+            py = self.data.sum(axis=1,dtype=float) - self.background() * nx
+            px = self.data.sum(axis=0,dtype=float) - self.background() * ny
+            return (py @ _np.arange(ny))/self.total(),(px @ _np.arange(nx))/self.total()
+        return self._cached('centroid',centroid)
+
+    def radial(self):
+        """
+        Returns
+        -------
+        (integer radius in pixels, sum of pixel values above background per radius, number of pixels per radius) : tuple of ndarray
+        """
+        def radial():
+            shape   = self.data.shape
+            center  = tuple(min(max(int(round(c)),0),n - 1) for c,n in zip(self.centroid(),shape))
+            dy2,dx2 = _offsets(shape,center)
+            bins    = int(_np.sqrt(dy2.max() + dx2.max()) + 0.5) + 1
+            sums    = _np.zeros(bins)
+            counts  = _np.zeros(bins,dtype=_np.int64)
+            rows    = max(1,_BLOCK//shape[1])
+            for start in range(0,shape[0],rows):
+                block = slice(start,start + rows)
+                index = (_np.sqrt(dy2[block,None] + dx2[None,:]) + 0.5).astype(_np.int32).ravel()
+                sums   += _np.bincount(index,weights=self.data[block].ravel(),minlength=bins)
+                counts += _np.bincount(index,minlength=bins)
+            return _np.arange(bins),sums - self.background() * counts,counts
+        return self._cached('radial',radial)
+
+    def encircled_energy(self):
+        """
+        Returns
+        -------
+        (radius Quantity, fraction of the energy inside radius) : tuple
+        """
+        r,sums,counts = self.radial()
+        return (r + 0.5) * self.pixel_size,_np.cumsum(sums)/self.total()
+
+    def fraction_fwhm(self):
+        """
+        Returns
+        -------
+        Fraction of the energy in the pixels above half the maximum : float
+        """
+        def fraction():
+            data = self.data
+            above = data[data>=self.background() + self.peak()/2.]
+            return (float(above.sum(dtype=float)) - self.background() * above.size)/self.total()
+        return self._cached('fraction_fwhm',fraction)
+
+    def envelope(self,r):
+        """
+        Returns
+        -------
+        Radial profile at r, normalized by the maximum pixel value : float ndarray
+
+        Parameters
+        ----------
+        r : Quantity
+            Radius. Can be an array Quantity
+        """
+        radius,sums,counts = self.radial()
+        mean = _np.where(counts>0,sums/_np.maximum(counts,1),0.)
+        r = abs((r/self.pixel_size).to('').magnitude)
+        return _np.interp(r,radius,mean,right=0.)/self.peak()
+
+    def integral2D(self):
+        """
+        Returns
+        -------
+        Integral of the image normalized by its maximum pixel value, i.e. its effective area : Quantity
+        """
+        return self.total()/self.peak() * self.pixel_size**2
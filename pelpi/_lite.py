@@ -0,0 +1,884 @@
+#coding:utf8
+"""
+Lightweight unit registries (see ``pelpi.units``).
+
+``_Registry`` builds ``_Quantity`` instances : a magnitude (float or ndarray) and a ``_Unit``,
+which is a conversion factor to SI and a vector of exponents of the base dimensions.
+Units are interned, and the results of the operations between units are cached,
+so that operations between quantities only cost the operation on their magnitudes
+and a dict lookup.
+
+``_RawRegistry`` builds ``_Raw`` instances : ndarrays of SI magnitudes, without units.
+They have the same interface as quantities, with no-op conversions and no dimension checks.
+
+Both registries only know the units and constants used by pelpi (SI units with prefixes,
+common non-SI units and CODATA 2022 physical constants, as in pint).
+"""
+import re as _re
+import math as _math
+import numpy as _np
+from functools import lru_cache as _lru_cache
+
+__all__ = ["_Registry","_RawRegistry"]
+
+################################################################################
+# Dimensions
+_BASE = ("[length]","[mass]","[time]","[current]","[temperature]","[substance]","[luminosity]","[information]")
+
+class _Dimensionality(tuple):
+    """
+    Exponents of the base dimensions.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        num = [(b,e) for b,e in zip(_BASE,self) if e>0]
+        den = [(b,-e) for b,e in zip(_BASE,self) if e<0]
+        term = lambda b,e: b if e==1 else "%s ** %g"%(b,e)
+        res = " * ".join(term(b,e) for b,e in num) or ("1" if den else "dimensionless")
+        for b,e in den:
+            res += " / " + term(b,e)
+        return res
+
+    def __repr__(self):
+        return "<Dimensionality(%s)>"%str(self)
+
+def _dims(*exponents):
+    exponents = exponents + (0,)*(len(_BASE)-len(exponents))
+    # Rounded, so that fractional exponents (e.g. of a sqrt) compare equal
+    return _Dimensionality(round(e,12) + 0. for e in exponents)
+
+_NODIM = _dims()
+
+class DimensionalityError(TypeError):
+    """
+    Raised when converting or adding quantities of incompatible dimensions.
+    """
+
+class UndefinedUnitError(AttributeError):
+    """
+    Raised when a unit is not defined in the registry.
+    """
+
+################################################################################
+# Units
+class _Unit(object):
+    """
+    Unit, i.e. a conversion factor to SI and a dimensionality.
+
+    Units are interned (see ``_unit``), so they must not be created directly.
+    """
+    __slots__ = ("factor","dimensionality","name","_hash","__weakref__")
+    # ndarray * unit calls unit.__rmul__
+    __array_ufunc__ = None
+
+    def __init__(self,factor,dimensionality,name):
+        self.factor         = factor
+        self.dimensionality = dimensionality
+        self.name           = name
+        self._hash          = hash(dimensionality)
+
+    @property
+    def dimensionless(self):
+        return self.dimensionality==_NODIM
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self,other):
+        if self is other:
+            return True
+        if isinstance(other,str):
+            other = _parse_unit(other)
+        return (isinstance(other,_Unit) and self.dimensionality==other.dimensionality
+                and _math.isclose(self.factor,other.factor,rel_tol=1e-12))
+
+    def __ne__(self,other):
+        return not self==other
+
+    def __mul__(self,other):
+        if isinstance(other,_Unit):
+            return _mul(self,other)
+        if isinstance(other,_Quantity):
+            return _Quantity(other.magnitude,_mul(self,other.units))
+        return _Quantity(other,self)
+
+    def __rmul__(self,other):
+        return _Quantity(other,self)
+
+    def __truediv__(self,other):
+        if isinstance(other,_Unit):
+            return _div(self,other)
+        if isinstance(other,_Quantity):
+            return _Quantity(1/other.magnitude,_div(self,other.units))
+        return _Quantity(1/other,self)
+
+    def __rtruediv__(self,other):
+        return _Quantity(other,_pow(self,-1))
+
+    def __pow__(self,exponent):
+        return _pow(self,exponent)
+
+    def __str__(self):
+        return self.name or "dimensionless"
+
+    def __repr__(self):
+        return "<Unit('%s')>"%self
+
+    def __format__(self,spec):
+        return format(str(self),spec)
+
+# Interned units, by (factor, dimensionality)
+_units = {}
+# Results of the operations between units, by (id(a), id(b)) or (id(a), exponent)
+_products  = {}
+_quotients = {}
+_powers    = {}
+
+def _unit(factor,dimensionality,name):
+    """
+    Returns
+    -------
+    Interned unit of factor and dimensionality, named `name` if it does not exist yet : ``_Unit``
+    """
+    key = (factor,dimensionality)
+    unit = _units.get(key)
+    if unit is None:
+        unit = _units[key] = _Unit(factor,dimensionality,name)
+    return unit
+
+def _wrap(name):
+    return "(%s)"%name if any(c in name for c in "*/ ") else name
+
+def _mul(a,b):
+    key = (id(a),id(b))
+    try:
+        return _products[key]
+    except KeyError:
+        name = a.name if not b.name else b.name if not a.name else "%s*%s"%(a.name,_wrap(b.name))
+        dims = _dims(*(x + y for x,y in zip(a.dimensionality,b.dimensionality)))
+        unit = _products[key] = _unit(a.factor * b.factor,dims,name)
+        return unit
+
+def _div(a,b):
+    key = (id(a),id(b))
+    try:
+        return _quotients[key]
+    except KeyError:
+        name = a.name if not b.name else "%s/%s"%(a.name or "1",_wrap(b.name))
+        dims = _dims(*(x - y for x,y in zip(a.dimensionality,b.dimensionality)))
+        unit = _quotients[key] = _unit(a.factor / b.factor,dims,name)
+        return unit
+
+def _pow(a,exponent):
+    exponent = float(exponent)
+    key = (id(a),exponent)
+    try:
+        return _powers[key]
+    except KeyError:
+        name = "%s**%g"%(_wrap(a.name),exponent) if a.name and exponent!=1 else a.name
+        dims = _dims(*(x * exponent for x in a.dimensionality))
+        unit = _powers[key] = _unit(a.factor ** exponent,dims,name)
+        return unit
+
+_ONE = _unit(1.,_NODIM,"")
+
+################################################################################
+# Quantities
+def _as_unit(units):
+    """
+    Returns
+    -------
+    ``_Unit`` of units (str, ``_Unit`` or ``_Quantity``)
+    """
+    if isinstance(units,_Unit):
+        return units
+    if isinstance(units,str):
+        return _parse_unit(units)
+    if isinstance(units,_Quantity):
+        return units.units
+    raise TypeError("Can not convert %s to a unit."%type(units).__name__)
+
+class _Quantity(object):
+    """
+    Quantity of the ``lite`` unit backend.
+
+    Attributes
+    ----------
+    magnitude : float or ndarray
+        Magnitude, in `units`
+    units : ``_Unit``
+        Units
+    """
+    __slots__ = ("magnitude","units")
+    __array_priority__  = 20
+    _is_multiplicative  = True
+    __hash__            = None
+
+    def __init__(self,magnitude,units=_ONE):
+        self.magnitude  = magnitude
+        self.units      = units
+
+    # Conversions
+    @property
+    def dimensionality(self):
+        return self.units.dimensionality
+
+    @property
+    def dimensionless(self):
+        return self.units.dimensionality==_NODIM
+
+    def _magnitude_in(self,units):
+        """
+        Returns
+        -------
+        Magnitude of the quantity in `units` (``_Unit``)
+        """
+        if units is self.units:
+            return self.magnitude
+        if units.dimensionality!=self.units.dimensionality:
+            raise DimensionalityError("Cannot convert from '%s' (%s) to '%s' (%s)"%(
+                self.units,self.units.dimensionality,units,units.dimensionality))
+        return self.magnitude * (self.units.factor/units.factor)
+
+    def to(self,units):
+        units = _as_unit(units)
+        return _Quantity(self._magnitude_in(units),units)
+
+    def m_as(self,units):
+        return self._magnitude_in(_as_unit(units))
+
+    def to_base_units(self):
+        dims = self.units.dimensionality
+        return _Quantity(self.magnitude * self.units.factor,_unit(1.,dims,_base_name(dims)))
+
+    def _number(self):
+        """
+        Returns
+        -------
+        Magnitude of the dimensionless quantity (raises DimensionalityError otherwise)
+        """
+        return self._magnitude_in(_ONE)
+
+    def _other(self,other):
+        """
+        Returns
+        -------
+        Magnitude of other in the units of self, for additions and comparisons
+        """
+        if isinstance(other,_Quantity):
+            return other._magnitude_in(self.units)
+        if isinstance(other,_Unit):
+            return _Quantity(1.,other)._magnitude_in(self.units)
+        if self.units.dimensionality!=_NODIM and not _np.all(_np.asarray(other)==0):
+            raise DimensionalityError("Cannot add or compare a '%s' quantity and a number."%self.units)
+        return other / self.units.factor
+
+    # Arithmetic
+    def __add__(self,other):
+        return _Quantity(self.magnitude + self._other(other),self.units)
+
+    def __radd__(self,other):
+        return _Quantity(self._other(other) + self.magnitude,self.units)
+
+    def __sub__(self,other):
+        return _Quantity(self.magnitude - self._other(other),self.units)
+
+    def __rsub__(self,other):
+        return _Quantity(self._other(other) - self.magnitude,self.units)
+
+    def __mul__(self,other):
+        if isinstance(other,_Quantity):
+            return _Quantity(self.magnitude * other.magnitude,_mul(self.units,other.units))
+        if isinstance(other,_Unit):
+            return _Quantity(self.magnitude,_mul(self.units,other))
+        return _Quantity(self.magnitude * other,self.units)
+
+    def __rmul__(self,other):
+        return _Quantity(other * self.magnitude,self.units)
+
+    def __truediv__(self,other):
+        if isinstance(other,_Quantity):
+            return _Quantity(self.magnitude / other.magnitude,_div(self.units,other.units))
+        if isinstance(other,_Unit):
+            return _Quantity(self.magnitude,_div(self.units,other))
+        return _Quantity(self.magnitude / other,self.units)
+
+    def __rtruediv__(self,other):
+        return _Quantity(other / self.magnitude,_pow(self.units,-1))
+
+    def __pow__(self,exponent):
+        if isinstance(exponent,_Quantity):
+            exponent = exponent._number()
+        if _np.ndim(exponent)==0:
+            return _Quantity(self.magnitude ** exponent,_pow(self.units,exponent))
+        # Array exponents need a dimensionless base
+        return _Quantity(self._number() ** exponent,_ONE)
+
+    def __rpow__(self,other):
+        return _Quantity(other ** self._number(),_ONE)
+
+    def __neg__(self):
+        return _Quantity(-self.magnitude,self.units)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return _Quantity(abs(self.magnitude),self.units)
+
+    # Comparisons
+    def __eq__(self,other):
+        try:
+            return self.magnitude == self._other(other)
+        except DimensionalityError:
+            return False
+
+    def __ne__(self,other):
+        try:
+            return self.magnitude != self._other(other)
+        except DimensionalityError:
+            return True
+
+    def __lt__(self,other):
+        return self.magnitude < self._other(other)
+
+    def __le__(self,other):
+        return self.magnitude <= self._other(other)
+
+    def __gt__(self,other):
+        return self.magnitude > self._other(other)
+
+    def __ge__(self,other):
+        return self.magnitude >= self._other(other)
+
+    # Containers
+    def __bool__(self):
+        return bool(self.magnitude)
+
+    def __float__(self):
+        return float(self._number())
+
+    def __int__(self):
+        return int(self._number())
+
+    def __len__(self):
+        return len(self.magnitude)
+
+    def __iter__(self):
+        for m in self.magnitude:
+            yield _Quantity(m,self.units)
+
+    def __getitem__(self,key):
+        return _Quantity(self.magnitude[key],self.units)
+
+    @property
+    def shape(self):
+        return _np.shape(self.magnitude)
+
+    @property
+    def ndim(self):
+        return _np.ndim(self.magnitude)
+
+    @property
+    def size(self):
+        return _np.size(self.magnitude)
+
+    def sum(self,*args,**kwargs):
+        return _Quantity(_np.sum(self.magnitude,*args,**kwargs),self.units)
+
+    def mean(self,*args,**kwargs):
+        return _Quantity(_np.mean(self.magnitude,*args,**kwargs),self.units)
+
+    def max(self,*args,**kwargs):
+        return _Quantity(_np.max(self.magnitude,*args,**kwargs),self.units)
+
+    def min(self,*args,**kwargs):
+        return _Quantity(_np.min(self.magnitude,*args,**kwargs),self.units)
+
+    # Formatting
+    def __format__(self,spec):
+        if _np.ndim(self.magnitude)==0:
+            magnitude = format(self.magnitude,spec)
+        elif spec:
+            magnitude = _np.array2string(_np.asarray(self.magnitude),formatter={'all':lambda x:format(x,spec)})
+        else:
+            magnitude = str(self.magnitude)
+        return ("%s %s"%(magnitude,self.units)).strip()
+
+    def __str__(self):
+        return format(self,"")
+
+    def __repr__(self):
+        return "<Quantity(%s, '%s')>"%(self.magnitude,self.units)
+
+    # numpy
+    def __array_ufunc__(self,ufunc,method,*inputs,**kwargs):
+        if method!="__call__" or "out" in kwargs:
+            return NotImplemented
+        try:
+            func = _UFUNCS[ufunc.__name__]
+        except KeyError:
+            raise TypeError("numpy function `%s` is not supported by the `lite` unit backend."%ufunc.__name__)
+        return func(ufunc,*inputs,**kwargs)
+
+    def __array_function__(self,func,types,args,kwargs):
+        name = func.__name__
+        if name in _SAME_UNITS:
+            return _Quantity(func(args[0].magnitude,*args[1:],**kwargs),args[0].units)
+        if name in _MAGNITUDE:
+            return func(args[0].magnitude,*args[1:],**kwargs)
+        if name in _SEQUENCES:
+            units = next(a.units for a in args[0] if isinstance(a,_Quantity))
+            return _Quantity(func([_as_quantity(a)._magnitude_in(units) for a in args[0]],*args[1:],**kwargs),units)
+        if name=="var":
+            return _Quantity(func(args[0].magnitude,*args[1:],**kwargs),_pow(args[0].units,2))
+        raise TypeError("numpy function `%s` is not supported by the `lite` unit backend."%name)
+
+def _as_quantity(value):
+    return value if isinstance(value,_Quantity) else _Quantity(value,_ONE)
+
+def _base_name(dims):
+    num = [(s,e) for s,e in zip(_BASE_SYMBOLS,dims) if e>0]
+    den = [(s,-e) for s,e in zip(_BASE_SYMBOLS,dims) if e<0]
+    term = lambda s,e: s if e==1 else "%s**%g"%(s,e)
+    name = "*".join(term(s,e) for s,e in num)
+    if den:
+        name = (name or "1") + "/" + "/".join(term(s,e) for s,e in den)
+    return name
+
+_BASE_SYMBOLS = ("m","kg","s","A","K","mol","cd","bit")
+
+# numpy ufuncs, by number and kind of arguments
+def _binary(operator):
+    return lambda ufunc,a,b,**kwargs:operator(_as_quantity(a),b)
+
+def _same(ufunc,a,*args,**kwargs):
+    a = _as_quantity(a)
+    return _Quantity(ufunc(a.magnitude,*(a._other(b) for b in args),**kwargs),a.units)
+
+def _number(ufunc,*args,**kwargs):
+    return _Quantity(ufunc(*(_as_quantity(a)._number() for a in args),**kwargs),_ONE)
+
+def _magnitude(ufunc,a,**kwargs):
+    return ufunc(a.magnitude,**kwargs)
+
+def _ratio(ufunc,a,b,**kwargs):
+    a = _as_quantity(a)
+    return _Quantity(ufunc(a.magnitude,a._other(b),**kwargs),_ONE)
+
+_UFUNCS = {
+    'add'           : _binary(lambda a,b:a + b),
+    'subtract'      : _binary(lambda a,b:a - b),
+    'multiply'      : _binary(lambda a,b:a * b),
+    'divide'        : _binary(lambda a,b:a / b),
+    'true_divide'   : _binary(lambda a,b:a / b),
+    'power'         : _binary(lambda a,b:a ** b),
+    'less'          : _binary(lambda a,b:a < b),
+    'less_equal'    : _binary(lambda a,b:a <= b),
+    'greater'       : _binary(lambda a,b:a > b),
+    'greater_equal' : _binary(lambda a,b:a >= b),
+    'equal'         : _binary(lambda a,b:a == b),
+    'not_equal'     : _binary(lambda a,b:a != b),
+    'sqrt'          : lambda ufunc,a,**kwargs:a ** 0.5,
+    'cbrt'          : lambda ufunc,a,**kwargs:a ** (1/3.),
+    'square'        : lambda ufunc,a,**kwargs:a ** 2,
+    'reciprocal'    : lambda ufunc,a,**kwargs:1. / a,
+    'arctan2'       : _ratio,
+}
+_UFUNCS.update(dict.fromkeys(["negative","positive","absolute","fabs","ceil","floor","rint","trunc",
+    "conjugate","maximum","minimum","fmax","fmin","hypot","copysign"],_same))
+_UFUNCS.update(dict.fromkeys(["exp","expm1","exp2","log","log2","log10","log1p","sin","cos","tan",
+    "arcsin","arccos","arctan","sinh","cosh","tanh","arcsinh","arccosh","arctanh"],_number))
+_UFUNCS.update(dict.fromkeys(["isfinite","isnan","isinf","signbit","sign"],_magnitude))
+
+# numpy functions keeping the units of their first argument, returning magnitudes, or taking sequences
+_SAME_UNITS = {"sum","mean","std","median","percentile","quantile","nanmean","nanstd","nanmedian",
+    "nanpercentile","nansum","max","min","amax","amin","nanmax","nanmin","ptp","cumsum","diff","sort",
+    "ravel","reshape","squeeze","transpose","atleast_1d","atleast_2d","copy","broadcast_to","round",
+    "around","trapz","trapezoid","real","imag","flip","roll","take","repeat","tile","clip"}
+_MAGNITUDE = {"shape","ndim","size","argmin","argmax","argsort","nonzero","count_nonzero","iscomplexobj","isreal"}
+_SEQUENCES = {"concatenate","stack","hstack","vstack","column_stack","array_equal"}
+
+################################################################################
+# Unit definitions, as (SI factor, dimensionality)
+_c          = 299792458.
+_e          = 1.602176634e-19
+_h          = 6.62607015e-34
+# Values of pint's default registry, rather than derived from the fine structure constant
+_mu_0       = 1.2566370612696005e-06
+_epsilon_0  = 8.854187818792247e-12
+
+_L,_M,_T,_I,_K,_N,_J,_B = (_dims(*([0]*i + [1])) for i in range(len(_BASE)))
+_mul_dims = lambda *terms:_dims(*(sum(d[i] * p for d,p in terms) for i in range(len(_BASE))))
+
+_ENERGY     = _mul_dims((_M,1),(_L,2),(_T,-2))
+_POWER      = _mul_dims((_ENERGY,1),(_T,-1))
+_CHARGE     = _mul_dims((_I,1),(_T,1))
+_VOLTAGE    = _mul_dims((_POWER,1),(_I,-1))
+
+_DEFINITIONS = {
+    # Base units
+    'm'                         : (1.,_L),
+    'g'                         : (1e-3,_M),
+    's'                         : (1.,_T),
+    'A'                         : (1.,_I),
+    'K'                         : (1.,_K),
+    'mol'                       : (1.,_N),
+    'cd'                        : (1.,_J),
+    'bit'                       : (1.,_B),
+    # Derived units
+    'Hz'                        : (1.,_mul_dims((_T,-1))),
+    'N'                         : (1.,_mul_dims((_M,1),(_L,1),(_T,-2))),
+    'Pa'                        : (1.,_mul_dims((_M,1),(_L,-1),(_T,-2))),
+    'J'                         : (1.,_ENERGY),
+    'W'                         : (1.,_POWER),
+    'C'                         : (1.,_CHARGE),
+    'V'                         : (1.,_VOLTAGE),
+    'ohm'                       : (1.,_mul_dims((_VOLTAGE,1),(_I,-1))),
+    'S'                         : (1.,_mul_dims((_VOLTAGE,-1),(_I,1))),
+    'F'                         : (1.,_mul_dims((_CHARGE,1),(_VOLTAGE,-1))),
+    'T'                         : (1.,_mul_dims((_VOLTAGE,1),(_T,1),(_L,-2))),
+    'Wb'                        : (1.,_mul_dims((_VOLTAGE,1),(_T,1))),
+    'eV'                        : (_e,_ENERGY),
+    'rad'                       : (1.,_NODIM),
+    'sr'                        : (1.,_NODIM),
+    # Non SI units
+    'min'                       : (60.,_T),
+    'h'                         : (3600.,_T),
+    'day'                       : (86400.,_T),
+    'angstrom'                  : (1e-10,_L),
+    'micron'                    : (1e-6,_L),
+    'erg'                       : (1e-7,_ENERGY),
+    'deg'                       : (_math.pi/180.,_NODIM),
+    'percent'                   : (1e-2,_NODIM),
+    'byte'                      : (8.,_B),
+    'dimensionless'             : (1.,_NODIM),
+    # Physical constants (CODATA 2022)
+    'pi'                        : (_math.pi,_NODIM),
+    'c'                         : (_c,_mul_dims((_L,1),(_T,-1))),
+    'e'                         : (_e,_CHARGE),
+    'planck_constant'           : (_h,_mul_dims((_ENERGY,1),(_T,1))),
+    'hbar'                      : (_h/(2 * _math.pi),_mul_dims((_ENERGY,1),(_T,1))),
+    'k'                         : (1.380649e-23,_mul_dims((_ENERGY,1),(_K,-1))),
+    'N_A'                       : (6.02214076e23,_mul_dims((_N,-1))),
+    'm_e'                       : (9.1093837139e-31,_M),
+    'm_p'                       : (1.67262192595e-27,_M),
+    'amu'                       : (1.66053906892e-27,_M),
+    'mu_0'                      : (_mu_0,_mul_dims((_M,1),(_L,1),(_CHARGE,-2))),
+    'epsilon_0'                 : (_epsilon_0,_mul_dims((_CHARGE,2),(_ENERGY,-1),(_L,-1))),
+}
+
+_ALIASES = {
+    'meter':'m','metre':'m','gram':'g','second':'s','sec':'s','ampere':'A','kelvin':'K','mole':'mol',
+    'candela':'cd','hertz':'Hz','newton':'N','pascal':'Pa','joule':'J','watt':'W','coulomb':'C',
+    'volt':'V','siemens':'S','farad':'F','tesla':'T','weber':'Wb','electron_volt':'eV','radian':'rad',
+    'steradian':'sr','minute':'min','hour':'h','hr':'h','degree':'deg','B':'byte','Ω':'ohm',
+    'speed_of_light':'c','elementary_charge':'e','planck':'planck_constant','h_bar':'hbar',
+    'reduced_planck_constant':'hbar','boltzmann_constant':'k','k_B':'k','avogadro_constant':'N_A',
+    'electron_mass':'m_e','proton_mass':'m_p','Da':'amu','dalton':'amu','atomic_mass_constant':'amu',
+    'm_u':'amu','mu0':'mu_0','vacuum_permeability':'mu_0','magnetic_constant':'mu_0',
+    'eps0':'epsilon_0','eps_0':'epsilon_0','vacuum_permittivity':'epsilon_0','electric_constant':'epsilon_0',
+    'π':'pi',
+}
+
+_PREFIXES = {
+    'Y':1e24,'Z':1e21,'E':1e18,'P':1e15,'T':1e12,'G':1e9,'M':1e6,'k':1e3,'h':1e2,'da':1e1,
+    'd':1e-1,'c':1e-2,'m':1e-3,'u':1e-6,'µ':1e-6,'μ':1e-6,'n':1e-9,'p':1e-12,'f':1e-15,'a':1e-18,'z':1e-21,'y':1e-24,
+    'yotta':1e24,'zetta':1e21,'exa':1e18,'peta':1e15,'tera':1e12,'giga':1e9,'mega':1e6,'kilo':1e3,
+    'hecto':1e2,'deca':1e1,'deci':1e-1,'centi':1e-2,'milli':1e-3,'micro':1e-6,'nano':1e-9,
+    'pico':1e-12,'femto':1e-15,'atto':1e-18,'zepto':1e-21,'yocto':1e-24,
+}
+
+# Units accepting a prefix
+_PREFIXED = {'m','g','s','A','K','mol','cd','bit','byte','Hz','N','Pa','J','W','C','V','ohm','S','F','T','Wb','eV','rad','erg'}
+
+@_lru_cache(maxsize=None)
+def _named_unit(name):
+    """
+    Returns
+    -------
+    Unit of name (symbol, name or alias, with an optional prefix) : ``_Unit``
+    """
+    base = _ALIASES.get(name,name)
+    if base in _DEFINITIONS:
+        factor,dims = _DEFINITIONS[base]
+        return _unit(factor,dims,name)
+    for prefix in sorted(_PREFIXES,key=len,reverse=True):
+        if name.startswith(prefix) and len(name)>len(prefix):
+            rest = _ALIASES.get(name[len(prefix):],name[len(prefix):])
+            if rest in _PREFIXED:
+                factor,dims = _DEFINITIONS[rest]
+                return _unit(_PREFIXES[prefix] * factor,dims,name)
+    raise UndefinedUnitError("'%s' is not defined in the unit registry."%name)
+
+################################################################################
+# Parser of unit expressions, such as '1.2e-2 keV', 'kg * m**-3' or 'W/cm^2'
+_TOKEN = _re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([^\W\d][\w]*)|(\*\*|\^|[*/()+-]))",_re.UNICODE)
+
+def _tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos<len(expression):
+        match = _TOKEN.match(expression,pos)
+        if match is None or match.end()==pos:
+            raise ValueError("Invalid unit expression '%s'."%expression)
+        number,name,operator = match.groups()
+        if number is not None:
+            tokens.append(('number',float(number)))
+        elif name is not None:
+            tokens.append(('name',name))
+        else:
+            tokens.append(('op','**' if operator=='^' else operator))
+        pos = match.end()
+    return tokens
+
+class _Parser(object):
+    """
+    Recursive descent parser of unit expressions. Juxtaposition is a multiplication.
+    """
+    def __init__(self,expression):
+        self.expression = expression
+        self.tokens     = _tokenize(expression)
+        self.pos        = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos<len(self.tokens) else (None,None)
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return 1.
+        value = self.expr()
+        if self.pos!=len(self.tokens):
+            raise ValueError("Invalid unit expression '%s'."%self.expression)
+        return value
+
+    def expr(self):
+        value = self.term()
+        while True:
+            kind,token = self.peek()
+            if token in ('*','/'):
+                self.next()
+                other = self.term()
+                value = value * other if token=='*' else value / other
+            elif kind in ('number','name') or token=='(':
+                value = value * self.term()
+            else:
+                return value
+
+    def term(self):
+        value = self.unary()
+        if self.peek()[1]=='**':
+            self.next()
+            exponent = self.unary()
+            if isinstance(exponent,_Quantity):
+                exponent = exponent._number()
+            value = value ** exponent
+        return value
+
+    def unary(self):
+        kind,token = self.peek()
+        if token in ('-','+'):
+            self.next()
+            value = self.unary()
+            return -value if token=='-' else value
+        return self.atom()
+
+    def atom(self):
+        kind,token = self.next()
+        if kind=='number':
+            return token
+        if kind=='name':
+            return _named_unit(token)
+        if token=='(':
+            value = self.expr()
+            if self.next()[1]!=')':
+                raise ValueError("Invalid unit expression '%s'."%self.expression)
+            return value
+        raise ValueError("Invalid unit expression '%s'."%self.expression)
+
+@_lru_cache(maxsize=1024)
+def _parse(expression):
+    """
+    Returns
+    -------
+    (magnitude, unit) of a unit expression : (float, ``_Unit``)
+    """
+    value = _Parser(expression).parse()
+    if isinstance(value,_Unit):
+        magnitude,unit = 1.,value
+    elif isinstance(value,_Quantity):
+        magnitude,unit = value.magnitude,value.units
+    else:
+        magnitude,unit = value,_ONE
+    return magnitude,unit
+
+def _parse_unit(expression):
+    magnitude,unit = _parse(expression)
+    if magnitude!=1.:
+        return _unit(magnitude * unit.factor,unit.dimensionality,expression)
+    return unit
+
+################################################################################
+# Registries
+class _Registry(object):
+    """
+    Unit registry of the ``lite`` backend.
+
+    Notes
+    -----
+    ``registry(expression)`` returns a Quantity, ``registry.name`` returns a unit (as in pint).
+    """
+    Quantity = None # set below
+
+    def __call__(self,expression):
+        magnitude,unit = _parse(expression)
+        return _Quantity(magnitude,unit)
+
+    def __getattr__(self,name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _named_unit(name)
+
+    def Unit(self,expression):
+        return _parse_unit(expression)
+
+    def __repr__(self):
+        return "<lite UnitRegistry>"
+
+def _quantity(magnitude,units=_ONE):
+    """
+    Returns
+    -------
+    Quantity of magnitude in units (str, ``_Unit`` or ``_Quantity``)
+    """
+    return _Quantity(magnitude,_as_unit(units))
+
+_Registry.Quantity = staticmethod(_quantity)
+_Registry.DimensionalityError = DimensionalityError
+
+################################################################################
+# Raw SI magnitudes
+class _Untracked(object):
+    """
+    Dimensionality of raw magnitudes, i.e. not tracked.
+    """
+    def __str__(self):
+        return "untracked"
+
+    def __repr__(self):
+        return "<Dimensionality(untracked)>"
+
+_UNTRACKED = _Untracked()
+
+class _RawUnit(object):
+    """
+    Unit of raw magnitudes, i.e. the SI unit of any dimension.
+    """
+    __array_ufunc__ = None
+    dimensionality  = _UNTRACKED
+    dimensionless   = True
+
+    def __mul__(self,other):
+        return self if isinstance(other,_RawUnit) else _Raw(other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self,other):
+        return self if isinstance(other,_RawUnit) else _Raw(1./other)
+
+    def __rtruediv__(self,other):
+        return _Raw(other)
+
+    def __pow__(self,exponent):
+        return self
+
+    def __str__(self):
+        return "SI"
+
+    def __repr__(self):
+        return "<Unit('SI')>"
+
+    def __format__(self,spec):
+        return format("SI",spec)
+
+_RAW_UNIT = _RawUnit()
+
+class _Raw(_np.ndarray):
+    """
+    SI magnitude of the ``raw`` unit backend.
+
+    It is an ndarray (0-dimensional for scalars) with the interface of a Quantity :
+    ``to`` and ``to_base_units`` return the value itself, ``magnitude`` returns the plain
+    float or ndarray, and the dimensionality is not tracked (so all the dimension checks pass).
+    """
+    units               = _RAW_UNIT
+    dimensionality      = _UNTRACKED
+    dimensionless       = True
+    _is_multiplicative  = True
+
+    def __new__(cls,value):
+        return _np.asanyarray(value).view(cls)
+
+    @property
+    def magnitude(self):
+        return self.view(_np.ndarray)[()]
+
+    def to(self,*args,**kwargs):
+        return self
+
+    def to_base_units(self):
+        return self
+
+    def m_as(self,*args,**kwargs):
+        return self.magnitude
+
+    def __getitem__(self,key):
+        value = _np.ndarray.__getitem__(self,key)
+        return value if isinstance(value,_Raw) else _Raw(value)
+
+    def __iter__(self):
+        for value in self.view(_np.ndarray):
+            yield _Raw(value)
+
+    def __format__(self,spec):
+        return format(self.magnitude,spec) if self.ndim==0 else str(self.magnitude)
+
+    def __repr__(self):
+        return "<Raw(%s)>"%self.magnitude
+
+class _RawRegistry(object):
+    """
+    Unit registry of the ``raw`` backend : unit expressions are converted to their SI magnitude.
+    """
+    DimensionalityError = DimensionalityError
+
+    def __call__(self,expression):
+        magnitude,unit = _parse(expression)
+        return _Raw(magnitude * unit.factor)
+
+    def __getattr__(self,name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _Raw(_named_unit(name).factor)
+
+    def Unit(self,expression):
+        return _RAW_UNIT
+
+    @staticmethod
+    def Quantity(magnitude,units=_RAW_UNIT):
+        if isinstance(units,str):
+            magnitude,unit = _parse(units)[0] * magnitude,_parse(units)[1]
+            return _Raw(magnitude * unit.factor)
+        if isinstance(units,_RawUnit):
+            return _Raw(magnitude)
+        return _Raw(magnitude * units)
+
+    def __repr__(self):
+        return "<raw UnitRegistry>"
@@ -0,0 +1,151 @@
+#coding:utf8
+"""
+Evaluation of several estimates at once.
+
+A ``_Plan`` evaluates a list of requested estimates, with the memoization of
+estimate methods (see ``_tools._memoize``) sharing the common intermediate results.
+While evaluating, it records the graph of estimate calls (nodes and edges), so that
+one can check that each node has been evaluated only once.
+"""
+import inspect as _inspect
+from ._tools import _tracking
+
+__all__ = ["_Plan"]
+
+class _Node(object):
+    """
+    Node of the estimate graph, i.e. one estimate method called with some arguments.
+
+    Attributes
+    ----------
+    name : str
+        Class and method name of the estimate
+    arguments : tuple
+        Frozen arguments of the method call
+    calls : int
+        Number of times the node was requested
+    evaluations : int
+        Number of times the node was computed (not found in cache)
+    """
+    def __init__(self,name,arguments):
+        self.name           = name
+        self.arguments      = arguments
+        self.calls          = 0
+        self.evaluations    = 0
+
+    def __repr__(self):
+        return "<Node %s : %i call(s), %i evaluation(s)>"%(self.name,self.calls,self.evaluations)
+
+class _Plan(object):
+    """
+    Plan of evaluation of several estimates.
+
+    Parameters
+    ----------
+    root_inst : object
+        Instance from which estimate paths are resolved. Typically a LaserPlasmaInteraction instance
+    targets : list
+        Estimate paths, with model name after ':' if needed (e.g. 'electron.hot.temperature:Wilks1992').
+        An item can also be a tuple (path, kwargs) to give arguments to this estimate only
+    **kargs
+        Arguments given to all the estimates having a parameter of the same name (such as `temperature`)
+
+    Attributes
+    ----------
+    nodes : dict
+        {(default instance, cache key) : ``_Node``}, in order of first call
+    edges : set
+        (caller node key, called node key)
+    results : dict or None
+        {target : result}, once evaluated
+    """
+    def __init__(self,root_inst,targets,**kargs):
+        self._root      = root_inst
+        self._calls     = [self._parse(target,kargs) for target in targets]
+        self.nodes      = {}
+        self.edges      = set()
+        self.results    = None
+        self._stack     = []
+
+    def _parse(self,target,kargs):
+        """
+        Returns
+        -------
+        (target, method, kwargs) of a requested estimate
+        """
+        if isinstance(target,tuple):
+            target,kwargs = target
+            kwargs = dict(kwargs)
+        else:
+            kwargs = {}
+
+        path,_,model = target.partition(':')
+        method = self._root
+        for name in path.split('.'):
+            method = getattr(method,name)
+
+        if model:
+            kwargs['model'] = model
+
+        # Only give global arguments to methods explicitly asking for them
+        parameters = _inspect.signature(method).parameters
+        for key,val in kargs.items():
+            if key in parameters and parameters[key].kind!=_inspect.Parameter.VAR_KEYWORD:
+                kwargs.setdefault(key,val)
+
+        return target,method,kwargs
+
+    def _enter(self,inst,name,cache_key,cached):
+        """
+        Record the call of an estimate. Called by memoized methods when the plan is active.
+        """
+        node_key = (inst.default,cache_key)
+        node = self.nodes.get(node_key)
+        if node is None:
+            node = self.nodes[node_key] = _Node(type(inst).__name__+'.'+name,cache_key[1:])
+        node.calls += 1
+        if not cached:
+            node.evaluations += 1
+        if self._stack:
+            self.edges.add((self._stack[-1],node_key))
+        self._stack.append(node_key)
+
+    def _exit(self):
+        self._stack.pop()
+
+    def evaluate(self):
+        """
+        Returns
+        -------
+        Results of the requested estimates : dict {target : result}
+        """
+        previous = getattr(_tracking,'plan',None)
+        _tracking.plan = self
+        try:
+            self.results = {}
+            for target,method,kwargs in self._calls:
+                self.results[target] = method(**kwargs)
+        finally:
+            _tracking.plan = previous
+        return self.results
+
+    def order(self):
+        """
+        Returns
+        -------
+        Nodes in evaluation order (dependencies first) : list of ``_Node``
+        """
+        children = {}
+        for parent,child in self.edges:
+            children.setdefault(parent,[]).append(child)
+        order,seen = [],set()
+        def visit(key):
+            if key in seen:
+                return
+            seen.add(key)
+            for child in children.get(key,[]):
+                visit(child)
+            order.append(self.nodes[key])
+        for key in self.nodes:
+            visit(key)
+        return order
@@ -0,0 +1,169 @@
+#coding:utf8
+"""
+Numerical integration of profile envelopes.
+
+Envelopes are integrated over a half-line, mapped on [0,1) with x = t/(1-t),
+with composite Gauss-Legendre quadrature. The number of panels is doubled
+until the relative difference between two successive results is below the
+requested tolerance, so that both smooth (gaussian-like) and sharp
+(high order super-gaussian) envelopes are integrated accurately.
+
+Profile envelopes without analytical integral are defined here as functions
+of the normalized axis u = x/fwhm (see ``Profile``), so that their integrals
+only depend on the profile shape and can be cached.
+"""
+import numpy as _np
+from functools import lru_cache as _lru_cache
+
+__all__ = ["_integrate_line","_integrate_radial","_shape_integral"]
+
+# Gauss-Legendre nodes and weights on [0,1]
+_NODES,_WEIGHTS = _np.polynomial.legendre.leggauss(16)
+_NODES      = (_NODES + 1.)/2.
+_WEIGHTS    = _WEIGHTS/2.
+
+def _integrate_half_line(func,rtol=1e-10,panels=8,max_panels=4096):
+    """
+    Returns
+    -------
+    Integral of func over [0,+inf) : float
+
+    Parameters
+    ----------
+    func : callable
+        Vectorized function of a float ndarray, returning a float ndarray
+    rtol : float, optional
+        Relative tolerance
+    panels : int, optional
+        Initial number of panels on the mapped interval [0,1)
+    max_panels : int, optional
+        Maximum number of panels
+
+    Raises
+    ------
+    ArithmeticError
+        If the integral does not converge within max_panels.
+    """
+    def composite(n):
+        edges   = _np.linspace(0.,1.,n+1)
+        t       = (edges[:-1,None] + _NODES[None,:]/n).ravel()
+        w       = _np.tile(_WEIGHTS/n,n)
+        x       = t/(1.-t)
+        return _np.sum(w * func(x)/(1.-t)**2)
+
+    previous = composite(panels)
+    while panels < max_panels:
+        panels  *= 2
+        current = composite(panels)
+        if abs(current - previous) <= rtol * abs(current):
+            return current
+        previous = current
+    raise ArithmeticError("Integral did not converge with %i panels."%max_panels)
+
+def _integrate_line(func,**kwargs):
+    """
+    Returns
+    -------
+    Integral of func over (-inf,+inf) : float
+
+    See ``_integrate_half_line`` for the parameters.
+    """
+    return _integrate_half_line(lambda x:func(x) + func(-x),**kwargs)
+
+def _integrate_radial(func,**kwargs):
+    """
+    Returns
+    -------
+    Integral of the isotropic function func(r) over the plane, i.e. 2 pi int_0^inf func(r) r dr : float
+
+    See ``_integrate_half_line`` for the parameters.
+    """
+    return 2 * _np.pi * _integrate_half_line(lambda r:func(r) * r,**kwargs)
+
+
+################################################################################
+# Numerically integrated profiles, as functions of the normalized axis u = x/fwhm
+_SECH2_K = 2 * _np.log(1 + _np.sqrt(2))
+
+def _sech2(u,order):
+    # Written with exp(-|y|) so that it does not overflow for large u
+    y = _np.exp(-2 * _SECH2_K * abs(u))
+    return 4 * y/(1 + y)**2
+
+def _super_gaussian(u,order):
+    if order is None:
+        raise TypeError("super-gaussian profile needs an `order`.")
+    return _np.exp(-_np.log(2) * abs(2 * u)**order)
+
+_SHAPES = {
+    'super-gaussian'    : _super_gaussian,
+    'sech2'             : _sech2,
+    'lorentzian'        : lambda u,order: 1./(1 + (2 * u)**2),
+}
+
+def _is_shape(profile):
+    """
+    Returns
+    -------
+    True if profile is integrated numerically (registered shape name or user function)
+    """
+    return callable(profile) or profile in _SHAPES
+
+def _shape(profile,order):
+    """
+    Returns
+    -------
+    Envelope of profile as a function of the normalized axis : callable
+    """
+    if callable(profile):
+        return profile
+    if profile not in _SHAPES:
+        raise NameError("Unknown profile name `%s`."%profile)
+    return lambda u:_SHAPES[profile](u,order)
+
+def _magnitude(order):
+    """
+    Returns
+    -------
+    Magnitude of a (possibly dimensionless Quantity) order : float, ndarray or None
+    """
+    if hasattr(order,'magnitude'):
+        return order.to('').magnitude
+    return order
+
+@_lru_cache(maxsize=256)
+def _cached_shape_integral(profile,ndim,order):
+    shape = _shape(profile,order)
+    if ndim==1:
+        return _integrate_line(shape)
+    try:
+        return _integrate_radial(shape)
+    except ArithmeticError:
+        raise ArithmeticError("2D integral of profile `%s` diverges."%profile)
+
+def _shape_integral(profile,ndim,order=None):
+    """
+    Returns
+    -------
+    Integral of the normalized envelope of profile, over the line (ndim=1) or the plane (ndim=2) : float or ndarray
+
+    Parameters
+    ----------
+    profile : str or callable
+        Shape name (key of ``_SHAPES``) or user function of the normalized axis
+    ndim : int
+        Number of dimensions, 1 or 2
+    order : float or ndarray, optional
+        Order of the profile
+
+    Notes
+    -----
+    Integrals only depend on (profile, ndim, order), so they are stored in a bounded
+    (least recently used) cache shared by all the ``Profile`` instances. This way, estimates
+    depending on a numerically integrated profile (such as ``Laser.intensity``) do not
+    integrate it again for each new Laser, or each new value of fwhm.
+    Array orders are integrated element-wise.
+    """
+    if _np.ndim(order):
+        return _np.vectorize(lambda o:_cached_shape_integral(profile,ndim,float(o)),otypes=[float])(order)
+    return _cached_shape_integral(profile,ndim,order)
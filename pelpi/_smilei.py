@@ -0,0 +1,378 @@
+#coding:utf8
+"""
+Smilei tools : export of laser field maps, and namelist generation.
+
+Arrays are written chunk by chunk (see ``Laser.envelope_grid``) into a file
+opened as a memory map (``.npy`` with ``np.lib.format.open_memmap``, or raw binary
+with ``np.memmap``), so that tables larger than the available memory can be written.
+A JSON file named after the array file (e.g. ``field.npy.json``) describes the array
+(shape, dtype, axes and reference units), so that it can be read back from a Smilei namelist.
+
+Namelists are generated from the ``ParticleInCell`` estimates (cell length, time step)
+and the Smilei reference units, with a patch layout suited to the number of cores
+and to the target density layout (see ``_balanced_patches``).
+"""
+import itertools as _itertools
+import os as _os
+import json as _json
+from ._global import *
+
+__all__ = ["_export","_patches","_namelist","_density","_load_balance","_balanced_patches"]
+
+_QUANTITIES = ('envelope','field')
+
+def _metadata_filename(filename):
+    """
+    Returns
+    -------
+    Name of the JSON metadata file of filename : str
+    """
+    return filename + ".json"
+
+def _export(smilei,laser,filename,quantity,axes,dtype,chunk_size):
+    """
+    Write a laser envelope or field map in Smilei units.
+
+    Returns
+    -------
+    Metadata of the written array : dict
+
+    Parameters
+    ----------
+    smilei : object
+        ``_Smilei`` instance, giving the reference units
+    laser : object
+        pelpi ``Laser`` instance
+    filename : str
+        Output file name. ``.npy`` files are written in numpy format, other extensions as raw binary
+    quantity : str
+        ``envelope`` (dimensionless field envelope, i.e. square root of the intensity envelope)
+        or ``field`` (electric field amplitude, in Smilei units)
+    axes : dict
+        Grid axes, {'r','t'} or {'x','y','z','t'}, as 1D Quantities (see ``Laser.envelope_grid``)
+    dtype : str
+        Data type of the written array
+    chunk_size : int
+        Maximum number of grid points per chunk
+    """
+    if quantity not in _QUANTITIES:
+        raise NameError("Unknown exported quantity `%s`. Available quantities are %s."%(quantity,list(_QUANTITIES)))
+
+    names   = ('r','t') if 'r' in axes else ('x','y','z','t')
+    shape   = tuple(len(axes[name]) for name in names)
+
+    # Smilei time and space envelopes are field envelopes, i.e. square roots of the intensity envelopes
+    if quantity=="envelope":
+        chunks  = laser.envelope_grid(chunk_size=chunk_size,**axes)
+        factor  = 1 * _u('')
+    else:
+        # Linear polarization : I = epsilon_0 c E**2/2
+        chunks  = laser.intensity_grid(chunk_size=chunk_size,**axes)
+        factor  = 2/(_u.epsilon_0 * _u.c * smilei.electric_field()**2)
+
+    if _os.path.splitext(filename)[1]==".npy":
+        out = _np.lib.format.open_memmap(filename,mode='w+',dtype=dtype,shape=shape)
+    else:
+        out = _np.memmap(filename,mode='w+',dtype=dtype,shape=shape)
+
+    try:
+        for sl,chunk in chunks:
+            out[sl] = _np.sqrt((chunk * factor).to('').magnitude)
+        out.flush()
+    finally:
+        del out
+
+    reference = {'length':smilei.length(),'time':smilei.time(),'electric_field':smilei.electric_field()}
+    dims      = {'r':'length','x':'length','y':'length','z':'length','t':'time'}
+    metadata  = {
+        'file'      : _os.path.basename(filename),
+        'quantity'  : quantity,
+        'dtype'     : _np.dtype(dtype).str,
+        'shape'     : list(shape),
+        'order'     : 'C',
+        'axes'      : {name:(axes[name]/reference[dims[name]]).to('').magnitude.tolist() for name in names},
+        'axes_order': list(names),
+        'reference' : {key:[float(val.to_base_units().magnitude),str(val.to_base_units().units)] for key,val in reference.items()},
+    }
+    with open(_metadata_filename(filename),'w') as f:
+        _json.dump(metadata,f,indent=2)
+    return metadata
+
+################################################################################
+# Namelist generation
+def _patches(cells,cores,patches_per_core=4,min_cells=8):
+    """
+    Returns
+    -------
+    Number of patches in each dimension : list of int
+
+    Parameters
+    ----------
+    cells : sequence of int
+        Number of cells in each dimension
+    cores : int
+        Total number of cores (MPI processes times OpenMP threads)
+    patches_per_core : int, optional
+        Target number of patches per core, for dynamic load balancing
+    min_cells : int, optional
+        Minimal number of cells per patch in each dimension
+
+    Notes
+    -----
+    Smilei needs a power of 2 of patches in each dimension. The total number of patches
+    is the smallest power of 2 above patches_per_core * cores, and patches are added
+    (by factors of 2) in the dimension with the most cells per patch, as long as
+    patches keep at least min_cells cells per dimension.
+    """
+    patches = [1] * len(cells)
+    target  = patches_per_core * cores
+    while _np.prod(patches) < target:
+        per_patch = [c/p for c,p in zip(cells,patches)]
+        d = int(_np.argmax(per_patch))
+        if per_patch[d]/2 < min_cells:
+            break
+        patches[d] *= 2
+    return patches
+
+def _density(density):
+    """
+    Returns
+    -------
+    Target density along the first dimension, as a function of x in meters (float ndarray) : callable
+
+    Parameters
+    ----------
+    density : tuple
+        (x_front, thickness) length Quantities of a uniform slab, or
+        (x, n) of a tabulated profile, with x a 1D length Quantity and n the density (any units)
+    """
+    a,b = density
+    if _np.ndim(a)==1:
+        x = a.to('m').magnitude
+        n = _np.asarray(getattr(b,'magnitude',b),dtype=float)
+        return lambda xc:_np.interp(xc,x,n,left=0.,right=0.)
+    front       = a.to('m').magnitude
+    back        = (a + b).to('m').magnitude
+    return lambda xc:((xc>=front) & (xc<back)) * 1.
+
+def _load_balance(cells,patches,dx,density,mpi,omp,particles_per_cell,cell_load,ghost_cells=0):
+    """
+    Returns
+    -------
+    (macro-particles per patch, load imbalance factor) : (ndarray of shape patches, float)
+
+    Parameters
+    ----------
+    cells : sequence of int
+        Number of cells in each dimension, multiple of the number of patches
+    patches : sequence of int
+        Number of patches in each dimension
+    dx : float
+        Cell length, in the length units of density (meters for ``_density``)
+    density : callable
+        Density along the first dimension (see ``_density``)
+    mpi, omp : int
+        Number of MPI processes and OpenMP threads per process
+    particles_per_cell : int
+        Number of macro-particles per cell (of non-zero density) of all the species
+    cell_load : float
+        Computational load of one cell, relative to one particle
+    ghost_cells : int, optional
+        Number of ghost cells on each side of a patch, in each dimension
+
+    Notes
+    -----
+    Particles are counted per cell along the first dimension, histogrammed per patch with ``np.bincount``,
+    and multiplied by the number of transverse cells of a patch (the target being uniform transversely).
+
+    Patches are distributed to the MPI processes in contiguous and balanced chunks along the patch order
+    (as Smilei dynamic load balancing does along its Hilbert curve), and to the threads dynamically.
+    The time of a process is then the maximum between its load divided by the number of threads
+    and the load of its heaviest patch. The imbalance factor is the maximum time divided by the ideal one
+    (total load divided by the number of cores) : 1 is a perfect balance.
+
+    Ghost cells add to the cell load of each patch, but not to the ideal time, so that the overhead
+    of small or elongated patches (large surface over volume) is included in the imbalance factor.
+    """
+    cells,patches = list(cells),list(patches)
+    if any(c % p for c,p in zip(cells,patches)):
+        raise ValueError("Number of cells must be a multiple of the number of patches in each dimension.")
+    xc      = (_np.arange(cells[0]) + 0.5) * dx
+    per_x   = (density(xc)>0) * particles_per_cell
+    counts  = _np.bincount(_np.arange(cells[0])//(cells[0]//patches[0]),weights=per_x,minlength=patches[0])
+    transverse = _np.prod([c//p for c,p in zip(cells[1:],patches[1:])],dtype=float)
+    particles  = _np.broadcast_to((counts * transverse).reshape([-1] + [1] * (len(cells) - 1)),patches)
+
+    load    = particles.ravel() + cell_load * _np.prod([c//p + 2 * ghost_cells for c,p in zip(cells,patches)],dtype=float)
+    total   = load.sum()
+    ideal   = (particles.sum() + cell_load * _np.prod(cells,dtype=float))/(mpi * omp)
+    # Balanced contiguous chunks : process k takes the patches whose cumulative load starts in its share
+    start   = _np.concatenate(([0.],_np.cumsum(load)[:-1]))
+    rank    = _np.minimum((start/total * mpi).astype(int),mpi - 1)
+    rank_load = _np.bincount(rank,weights=load,minlength=mpi)
+    rank_max  = _np.zeros(mpi)
+    _np.maximum.at(rank_max,rank,load)
+    time    = _np.maximum(rank_load/omp,rank_max)
+    return _np.array(particles),float(time.max()/ideal)
+
+def _balanced_patches(cells,dx,density,mpi,omp,particles_per_cell,cell_load,patches_per_core=4,min_cells=8,ghost_cells=2):
+    """
+    Returns
+    -------
+    (number of patches in each dimension, imbalance factor) of the best balanced patch layout : (list of int, float)
+
+    Parameters
+    ----------
+    See ``_load_balance``.
+    patches_per_core : int, optional
+        Minimal number of patches per core, for dynamic load balancing (as ``_patches``)
+    min_cells : int, optional
+        Minimal number of cells per patch in each dimension
+    ghost_cells : int, optional
+        Number of ghost cells on each side of a patch, in each dimension
+
+    Notes
+    -----
+    All the layouts with a power of 2 of patches in each dimension, at least patches_per_core patches per core
+    and at least min_cells cells per patch are evaluated (the number of cells being rounded up to a multiple
+    of the number of patches), and the one with the smallest imbalance factor including the load of the ghost cells
+    is chosen. For equal factors (within 1%), the layout with the most square patches is preferred.
+    If min_cells does not allow patches_per_core patches per core, only the layouts with the most patches are evaluated.
+    The returned imbalance factor is the one of ``_load_balance`` without ghost cells.
+    """
+    powers  = [[2**k for k in range(int(_np.log2(max(c//min_cells,1))) + 1)] for c in cells]
+    layouts = list(_itertools.product(*powers))
+    target  = min(patches_per_core * mpi * omp,max(int(_np.prod(patches)) for patches in layouts))
+    best = None
+    for patches in layouts:
+        if _np.prod(patches) < target:
+            continue
+        rounded   = [int(_np.ceil(c/p)) * p for c,p in zip(cells,patches)]
+        cost      = _load_balance(rounded,patches,dx,density,mpi,omp,particles_per_cell,cell_load,ghost_cells)[1]
+        per_patch = [c/p for c,p in zip(rounded,patches)]
+        key = (round(cost,2),max(per_patch)/min(per_patch))
+        if best is None or key < best[0]:
+            best = (key,list(patches),rounded)
+    patches,rounded = best[1:]
+    return patches,_load_balance(rounded,patches,dx,density,mpi,omp,particles_per_cell,cell_load)[1]
+
+_TEMPLATE = '''# Smilei namelist generated by pelpi
+# Units : reference angular frequency {wr_SI:.10g} rad/s, length {Lr_SI:.10g} m, time {Tr_SI:.10g} s
+
+Main(
+    geometry                        = "{ndim}Dcartesian",
+    interpolation_order             = 2,
+    cell_length                     = {cell_length},
+    grid_length                     = {grid_length},
+    number_of_patches               = {patches},
+    timestep                        = {timestep:.10g},
+    simulation_time                 = {simulation_time:.10g},
+    EM_boundary_conditions          = [["silver-muller"]],
+    reference_angular_frequency_SI  = {wr_SI:.10g},
+)
+
+{laser}
+
+Species(
+    name                    = "electron",
+    position_initialization = "random",
+    momentum_initialization = "cold",
+    particles_per_cell      = {ppc},
+    mass                    = 1.0,
+    charge                  = -1.0,
+    number_density          = trapezoidal({ne:.10g}, xvacuum={x_target:.10g}, xplateau={thickness:.10g}),
+    boundary_conditions     = [["remove"]],
+)
+
+Species(
+    name                    = "ion",
+    position_initialization = "random",
+    momentum_initialization = "cold",
+    particles_per_cell      = {ppc},
+    mass                    = {ion_mass:.10g},
+    charge                  = {Z:.10g},
+    number_density          = trapezoidal({ni:.10g}, xvacuum={x_target:.10g}, xplateau={thickness:.10g}),
+    boundary_conditions     = [["remove"]],
+)
+'''
+
+def _format_list(values):
+    return "[" + ", ".join("%.10g"%v for v in values) + "]"
+
+def _namelist(smilei,pic,box,mpi,omp,lim,temperature,thickness,x_target,particles_per_cell,duration):
+    """
+    Returns
+    -------
+    Smilei namelist : str
+
+    See ``_Smilei.namelist`` for the parameters.
+    """
+    lpi = pic.lpi
+    las = lpi.laser
+    mat = lpi.target.material
+    ndim = len(box)
+    if ndim not in (1,2,3):
+        raise ValueError("box must have 1, 2 or 3 dimensions.")
+
+    Lr,Tr = smilei.length(),smilei.time()
+    norm  = lambda q,ref:float((q/ref).to('').magnitude)
+
+    # Resolution. time_step satisfies the 2D CFL condition, so it is reduced in 3D
+    dx = norm(pic.length_cell(lim,temperature),Lr)
+    dt = norm(pic.time_step(lim,True,temperature),Tr) * min(1.,_np.sqrt(2./ndim))
+
+    lengths = [norm(L,Lr) for L in box]
+    cells   = [int(_np.ceil(L/dx)) for L in lengths]
+    x_front = lengths[0]/2. if x_target is None else norm(x_target,Lr)
+    depth   = lengths[0] - x_front if thickness is None else norm(thickness,Lr)
+    slab    = lambda xc:((xc>=x_front) & (xc<x_front + depth)) * 1.
+    patches = _balanced_patches(cells,dx,slab,mpi,omp,2 * particles_per_cell,1.)[0]
+    # Whole number of cells per patch
+    cells   = [int(_np.ceil(c/p)) * p for c,p in zip(cells,patches)]
+    grid    = [c * dx for c in cells]
+
+    # Laser. Profiles are intensity envelopes, and Smilei ones are field envelopes
+    tprof,sprof = las.time_profile,las.space_profile
+    if tprof.profile()!="gaussian1D" or (ndim>1 and sprof.profile()!="gaussian2D"):
+        raise NameError("Namelist generation needs gaussian1D time and gaussian2D space laser profiles.")
+    fwhm    = norm(tprof.fwhm(),Tr) * _np.sqrt(2)
+    a0      = float(las.intensity_peak_normalized().magnitude)
+    omega   = norm(las.angular_frequency(),smilei.angular_frequency())
+    x_target,thickness = x_front,depth
+    envelope  = "tgaussian(fwhm=%.10g, center=%.10g)"%(fwhm,1.5 * fwhm)
+    if ndim==1:
+        laser = ("LaserPlanar1D(\n    box_side        = \"xmin\",\n    a0              = %.10g,\n"
+                 "    omega           = %.10g,\n    time_envelope   = %s,\n)")%(a0,omega,envelope)
+    else:
+        # Smilei waist is the 1/e radius of the field
+        waist = norm(sprof.fwhm(),Lr)/_np.sqrt(2 * _np.log(2))
+        focus = [x_target] + [g/2. for g in grid[1:]]
+        laser = ("LaserGaussian%iD(\n    box_side        = \"xmin\",\n    a0              = %.10g,\n"
+                 "    omega           = %.10g,\n    focus           = %s,\n    waist           = %.10g,\n"
+                 "    time_envelope   = %s,\n)")%(ndim,a0,omega,_format_list(focus),waist,envelope)
+
+    if duration is None:
+        simulation_time = grid[0] + 3 * fwhm   # light crossing time, in Smilei units
+    else:
+        simulation_time = norm(duration,Tr)
+
+    Nr = smilei.number_density()
+    return _TEMPLATE.format(
+        ndim            = ndim,
+        wr_SI           = float(smilei.angular_frequency().to('rad/s').magnitude),
+        Lr_SI           = float(Lr.to('m').magnitude),
+        Tr_SI           = float(Tr.to('s').magnitude),
+        cell_length     = _format_list([dx] * ndim),
+        grid_length     = _format_list(grid),
+        patches         = "[" + ", ".join(str(p) for p in patches) + "]",
+        timestep        = dt,
+        simulation_time = simulation_time,
+        laser           = laser,
+        ppc             = particles_per_cell,
+        ne              = norm(mat.electron.number_density(),Nr),
+        ni              = norm(mat.ion.number_density(),Nr),
+        x_target        = x_target,
+        thickness       = thickness,
+        ion_mass        = float((mat.atomic_mass()/_u.m_e).to('').magnitude),
+        Z               = float(_np.asarray(getattr(mat.Z(),'magnitude',mat.Z()))),
+    )
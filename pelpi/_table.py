@@ -0,0 +1,178 @@
+#coding:utf8
+"""
+Tabulated (measured) profiles.
+
+Tables are kept as given (typically ``np.memmap`` arrays loaded with ``_load``),
+so that profiles with millions of samples are not copied into memory.
+Reductions over the whole table (peak value, integrals) are computed by chunks,
+to bound the size of the temporary arrays, and cached in the ``_Table`` instance.
+"""
+import os as _os
+from ._global import *
+
+__all__ = ["_Table","_load"]
+
+# Number of samples per chunk in reductions
+_CHUNK = 1 << 20
+
+class _Table(object):
+    """
+    Tabulated envelope.
+
+    Parameters
+    ----------
+    x : ndarray
+        Axis magnitudes, sorted in increasing order
+    y : ndarray
+        Envelope values, in arbitrary units
+    units : pint Unit
+        Units of x
+
+    Notes
+    -----
+    If the axis starts at 0 or more, the table is assumed to be a radial (or half) lineout
+    of a symmetric profile, that is evaluated at |x|.
+
+    The envelope is normalized by the peak of y, so that its maximum value is 1.
+    """
+    def __init__(self,x,y,units):
+        if _np.ndim(x)!=1 or _np.shape(x)!=_np.shape(y):
+            raise ValueError("Tabulated profile needs 1D x and y arrays of the same length.")
+        if len(x)<2 or not x[0]<x[-1]:
+            raise ValueError("Tabulated profile axis must be sorted in increasing order.")
+        self.x          = x
+        self.y          = y
+        self.units      = units
+        self.symmetric  = x[0]>=0
+        self._peak      = None
+        self._integrals = {}
+
+    def peak(self):
+        """
+        Returns
+        -------
+        Maximum of y : float
+        """
+        if self._peak is None:
+            self._peak = max(float(_np.max(self.y[i:i+_CHUNK])) for i in range(0,len(self.y),_CHUNK))
+        return self._peak
+
+    def envelope(self,x):
+        """
+        Returns
+        -------
+        Normalized envelope at x, linearly interpolated (0 outside of the table) : float ndarray
+
+        Parameters
+        ----------
+        x : Quantity
+            Axis. Can be an array Quantity
+        """
+        x = x.to(self.units).magnitude
+        if self.symmetric:
+            x = abs(x)
+        return _np.interp(x,self.x,self.y,left=0.,right=0.)/self.peak()
+
+    def integral(self,ndim,method='trapezoid'):
+        """
+        Returns
+        -------
+        Integral of the normalized envelope over the line (ndim=1) or the plane (ndim=2) : Quantity
+
+        Parameters
+        ----------
+        ndim : int
+            Number of dimensions, 1 or 2. In 2D, the table must be a radial lineout
+        method : str, optional
+            Integration method, ``trapezoid`` or ``simpson``
+        """
+        key = (ndim,method)
+        if key not in self._integrals:
+            if method not in _RULES:
+                raise NameError("Unknown integration method `%s`. Available methods are %s."%(method,sorted(_RULES)))
+            if ndim==1:
+                I = _RULES[method](self.x,self.y)
+                if self.symmetric:
+                    I *= 2
+                I = I * self.units
+            elif ndim==2:
+                if not self.symmetric:
+                    raise ValueError("2D integral of a tabulated profile needs a radial lineout (axis starting at 0 or more).")
+                I = 2 * _np.pi * _RULES[method](self.x,self.y,weight=True) * self.units**2
+            else:
+                raise ValueError("ndim must be 1 or 2.")
+            self._integrals[key] = I/self.peak()
+        return self._integrals[key]
+
+def _trapezoid(x,y,weight=False):
+    """
+    Returns
+    -------
+    Trapezoid integral of y (times x if weight is True) over x, computed by chunks : float
+    """
+    res = 0.
+    for i in range(0,len(x)-1,_CHUNK):
+        xs = _np.asarray(x[i:i+_CHUNK+1],dtype=float)
+        ys = _np.asarray(y[i:i+_CHUNK+1],dtype=float)
+        if weight:
+            ys = ys * xs
+        res += _np.sum((ys[1:] + ys[:-1]) * _np.diff(xs))/2.
+    return res
+
+def _simpson(x,y,weight=False):
+    """
+    Returns
+    -------
+    Composite Simpson integral of y (times x if weight is True) over x, computed by chunks : float
+
+    Notes
+    -----
+    The axis does not need to be uniform. If the number of intervals is odd,
+    the last one is integrated with the trapezoid rule.
+    """
+    n   = len(x) - 1
+    m   = n - n%2
+    res = 0.
+    for i in range(0,m,_CHUNK):
+        xs = _np.asarray(x[i:min(i+_CHUNK,m)+1],dtype=float)
+        ys = _np.asarray(y[i:min(i+_CHUNK,m)+1],dtype=float)
+        if weight:
+            ys = ys * xs
+        h  = _np.diff(xs)
+        h0,h1 = h[0::2],h[1::2]
+        res += _np.sum((h0 + h1)/6. * ((2 - h1/h0) * ys[0:-1:2] + (h0 + h1)**2/(h0 * h1) * ys[1::2] + (2 - h0/h1) * ys[2::2]))
+    if n%2:
+        res += _trapezoid(x[-2:],y[-2:],weight)
+    return res
+
+_RULES = {'trapezoid':_trapezoid,'simpson':_simpson}
+
+def _load(filename,unit,dtype='float64'):
+    """
+    Returns
+    -------
+    Memory-mapped table of filename : ``_Table`` instance
+
+    Parameters
+    ----------
+    filename : str
+        ``.npy`` file, or raw binary file, containing an array of shape (2,N)
+        with the axis in the first row and the envelope in the second one
+    unit : str or pint Unit
+        Units of the axis
+    dtype : str, optional
+        Data type of the raw binary files
+
+    Notes
+    -----
+    Files are opened with ``np.load(mmap_mode='r')`` or ``np.memmap``, so that samples are
+    read from disk only when needed, and are never copied in memory as a whole.
+    """
+    if _os.path.splitext(filename)[1]==".npy":
+        data = _np.load(filename,mmap_mode='r')
+    else:
+        data = _np.memmap(filename,dtype=dtype,mode='r')
+        data = data.reshape(2,-1)
+    if data.ndim!=2 or data.shape[0]!=2:
+        raise ValueError("Tabulated profile file must contain an array of shape (2,N).")
+    return _Table(data[0],data[1],_u(unit).units if isinstance(unit,str) else unit)
@@ -1,5 +1,13 @@
 #coding:utf8
+import inspect as _inspect
+import functools as _functools
+import threading as _threading
+import weakref as _weakref
+import numpy as _np
 from . import default_unit as _du
+from . import models as _models
+from ._constants import _convert
+from .units import _current
 
 
 __all__ = ["_PelpiObject"]
@@ -8,12 +16,19 @@ __all__ = ["_PelpiObject"]
 class _PelpiObject(object):
     """
     Private base class for pelpi objects.
+
+    pelpi objects declare their attributes in ``__slots__``, so that they have no instance dict,
+    and their sub-objects with ``_SubObject``, so that they are only created when needed.
     """
+    __slots__ = ()
+
     def _check_input(self,var_name,var_value,exp_type):
         """
-        Check if the user input have the correct type.
+        Check if the user input have the correct type or dimensionality.
         
-        Compare the str conversion of exp_type with str conversion of var_value type, so exp_type can be a str.
+        The check is compiled at the first call (see ``_compile_check``), and cached
+        per class, variable name and expected type, so that it costs only a dict lookup
+        and a comparison for all the following instanciations.
         var_name is necessary for giving an accurate information in the Traceback.
         
         Parameters
@@ -22,93 +37,53 @@ class _PelpiObject(object):
             Name of the variable
         var_value   : Quantity or str or ...
             User input value
-        exp_type    : type or str
-            Value expected type 
+        exp_type    : type or str or tuple of str
+            Value expected type, or expected dimension(s) (keys of the default_unit dictionary)
         
         Raises
         ------
         TypeError
-            If input type is not the same as expected type.
+            If input type is not the same as expected type, or if input dimensionality is not the expected one.
         
         Examples
         --------
         >>> class Laser(_PelpiObject)
         >>>     def __init__(self,wavelength,energy,time_profile,space_profile,**kwargs):
-        >>>         self._check_input('wavelength'   , wavelength    , type(_du['length']))
-        >>>         self._check_input('energy'       , energy        , type(_du['energy']))
-        >>>         self._check_input('time_profile' , time_profile  , "<class 'pelpi.Profile.classes.Profile'>")
-        >>>         self._check_input('space_profile', space_profile , "<class 'pelpi.Profile.classes.Profile'>")
+        >>>         self._check_input('wavelength'   , wavelength    , 'length')
+        >>>         self._check_input('energy'       , energy        , 'energy')
+        >>>         self._check_input('time_profile' , time_profile  , Profile)
+        >>>         self._check_input('space_profile', space_profile , Profile)
                 
         Notes
         -----
         This method do not raise an exception if var_value is None, because this way it is possible to the user
         to not define some values that would be useless for him/her.
-        
+
+        Quantities are checked by dimensionality, so both scalar and array magnitudes are accepted.
+        Dimensionless inputs (``'number'``) can also be given as int, float or ndarray.
         """
-        if str(type(var_value))!=str(exp_type) and (var_value is not None) :
-            raise TypeError(var_name+" type is expected to be "+str(exp_type)+", but got "+str(type(var_value))+" instead.")
+        if var_value is None:
+            return
+        key = (_current(),type(self),var_name,exp_type)
+        try:
+            check = _checks[key]
+        except KeyError:
+            check = _checks[key] = _compile_check(var_name,exp_type)
+        check(var_value)
         
     def _estimate(self,root_inst,model_name,method_name,**kwargs):
         """
         Returns
         -------
-        Result of root_inst.model.model_name.method_name(**kwargs)
-        
-        Parameters
-        ----------
-        root_inst : object
-            Instance of pelpi root object where the estimate need to be performed. Typically a LaserPlasmaInteraction instance
-        model_name : str
-            Name of the model to use
-        method_name : str
-            Name of the method of the model to use. It should contains all the 'path' from model_name to the method
-        **kwargs
-            Keywords arguments to use in the method
-            
-        Examples
-        --------
-        Assuming you are defining the 'temperature' method in electron.hot LaserPlasmaInteraction sub-class
-        
-        >>> def temperature(self,model,**kwargs):
-        >>>     if self.default['temperature'] is not None: # If a default value exists
-        >>>         return self.default['temperature']      # Return default value
-        >>>     else:
-        >>>         temperature = self._estimate(self._lpi,model,'electron.hot.temperature',**kwargs) # Else get the estimate
-        >>>         return temperature.to(_du['temperature'])   # And return the result, converted to default units.
+        Result of the model `model_name` of quantity `method_name`, applied to root_inst
+
+        See the ``_estimate`` function of this module.
         """
         # Check developer input type. kwargs types are tested in model methods.
         self._check_input('model_name'  , model_name    , str)
         self._check_input('method_name' , method_name   , str)
-        
-        ### Get an instance of 'model_name'
-        # Find the 'model_name' class in root_inst.model
-        model_class = getattr(root_inst.model , model_name)
-        # and instanciate is with the 'root_inst' instance
-        model_inst  = model_class(root_inst)
-        
-        ### Get the 'method_name' method from 'model_inst' instance
-        # Initialize the iterator 'attr' ; it should point the model instance
-        attr=model_inst
-        # Loop over 'method_name' sub-objects (splited by the '.' character)
-        for sub_object in method_name.split('.'):
-            # The iterator go deeper and deeper in the 'model_name' attributes, untill it reaches the last 'method_name' sub-object
-            attr      = getattr(attr, sub_object)
-        # The iterator now point to the last 'method_name' sub-object, that is the desired method
-        method = attr
-        # Explanations :
-        # Because getattr can not get imbricated attributes in one time,
-        # it is necessary to loop over imbricated attributes.
-        # Example : 
-        # assuming method_name = 'electron.hot.temperature' and model_name='ExampleModel'
-        # Before the loop, the iterator 'attr' should point to ExampleModel instance
-        # then it would point to :
-        #   ExampleModel.electron
-        #   ExampleModel.electron.hot
-        #   ExampleModel.electron.hot.temperature
-        # so after looping over all attributes, 'attr' point to the desired method        
-
-        # Finally return the result of 'method' when using it with kwargs
-        return method(**kwargs)
+
+        return _estimate(root_inst,model_name,method_name,**kwargs)
 
 
 
@@ -117,10 +92,21 @@ class _PelpiObject(object):
 class _Default(object):
     """
     Class for initialize, set & get default parameters
-    
+
+    It also contains the cache of the object estimates (see ``_memoize``).
+    Each cached result records the default entries it depends on (in any object
+    of the graph), so that setting a default value only evicts the results downstream of it.
+    Dependents are weakly referenced, so that an object sharing a sub-object (such as a Profile)
+    with many others does not keep them alive. Cached results also record the version of the default
+    units dictionary (see ``pelpi._DefaultUnits``), so that they are recomputed in the new default units
+    when it is modified.
     """
+    __slots__ = ("_dict","_cache","_dependents","_names","__weakref__")
+
     def __init__(self,root_inst,input_dict=None):
         self._dict={}
+        self._cache={}          # {cache_key : (result, dependencies, default units version)}
+        self._dependents={}     # {entry key : {weak reference to a _Default instance : set of cache_key depending on it}}
         self._initialize(root_inst,input_dict)
         
     def _initialize(self,root_inst,input_dict):
@@ -134,11 +120,9 @@ class _Default(object):
         It also allows to change some object input properties easily, with no need
         to instanciate a new object each time.
         
-        This method first create an empty dict, then get all the class methods
-        and initialize their default value to None. Finally it creates entries for input values.
-        This last might be done after initializing class method default 
-        because this way the new value erase the None value defined previously
-        (there might always be a method that return input parameters).
+        The names of the object estimate methods (whose default value is None) are computed
+        once per class (see ``_estimate_names``), and shared by all the instances.
+        So the instance dict only contains input values, and the values set by the user.
 
         Parameters
         ----------
@@ -149,21 +133,12 @@ class _Default(object):
             var_value : Quantity or object or ...
                 Value of the input variable
         """
-        # Loop over all class attributes
-        for attr_name in dir(root_inst):
-            # Get the 'attr_name' type
-            attr_type = type(getattr(root_inst,attr_name))
-            # if 'attr_name' is a method, and is not private (i.e. not starts with '_')
-            if str(attr_type)=="<type 'instancemethod'>" and attr_name[0]!="_":
-                # then a new dict entry is initialize to None
-                self.set(key=attr_name,value=None,verbose=False)
-        
+        self._names = _estimate_names(type(root_inst))
+
         # Put input_dict into _dict if input_dict is defined.
-        # This might be done after creating all the `attr_name`s entries. This way it replaces None value.
         if input_dict is not None:
-            for key,val in input_dict.items():
-                self.set(key=key,value=val,verbose=False)
-            
+            self._dict.update(input_dict)
+
     def set(self,key,value,verbose=True):
       """
       Set default values.
@@ -176,13 +151,18 @@ class _Default(object):
         New value of the default entry
       verbose : bool, optional
         If True, the ``set`` method will print warning and sucess messages. Otherwise it does not print anything
+
+      Notes
+      -----
+      All the cached results depending on this entry (in any object) are evicted.
       """
-      if verbose and (key not in self._dict.keys()):
+      if verbose and (key not in self._dict) and (key not in self._names):
         # self._warns(..) ?
         print("WARNING : key `%s` not present in default dictionnary. Creating a new entry ..."%key)
       
       self._dict[key]=value
-      
+      self._evict(key)
+
       if verbose:
         print("Default entry for key `%s` was succesfully set to value `%s`"%(key,value))
         
@@ -203,9 +183,15 @@ class _Default(object):
       If `name` is set to "all", the ``get`` method will return the whole default dictionnary
       """
       if key=="all":
-        return self._dict
-      elif key in self._dict.keys():
+        d = dict.fromkeys(self._names)
+        d.update(self._dict)
+        return d
+      elif key in self._dict:
+        _track(self,key)
         return self._dict[key]
+      elif key in self._names:
+        _track(self,key)
+        return None
       else:
         raise KeyError("Default entry `%s` does not exist."%key)
 
@@ -223,21 +209,364 @@ class _Default(object):
         Value of the result
       dimension : str
         Dimension of the result. Might be a key of the default_unit dictionary or None (for str for example)
+
+      Notes
+      -----
+      Conversion factors to default units are cached (see ``_constants._convert``).
       """
       d = self.get(key)
       if d is not None:
         return d
       elif dimension is not None:
-        return result.to(_du[dimension])
+        return _convert(result,dimension)
       else:
         return result
 
+    def _store(self,cache_key,result,dependencies):
+      """
+      Save `result` in cache, and register it as dependent of all the `dependencies` entries.
+      """
+      self._cache[cache_key]=(result,dependencies,_current().default_unit._version)
+      # Without callback, the weak reference to self is created once and shared
+      ref = _weakref.ref(self)
+      for default,key in dependencies:
+        dependents = default._dependents.get(key)
+        if dependents is None:
+          dependents = default._dependents[key] = {}
+        cache_keys = dependents.get(ref)
+        if cache_keys is None:
+          n = len(dependents)
+          if n>=8 and not n & (n - 1):
+            # Dead references are removed each time the number of dependents reaches a power of 2
+            for dead in [r for r in dependents if r() is None]:
+              del dependents[dead]
+          cache_keys = dependents[ref] = set()
+        cache_keys.add(cache_key)
+
+    def _lookup(self,cache_key):
+      """
+      Returns
+      -------
+      Cached (result, dependencies) of `cache_key`, or None if it is not cached or if default units were modified since
+      """
+      entry = self._cache.get(cache_key)
+      if entry is None or entry[2]!=_current().default_unit._version:
+        return None
+      return entry[:2]
+
+    def _evict(self,key):
+      """
+      Remove from cache all the results depending on the default entry `key`.
+      """
+      dependents = self._dependents.pop(key,None)
+      if dependents is None:
+        return
+      for ref,cache_keys in dependents.items():
+        default = ref()
+        if default is not None:
+          for cache_key in cache_keys:
+            default._cache.pop(cache_key,None)
+
+    def clear_cache(self):
+      """
+      Remove all the cached results of the object.
+      """
+      self._cache.clear()
+
+
+class _SubObject(object):
+    """
+    Descriptor of a sub-object (such as ``Laser.photon``), created on first access.
+
+    The sub-object is stored in the slot of the same name with a leading underscore, which must
+    be declared in the ``__slots__`` of the class.
+
+    Parameters
+    ----------
+    factory : callable
+        Function returning the sub-object, called with the parent object as argument
+
+    Examples
+    --------
+    >>> class Laser(_PelpiObject):
+    >>>     __slots__ = ("default","_photon")
+    >>>     photon = _SubObject(lambda laser:Laser._Photon(laser))
+    """
+    __slots__ = ("factory","slot")
+
+    def __init__(self,factory):
+        self.factory    = factory
+        self.slot       = None
+
+    def __set_name__(self,owner,name):
+        self.slot = getattr(owner,"_" + name)
+
+    def __get__(self,inst,owner=None):
+        if inst is None:
+            return self
+        try:
+            return self.slot.__get__(inst,owner)
+        except AttributeError:
+            value = self.factory(inst)
+            self.slot.__set__(inst,value)
+            return value
+
+
+def _resolve(root_inst,path):
+    """
+    Returns
+    -------
+    Object and method name pointed by `path` from root_inst, e.g. 'laser.electron.number_density_critical'
+    """
+    attr = root_inst
+    names = path.split('.')
+    for name in names[:-1]:
+        attr = getattr(attr,name)
+    return attr,names[-1]
+
+# Compiled input checks, by (unit backend, class, variable name, expected type)
+_checks = {}
+
+def _compile_check(var_name,exp_type):
+    """
+    Returns
+    -------
+    Function checking an input value, raising TypeError if it does not have the expected type or dimensionality
+
+    Parameters
+    ----------
+    var_name : str
+        Name of the variable
+    exp_type : type or str or tuple of str
+        Expected type, or expected dimension(s) (keys of the default_unit dictionary)
+    """
+    if isinstance(exp_type,type):
+        def check(value):
+            if not isinstance(value,exp_type):
+                raise TypeError(var_name+" type is expected to be "+exp_type.__name__+", but got "+type(value).__name__+" instead.")
+        return check
+
+    dimensions  = (exp_type,) if isinstance(exp_type,str) else tuple(exp_type)
+    allowed     = [_du[dim].dimensionality for dim in dimensions]
+    numbers     = 'number' in dimensions
+    expected    = " or ".join(dimensions)
+    def check(value):
+        dimensionality = getattr(value,'dimensionality',None)
+        if dimensionality is None:
+            if numbers and isinstance(value,(int,float,_np.number,_np.ndarray)):
+                return
+            raise TypeError(var_name+" is expected to be a "+expected+" Quantity, but got "+type(value).__name__+" instead.")
+        if dimensionality not in allowed:
+            raise TypeError(var_name+" is expected to be a "+expected+" Quantity, but got dimensionality "+str(dimensionality)+" instead.")
+    return check
+
+
+# Names of the estimate methods of each class
+_names_cache = {}
+
+def _estimate_names(cls):
+    """
+    Returns
+    -------
+    Names of the public estimate methods of class `cls` (i.e. decorated with ``_memoize``) : frozenset
+
+    Notes
+    -----
+    The class is inspected only once, as the result is cached.
+    """
+    try:
+        return _names_cache[cls]
+    except KeyError:
+        names = frozenset(
+            name for name in dir(cls)
+            if name[0]!="_" and getattr(getattr(cls,name,None),'_estimate',False))
+        _names_cache[cls] = names
+        return names
+
+
+# Stack of the dependency sets of the estimates being computed (one stack per thread)
+_tracking = _threading.local()
+
+def _track(default,key):
+    """
+    Record that the estimate being computed (if any) depends on the entry `key` of `default`.
+    """
+    stack = getattr(_tracking,'stack',None)
+    if stack:
+        stack[-1].add((default,key))
+
+def _freeze(value):
+    """
+    Returns
+    -------
+    Hashable version of value, for cache keys
+
+    Notes
+    -----
+    Quantities and 0-d arrays are converted to tuples containing their raw data.
+    Raises TypeError if value can not be converted, or if it is an array with at least one dimension
+    (caching such calls would keep a copy of the array and the result for the lifetime of the object).
+    """
+    if isinstance(value,(tuple,list)):
+        return tuple(_freeze(v) for v in value)
+    elif isinstance(value,dict):
+        return tuple(sorted((k,_freeze(v)) for k,v in value.items()))
+    elif hasattr(value,'magnitude') and hasattr(value,'units'):
+        return ('Quantity',_freeze(value.magnitude),str(value.units))
+    elif isinstance(value,_np.ndarray):
+        if value.ndim>0:
+            raise TypeError("Array arguments are not cached.")
+        return ('ndarray',value.dtype.str,value.shape,value.tobytes())
+    hash(value)
+    return value
+
+def _readonly(result):
+    """
+    Returns
+    -------
+    Read-only view of result if it has an array magnitude, result otherwise
+
+    Notes
+    -----
+    Cached results are returned by identity, so in-place operations on them (e.g. ``I *= 2``)
+    would modify all the following results. They raise a ValueError on read-only arrays instead.
+    The view does not change the writeable flag of the original array (e.g. a user input).
+    """
+    if isinstance(result,_np.ndarray):
+        # raw unit backend
+        magnitude = result
+    else:
+        magnitude = getattr(result,'magnitude',None)
+        if not isinstance(magnitude,_np.ndarray):
+            return result
+    if not magnitude.flags.writeable:
+        return result
+    view = magnitude.view()
+    view.flags.writeable = False
+    return view if magnitude is result else _current().registry.Quantity(view,result.units)
+
+class _UnitDefault(object):
+    """
+    Default value of an estimate argument with units, e.g. ``r=_UnitDefault('0 m')``.
+
+    The expression is parsed by the unit registry of the backend in use at each call
+    (see ``pelpi.units``), instead of being evaluated once with one backend at import time.
+    """
+    __slots__ = ("expression",)
+
+    def __init__(self,expression):
+        self.expression = expression
+
+    def __repr__(self):
+        return "_UnitDefault(%r)"%self.expression
+
+def _memoize(method):
+    """
+    Decorator caching the results of an estimate method, in the object ``default`` instance.
+
+    It also declares the method as an estimate, i.e. with a default entry in the object ``default``
+    instance (see ``_estimate_names``).
+
+    Results are cached by method name and arguments (bound to the method signature). All the default entries read
+    while computing the result (directly or by other estimates) are recorded as dependencies,
+    so that ``default.set`` evicts only the results depending on the modified entry.
+    The cache key of a call is given by the ``_cache_key`` attribute of the decorated method.
+
+    Default values given as ``_UnitDefault`` are converted to Quantities of the unit backend in use.
+    Calls with array arguments (or Quantities with array magnitudes) are not cached, only scalar
+    and no-argument calls are. Array results are cached and returned as read-only views (see ``_readonly``).
+
+    Examples
+    --------
+    >>> @_memoize
+    >>> def angular_frequency(self):
+    >>>     dim = 'angular_frequency'
+    >>>     wl = (2*_np.pi*_u.c/self.wavelength())
+    >>>     return self.default.result('angular_frequency',wl,dim)
+    """
+    name        = method.__name__
+    signature   = _inspect.signature(method)
+    units       = [p.name for p in signature.parameters.values() if isinstance(p.default,_UnitDefault)]
+
+    def bind(self,*args,**kwargs):
+        bound = signature.bind(self,*args,**kwargs)
+        bound.apply_defaults()
+        for key in units:
+            value = bound.arguments[key]
+            if isinstance(value,_UnitDefault):
+                bound.arguments[key] = _current().registry(value.expression)
+        return bound
+
+    def cache_key_of(self,*args,**kwargs):
+        # Arguments are bound to the method signature, so that equivalent calls
+        # (positional or keyword arguments, explicit default values) share the same cache key
+        bound = bind(self,*args,**kwargs)
+        return (name,_freeze(tuple(bound.arguments.items())[1:]))
+
+    @_functools.wraps(method)
+    def wrapper(self,*args,**kwargs):
+        if units:
+            try:
+                bound = bind(self,*args,**kwargs)
+            except TypeError:
+                # Invalid arguments, the method raises the TypeError
+                return method(self,*args,**kwargs)
+            args,kwargs = bound.args[1:],bound.kwargs
+        stack = getattr(_tracking,'stack',None)
+        if stack is None:
+            stack = _tracking.stack = []
+
+        try:
+            cache_key = cache_key_of(self,*args,**kwargs)
+        except TypeError:
+            # Array or unhashable argument, the result is not cached but its dependencies are still
+            # propagated (or invalid arguments, then the method raises the TypeError)
+            stack.append(set())
+            try:
+                return method(self,*args,**kwargs)
+            finally:
+                dependencies = stack.pop()
+                if stack:
+                    stack[-1].update(dependencies)
+
+        default = self.default
+        entry   = default._lookup(cache_key)
+        cached  = entry is not None
+
+        # Record the call in the evaluation plan, if any (see ``_plan._Plan``)
+        plan = getattr(_tracking,'plan',None)
+        if plan is not None:
+            plan._enter(self,name,cache_key,cached)
+
+        try:
+            if cached:
+                result,dependencies = entry
+            else:
+                stack.append(set())
+                try:
+                    result = _readonly(method(self,*args,**kwargs))
+                finally:
+                    dependencies = frozenset(stack.pop())
+                default._store(cache_key,result,dependencies)
+        finally:
+            if plan is not None:
+                plan._exit()
+
+        # Dependencies are propagated to the estimate calling this one (if any)
+        if stack:
+            stack[-1].update(dependencies)
+        return result
+
+    wrapper._estimate   = True
+    wrapper._cache_key  = cache_key_of
+    return wrapper
+
 
 def _estimate(root_inst,model_name,method_name,**kwargs):
     """
     Returns
     -------
-    Result of root_inst.model.model_name.method_name(**kwargs)
+    Result of the model `model_name` of quantity `method_name`, applied to root_inst
     
     Parameters
     ----------
@@ -246,45 +575,23 @@ def _estimate(root_inst,model_name,method_name,**kwargs):
     model_name : str
         Name of the model to use
     method_name : str
-        Name of the method of the model to use. It should contains all the 'path' from model_name to the method
+        Name of the estimated quantity. It should contains all the 'path' from root_inst to the estimate method
     **kwargs
-        Keywords arguments to use in the method
+        Keywords arguments to use in the model
         
+    Raises
+    ------
+    NameError
+        If no model `model_name` is registered for `method_name` (see ``pelpi.models``)
+
     Examples
     --------
     Assuming you are defining the 'temperature' method in electron.hot LaserPlasmaInteraction sub-class
     
     >>> def temperature(self,model,**kwargs):
     >>>     dim = 'temperature'
-    >>>     Teh = _estimate(self._lpi,model,'electron.hot.temperature',**kwargs) # Else get the estimate
-    >>>     return self.default('temperature',Teh,dim)                           # And return the result, converted to default units.
+    >>>     Teh = _estimate(self._lpi,model,'electron.hot.temperature',**kwargs) # Get the estimate
+    >>>     return self.default.result('temperature',Teh,dim)                    # And return the result, converted to default units.
     """
-    ### Get an instance of 'model_name'
-    # Find the 'model_name' class in root_inst.model
-    model_class = getattr(root_inst.model , model_name)
-    # and instanciate is with the 'root_inst' instance
-    model_inst  = model_class(root_inst)
-    
-    ### Get the 'method_name' method from 'model_inst' instance
-    # Initialize the iterator 'attr' ; it should point the model instance
-    attr=model_inst
-    # Loop over 'method_name' sub-objects (splited by the '.' character)
-    for sub_object in method_name.split('.'):
-        # The iterator go deeper and deeper in the 'model_name' attributes, untill it reaches the last 'method_name' sub-object
-        attr      = getattr(attr, sub_object)
-    # The iterator now point to the last 'method_name' sub-object, that is the desired method
-    method = attr
-    # Explanations :
-    # Because getattr can not get imbricated attributes in one time,
-    # it is necessary to loop over imbricated attributes.
-    # Example : 
-    # assuming method_name = 'electron.hot.temperature' and model_name='ExampleModel'
-    # Before the loop, the iterator 'attr' should point to ExampleModel instance
-    # then it would point to :
-    #   ExampleModel.electron
-    #   ExampleModel.electron.hot
-    #   ExampleModel.electron.hot.temperature
-    # so after looping over all attributes, 'attr' point to the desired method        
-
-    # Finally return the result of 'method' when using it with kwargs
-    return method(**kwargs)
+    # Models are found with a dict lookup in the models registry
+    return _models.get(method_name,model_name)(root_inst,**kwargs)
@@ -0,0 +1,271 @@
+#coding:utf8
+"""
+Columnar containers of many configurations, for parameter studies.
+
+A batch stores each input (e.g. ``wavelength`` or ``density``) as one contiguous array Quantity,
+instead of one pelpi object per configuration. Estimates are computed by a single pelpi object
+built from these arrays (as estimates broadcast over array inputs), so they have the same API
+and return one value per configuration.
+
+Examples
+--------
+>>> import numpy as np
+>>> import pelpi as pp
+>>> u = pp.unit
+>>> n = 10**5
+>>> lasers = pp.LaserBatch(wavelength=0.8 * u.um,energy=np.linspace(0.1,10,n) * u.J,
+...     time_fwhm=30 * u.fs,space_fwhm=np.linspace(2,20,n) * u.um)
+>>> materials = pp.MaterialBatch(density=2.7 * u('g/cm**3'),atomic_mass=27 * u.amu,Z=13 * u(''))
+>>> lpis = pp.LPIBatch(lasers,materials)
+>>> Teh = lpis.electron.hot.temperature(model='Wilks1992')      # array of n temperatures
+>>> hot = lpis.filter(Teh > 1 * u.MeV)                          # LPIBatch of the selected rows
+>>> lpi = hot[0]                                                # LaserPlasmaInteraction of the first one
+"""
+from ._global import *
+from ._tools import _PelpiObject
+from .profile import Profile
+from .laser import Laser
+from .target import Material,Target
+from .lpi import LaserPlasmaInteraction
+
+__all__ = ["LaserBatch","MaterialBatch","LPIBatch"]
+
+class _Batch(_PelpiObject):
+    """
+    Private base class of the batches.
+
+    Subclasses define the ``_columns`` {name : dimension} of their inputs, and the ``_build`` and ``_row``
+    methods returning the pelpi object of all the configurations (with array inputs) or of one row.
+
+    Notes
+    -----
+    Attributes which are not defined by the batch (such as estimate methods or sub-objects) are
+    taken from the pelpi object of all the configurations, which is built on first access.
+    """
+    _columns = {}
+
+    def __init__(self,**columns):
+        self.columns = {}
+        self._object = None
+        length = None
+        for name,dim in self._columns.items():
+            value = columns.pop(name,None)
+            self._check_input(name,value,dim)
+            if value is None:
+                continue
+            if not hasattr(value,'magnitude'):
+                # Dimensionless inputs given as numbers
+                value = _np.asarray(value,dtype=float) * _u('')
+            if _np.ndim(value)>1:
+                raise ValueError("Batch column `%s` must be a scalar or a 1D array."%name)
+            if _np.ndim(value)==1:
+                if length is not None and len(value)!=length:
+                    raise ValueError("Batch column `%s` has %i rows instead of %i."%(name,len(value),length))
+                length = len(value)
+            self.columns[name] = value
+        if columns:
+            raise TypeError("Unknown batch column(s) %s."%", ".join("`%s`"%k for k in columns))
+
+        # Scalars are broadcasted, so that each column is one contiguous array
+        self._length = 1 if length is None else length
+        for name,value in self.columns.items():
+            magnitude = _np.ascontiguousarray(_np.broadcast_to(value.magnitude,(self._length,)),dtype=float)
+            self.columns[name] = _u.Quantity(magnitude,value.units)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self,key):
+        """
+        Returns
+        -------
+        pelpi object of row `key` if it is an integer, batch of the selected rows otherwise (slice, index or boolean array)
+        """
+        if isinstance(key,(int,_np.integer)):
+            if not -self._length<=key<self._length:
+                raise IndexError("Batch row %i out of range (%i rows)."%(key,self._length))
+            return self._row(key % self._length)
+        key = key if isinstance(key,slice) else _np.asarray(key)
+        return self._select(key)
+
+    def filter(self,mask):
+        """
+        Returns
+        -------
+        Batch of the rows where `mask` is True
+
+        Parameters
+        ----------
+        mask : bool ndarray, or callable
+            One boolean per row, or function returning it from the batch (e.g. ``lambda b:b.intensity() > I0``)
+        """
+        if callable(mask):
+            mask = mask(self)
+        mask = _np.asarray(mask,dtype=bool)
+        if mask.shape!=(self._length,):
+            raise ValueError("Batch filter must have one boolean per row.")
+        return self._select(mask)
+
+    def _select(self,key):
+        return type(self)(**{name:value[key] for name,value in self.columns.items()},**self._options())
+
+    def _options(self):
+        """
+        Returns
+        -------
+        Arguments of the batch which are not columns : dict
+        """
+        return {}
+
+    def __getattr__(self,name):
+        if name[0]=="_":
+            raise AttributeError("'%s' object has no attribute '%s'"%(type(self).__name__,name))
+        if self._object is None:
+            self._object = self._build()
+        return getattr(self._object,name)
+
+    def __repr__(self):
+        return "<%s of %i rows>"%(type(self).__name__,self._length)
+
+class LaserBatch(_Batch):
+    """
+    Batch of lasers.
+
+    Parameters
+    ----------
+    wavelength : length Quantity
+        Laser wavelength
+    energy : energy Quantity
+        Pulse energy
+    time_fwhm : time Quantity
+        FWHM of the time profile
+    space_fwhm : length Quantity
+        FWHM of the space profile
+    time_profile : str, optional
+        Time profile name, shared by all the rows
+    space_profile : str, optional
+        Space profile name, shared by all the rows
+
+    Notes
+    -----
+    Columns can be scalar or 1D array Quantities of the same length. Scalars are broadcasted to all the rows.
+    Only the profiles defined by their FWHM (such as ``gaussian1D`` or ``gaussian2D``) can be used.
+    """
+    _columns = {'wavelength':'length','energy':'energy','time_fwhm':('time','length'),'space_fwhm':'length'}
+
+    def __init__(self,wavelength=None,energy=None,time_fwhm=None,space_fwhm=None,time_profile="gaussian1D",space_profile="gaussian2D"):
+        self._check_input('time_profile',time_profile,str)
+        self._check_input('space_profile',space_profile,str)
+        self._profiles = (time_profile,space_profile)
+        _Batch.__init__(self,wavelength=wavelength,energy=energy,time_fwhm=time_fwhm,space_fwhm=space_fwhm)
+
+    def _options(self):
+        return {'time_profile':self._profiles[0],'space_profile':self._profiles[1]}
+
+    def _laser(self,columns):
+        return Laser(
+            wavelength      = columns.get('wavelength'),
+            energy          = columns.get('energy'),
+            time_profile    = Profile(profile=self._profiles[0],fwhm=columns.get('time_fwhm')),
+            space_profile   = Profile(profile=self._profiles[1],fwhm=columns.get('space_fwhm')),
+        )
+
+    def _build(self):
+        return self._laser(self.columns)
+
+    def _row(self,i):
+        """
+        Returns
+        -------
+        Laser of row i : ``Laser`` instance
+        """
+        return self._laser({name:value[i] for name,value in self.columns.items()})
+
+class MaterialBatch(_Batch):
+    """
+    Batch of materials.
+
+    Parameters
+    ----------
+    density : mass/length**3 Quantity
+        Material density
+    atomic_mass : mass Quantity
+        Atomic or molecular mass
+    Z : dimensionless Quantity
+        Atomic number or number of charges per molecule
+
+    Notes
+    -----
+    Columns can be scalar or 1D array Quantities of the same length. Scalars are broadcasted to all the rows.
+    """
+    _columns = {'density':'density','atomic_mass':'mass','Z':'number'}
+
+    def __init__(self,density=None,atomic_mass=None,Z=None):
+        _Batch.__init__(self,density=density,atomic_mass=atomic_mass,Z=Z)
+
+    def _build(self):
+        return Material(**self.columns)
+
+    def _row(self,i):
+        """
+        Returns
+        -------
+        Material of row i : ``Material`` instance
+        """
+        return Material(**{name:value[i] for name,value in self.columns.items()})
+
+class LPIBatch(_Batch):
+    """
+    Batch of laser plasma interactions.
+
+    Parameters
+    ----------
+    laser : ``LaserBatch`` instance
+        Lasers
+    material : ``MaterialBatch`` instance
+        Target materials. It must have the same number of rows as `laser`, or only one row
+
+    Attributes
+    ----------
+    laser : ``LaserBatch`` instance
+        Input lasers
+    material : ``MaterialBatch`` instance
+        Input materials
+
+    Notes
+    -----
+    Estimates have the API of ``LaserPlasmaInteraction`` (e.g. ``batch.electron.hot.temperature(model='Wilks1992')``),
+    and return one value per row. Indexing a batch with an integer returns the ``LaserPlasmaInteraction`` of this row.
+    """
+    def __init__(self,laser,material):
+        self._check_input('laser',laser,LaserBatch)
+        self._check_input('material',material,MaterialBatch)
+        if len(material)==1 and len(laser)!=1:
+            material = material[_np.zeros(len(laser),dtype=int)]
+        elif len(laser)==1 and len(material)!=1:
+            laser = laser[_np.zeros(len(material),dtype=int)]
+        if len(laser)!=len(material):
+            raise ValueError("Laser and material batches have %i and %i rows."%(len(laser),len(material)))
+        self.laser      = laser
+        self.material   = material
+        self.columns    = {}
+        self._object    = None
+        self._length    = len(laser)
+
+    def _select(self,key):
+        return LPIBatch(self.laser._select(key),self.material._select(key))
+
+    def _build(self):
+        # The array laser and material objects are shared with the laser and material batches
+        for batch in (self.laser,self.material):
+            if batch._object is None:
+                batch._object = batch._build()
+        return LaserPlasmaInteraction(self.laser._object,Target(self.material._object))
+
+    def _row(self,i):
+        """
+        Returns
+        -------
+        Laser plasma interaction of row i : ``LaserPlasmaInteraction`` instance
+        """
+        return LaserPlasmaInteraction(self.laser._row(i),Target(self.material._row(i)))
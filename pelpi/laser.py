@@ -1,6 +1,8 @@
 #coding:utf8
 from ._global import *
-from ._tools import _PelpiObject,_Default
+from ._tools import _PelpiObject,_Default,_SubObject,_memoize,_UnitDefault
+from ._constants import _Q
+from .profile import Profile
 
 __all__ = ["Laser"]
 
@@ -46,13 +48,31 @@ class Laser(_PelpiObject):
     >>> print("Laser normalized peak intensity : {}".format(a0))
     >>> nc = laser.electron.number_density_critical()
     >>> print("Critical number density : {}".format(nc))
+
+    `wavelength` and `energy` (as well as profiles `fwhm` or `radius`) can also be
+    array Quantities. All the estimates then broadcast over these arrays,
+    and return an array Quantity in a single call
+
+    >>> laser=pp.Laser(
+    ...    wavelength       = 0.8 * pp.unit('um'),
+    ...    energy           = np.linspace(1.0,10.0,1000) * pp.unit('J'),
+    ...    time_profile     = tprof,
+    ...    space_profile    = sprof
+    ...    )
+    >>> a0 = laser.intensity_peak_normalized() # array of 1000 values
     """
+    __slots__ = ("default","time_profile","space_profile","_photon","_electron")
+
+    # Sub-objects, created on first access
+    photon      = _SubObject(lambda laser:Laser._Photon(laser))
+    electron    = _SubObject(lambda laser:Laser._Electron(laser))
+
     def __init__(self,time_profile=None,space_profile=None,wavelength=None,energy=None):
         # Test user input
-        self._check_input('time_profile'    ,time_profile   ,"<class 'pelpi.profile.Profile'>")
-        self._check_input('space_profile'   ,space_profile  ,"<class 'pelpi.profile.Profile'>")
-        self._check_input('wavelength'      ,wavelength     , type(_du['length']))
-        self._check_input('energy'          ,energy         , type(_du['energy']))
+        self._check_input('time_profile'    ,time_profile   ,Profile)
+        self._check_input('space_profile'   ,space_profile  ,Profile)
+        self._check_input('wavelength'      ,wavelength     ,'length')
+        self._check_input('energy'          ,energy         ,'energy')
 
         # Initialize default dict
         self.default = _Default(self,input_dict={'wavelength':wavelength,'energy':energy})
@@ -61,10 +81,6 @@ class Laser(_PelpiObject):
         self.time_profile  = time_profile # TODO: save as attr or in default or both ?
         self.space_profile  = space_profile
 
-        # Instanciate sub-class
-        self.photon     = self._Photon(self)
-        self.electron   = self._Electron(self)
-
     def wavelength(self):
         """
         Returns
@@ -81,6 +97,7 @@ class Laser(_PelpiObject):
         """
         return self.default.get('energy')
 
+    @_memoize
     def angular_frequency(self):
         """
         Returns
@@ -94,10 +111,11 @@ class Laser(_PelpiObject):
         .. math: \omega_l = \\frac{2 \pi c}{\lambda}
         """
         dim = 'angular_frequency'
-        wl = (2*_np.pi*_u.c/self.wavelength())
+        wl = _Q['2 pi c']/self.wavelength()
 
         return self.default.result('angular_frequency',wl,dim)
 
+    @_memoize
     def envelope(self,r,t):
         """
         Returns
@@ -120,7 +138,8 @@ class Laser(_PelpiObject):
         
         return self.default.result('envelope',env,dim)
 
-    def power(self,r=0*_u('m'),t=0*_u('s')):
+    @_memoize
+    def power(self,r=_UnitDefault('0 m'),t=_UnitDefault('0 s')):
         """
         Returns
         -------
@@ -146,7 +165,8 @@ class Laser(_PelpiObject):
         
         return self.default.result('power',P,dim)
 
-    def intensity(self,r=0*_u('m'),t=0*_u('s')):
+    @_memoize
+    def intensity(self,r=_UnitDefault('0 m'),t=_UnitDefault('0 s')):
         """
         Returns
         -------
@@ -172,6 +192,106 @@ class Laser(_PelpiObject):
         
         return self.default.result('intensity',I,dim)
 
+    def envelope_grid(self,r=None,t=None,x=None,y=None,z=None,chunk_size=2**22):
+        """
+        Returns
+        -------
+        Generator of pulse envelope chunks over a (r,t) or (x,y,z,t) grid : yields (slice, dimensionless Quantity)
+
+        Parameters
+        ----------
+        r : length Quantity, optional
+            1D radius axis of a (r,t) grid
+        t : time Quantity
+            1D time axis
+        x, y, z : length Quantity, optional
+            1D axes of a (x,y,z,t) grid, with z the propagation axis
+        chunk_size : int, optional
+            Maximum number of grid points per chunk
+
+        Notes
+        -----
+        Chunks are slabs of the grid along its first axis (r or x) : each chunk has the shape
+        (len(r[slice]),len(t)) or (len(x[slice]),len(y),len(z),len(t)).
+
+        As the envelope is the product of the space and time profiles, these profiles are
+        evaluated only once on their own axes (r and t, or the (x,y) plane and the (z,t) plane),
+        and the grid is filled chunk by chunk with an outer product, so that no meshgrid is built.
+        Besides these profile arrays, the memory used by a chunk is bounded by chunk_size,
+        except when a single slab (one r or x value) is larger than chunk_size : chunks are then one slab each.
+
+        On (x,y,z,t) grids, the pulse propagates along z at the speed of light,
+        without diffraction (i.e. the grid should be within the Rayleigh length):
+
+        .. math: envelope(x,y,z,t) = profile_r(\\sqrt{x^2+y^2}) profile_t(t-z/c)
+
+        Examples
+        --------
+        >>> r = np.linspace(0,20,200) * pp.unit('um')
+        >>> t = np.linspace(-100,100,400) * pp.unit('fs')
+        >>> env = np.concatenate([chunk for sl,chunk in laser.envelope_grid(r=r,t=t)])
+        """
+        return self._grid(1 * _u(''),r,t,x,y,z,chunk_size)
+
+    def intensity_grid(self,r=None,t=None,x=None,y=None,z=None,chunk_size=2**22):
+        """
+        Returns
+        -------
+        Generator of intensity chunks over a (r,t) or (x,y,z,t) grid : yields (slice, power/length**2 Quantity)
+
+        Parameters
+        ----------
+        See ``envelope_grid``.
+
+        Notes
+        -----
+        Intensity is computed as in ``intensity``, i.e. the envelope (see ``envelope_grid``)
+        times :math:`E_l/(S_0^t S_0^r)`, so `energy` and the profiles must be scalars.
+        It is valid for profiles whose peak is not at r=0 and t=0 (such as tabulated or image profiles).
+
+        Examples
+        --------
+        Volume above an ionization threshold at t=0
+
+        >>> x = y = np.linspace(-20,20,401) * pp.unit('um')
+        >>> z = np.linspace(-50,50,1001) * pp.unit('um')
+        >>> t = np.array([0.]) * pp.unit('fs')
+        >>> dV = (x[1]-x[0]) * (y[1]-y[0]) * (z[1]-z[0])
+        >>> n = sum((chunk >= 1e16 * pp.unit('W/cm**2')).sum() for sl,chunk in laser.intensity_grid(x=x,y=y,z=z,t=t))
+        >>> V = n * dV
+        """
+        I0 = self.energy()/self.time_profile.integral1D()/self.space_profile.integral2D()
+        return self._grid(I0.to(_du['intensity'].units),r,t,x,y,z,chunk_size)
+
+    def _grid(self,scale,r,t,x,y,z,chunk_size):
+        """
+        Returns
+        -------
+        Generator of scale * envelope chunks over a (r,t) or (x,y,z,t) grid. See ``envelope_grid``.
+        """
+        xyz = [a is not None for a in (x,y,z)]
+        if t is None or not ((r is not None and not any(xyz)) or (r is None and all(xyz))):
+            raise TypeError("Grid needs either (r,t) or (x,y,z,t) axes.")
+        if _np.ndim(scale):
+            raise ValueError("Grids need scalar laser inputs.")
+        # Profiles are evaluated without caching the (possibly large) values in the memoization cache
+        space = lambda r:Profile.envelope.__wrapped__(self.space_profile,r).magnitude
+        time  = lambda t:Profile.envelope.__wrapped__(self.time_profile,t).magnitude
+
+        if r is not None:
+            first = space(r)                                                # (nr,)
+            other = time(t)                                                 # (nt,)
+        else:
+            first = space(_np.hypot(x[:,None],y[None,:]))                   # (nx,ny)
+            other = time(t[None,:] - z[:,None]/_u.c)                        # (nz,nt)
+
+        rows = max(1,chunk_size//(_np.prod(first.shape[1:],dtype=int) * other.size))
+        expand = (slice(None),) * first.ndim + (None,) * other.ndim
+        for start in range(0,len(first),rows):
+            sl = slice(start,min(start + rows,len(first)))
+            yield sl,scale * (first[sl][expand] * other)
+
+    @_memoize
     def intensity_peak_normalized(self): # TODO: calculate with the original definition
         """
         Returns
@@ -190,9 +310,9 @@ class Laser(_PelpiObject):
         ``intensity_peak_normalized`` is calculated from ``intensity`` method.
         """
         dim = 'number'
-        I0 = self.intensity(r=0*_u('m'),t=0*_u('s'))
+        I0 = self.intensity()
         #a0 = 0.85*_np.sqrt((I0*(self.wavelength())**2)/(1.e18*_u('W*um**2/cm**2')))
-        a0 = (_u.e * self.wavelength() * _np.sqrt(2 * I0 * _u.mu_0 * _u.c))/(2 * _np.pi * _u.m_e * _u.c**2)
+        a0 = _Q['e/(2 pi m_e c**2)'] * self.wavelength() * _np.sqrt(2 * I0 * _Q['mu_0 c'])
         
         return self.default.result('intensity_peak_normalized',a0,dim)
         
@@ -201,6 +321,8 @@ class Laser(_PelpiObject):
         """
         Photon properties.
         """
+        __slots__ = ("default","_las")
+
         def __init__(self,laser):
             # No need to check input because this method is only called in Laser definition.
 
@@ -210,6 +332,7 @@ class Laser(_PelpiObject):
             # Save reference to Laser instance in a private variable
             self._las = laser
             
+        @_memoize
         def energy(self):
             """
             Returns
@@ -223,7 +346,7 @@ class Laser(_PelpiObject):
             .. math: E_l = \\frac{h c}{\lambda_l}
             """
             dim = 'energy'
-            E=_u.h *_u.c/self._las.wavelength()
+            E=_Q['h c']/self._las.wavelength()
             
             return self.default.result('energy',E,dim)
 
@@ -231,6 +354,8 @@ class Laser(_PelpiObject):
         """
         Electron properties.
         """
+        __slots__ = ("default","_las")
+
         def __init__(self,Laser):
             # No need to check input because this method is only called in Laser definition.
 
@@ -240,6 +365,7 @@ class Laser(_PelpiObject):
             # Save reference to Laser instance in a private variable
             self._las = Laser
 
+        @_memoize
         def number_density_critical(self):
             """
             Returns
@@ -253,6 +379,6 @@ class Laser(_PelpiObject):
             .. math: m_e \epsilon_0 (\\frac{\omega_l}{e})^2
             """
             dim = 'number_density'
-            nc = _u.m_e*_u.epsilon_0*(self._las.angular_frequency()/_u.e)**2
+            nc = _Q['m_e epsilon_0/e**2']*self._las.angular_frequency()**2
             
             return self.default.result('number_density_critical',nc,dim)
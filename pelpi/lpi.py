@@ -1,8 +1,14 @@
 #coding:utf8
 
 from ._global import *
-from ._tools import _PelpiObject,_Default,_estimate
+from ._tools import _PelpiObject,_Default,_SubObject,_estimate,_memoize
 from .plasma import _PlasmaParameters
+from .laser import Laser
+from .target import Target
+from ._compiled import _compile
+from ._plan import _Plan
+from . import models as _models
+from .uncertainty import monte_carlo as _monte_carlo
 
 __all__ = ["LaserPlasmaInteraction"]
 
@@ -57,10 +63,17 @@ class LaserPlasmaInteraction(_PelpiObject):
     >>> neh = eh.number_total(model="Common", Teh, eta_l) # This does not work
 
     """
+    __slots__ = ("laser","target","_plasma","_electron","_ion")
+
+    # Sub-objects, created on first access
+    plasma      = _SubObject(lambda lpi:_PlasmaParameters(lpi))
+    electron    = _SubObject(lambda lpi:_LPIElectron(lpi))
+    ion         = _SubObject(lambda lpi:_LPIIon(lpi))
+
     def __init__(self,laser,target):
         # Test user input
-        self._check_input('laser',laser,"<class 'pelpi.laser.Laser'>")
-        self._check_input('target',target,"<class 'pelpi.target.Target'>")
+        self._check_input('laser',laser,Laser)
+        self._check_input('target',target,Target)
 
         # Do not initialize default dict because there is no direct access to a method from this point
 
@@ -68,10 +81,136 @@ class LaserPlasmaInteraction(_PelpiObject):
         self.laser      = laser
         self.target     = target
 
-        # Instanciate sub-classes
-        self.plasma     = _PlasmaParameters(self)
-        self.electron   = _LPIElectron(self)
-        # self.ion        = Ion(self)
+    def compile(self,estimate,model=None,**kargs):
+        """
+        Returns
+        -------
+        Compiled version of an estimate : callable
+
+        Arguments
+        --------
+        estimate : str
+            Path of the estimate from this instance, e.g. 'electron.hot.temperature' or 'laser.intensity'
+        model : str, optional
+            Model name, for estimates that need one. It can also be given in `estimate`
+            after a ':' character, e.g. 'electron.hot.temperature:Haines2009'
+        **kargs
+            Model input parameters (such as `temperature`)
+
+        Notes
+        -----
+        The compiled estimate is a plain function of SI magnitudes (float or ndarray),
+        with physical constants folded once and no pint operation inside.
+        A Quantity is created only when calling the returned object, at the outer boundary.
+        Its ``si`` method returns the raw SI magnitude instead, for inner loops.
+
+        Input values are taken from the object graph at compile time (including user defaults),
+        but can be overriden at call time with keyword arguments. Available input names are
+        `wavelength`, `energy`, `time_fwhm`, `time_radius`, `space_fwhm`, `space_radius`,
+        `density`, `atomic_mass` and `Z`, plus the model input parameters.
+        Values can be Quantities, or floats/ndarrays assumed in SI units.
+
+        Examples
+        --------
+        >>> Teh = lpi.compile('electron.hot.temperature',model='Haines2009')
+        >>> Teh()                                           # Same result as lpi.electron.hot.temperature(model='Haines2009')
+        >>> Teh.si(energy=np.linspace(0.1,10.,10**6))       # SI magnitudes (J), for 10**6 laser energies (J)
+        """
+        if model is not None:
+            estimate = estimate + ':' + model
+        return _compile(self,estimate,**kargs)
+
+    def plan(self,targets,**kargs):
+        """
+        Returns
+        -------
+        Evaluation plan of several estimates : ``_Plan`` instance
+
+        Arguments
+        --------
+        targets : list of str
+            Estimate paths from this instance, with model name after ':' if needed.
+            An item can also be a tuple (path, kwargs) to give arguments to this estimate only
+        **kargs
+            Arguments given to all the estimates having a parameter of the same name (such as `temperature`)
+
+        Notes
+        -----
+        Nothing is computed until the ``evaluate`` method of the plan is called.
+        The plan then records the graph of estimate calls in its ``nodes`` and ``edges`` attributes,
+        each node being evaluated only once thanks to the estimates cache.
+        See ``evaluate`` for examples.
+        """
+        return _Plan(self,targets,**kargs)
+
+    def evaluate(self,targets,**kargs):
+        """
+        Returns
+        -------
+        Results of several estimates, sharing their common intermediate results : dict {target : result}
+
+        Arguments
+        --------
+        targets : list of str
+            Estimate paths from this instance, with model name after ':' if needed.
+            An item can also be a tuple (path, kwargs) to give arguments to this estimate only
+        **kargs
+            Arguments given to all the estimates having a parameter of the same name (such as `temperature`)
+
+        Examples
+        --------
+        >>> res = lpi.evaluate([
+        ...     "laser.intensity_peak_normalized",
+        ...     "laser.electron.number_density_critical",
+        ...     "electron.hot.temperature:Wilks1992",
+        ...     "electron.hot.temperature:Haines2009",
+        ...     "plasma.electron.length_Debye",
+        ...     ],temperature=1*pp.unit('MeV'))
+        >>> res["electron.hot.temperature:Wilks1992"]
+        """
+        return self.plan(targets,**kargs).evaluate()
+
+    def monte_carlo(self,estimate,inputs=None,n=1000,seed=None,model_uncertainty=False,**kargs):
+        """
+        Returns
+        -------
+        Monte Carlo propagation of input uncertainties on an estimate : ``pelpi.uncertainty.Result`` instance
+
+        Arguments
+        --------
+        estimate : str
+            Estimate path from this instance, with model name after ':' if needed
+        inputs : dict, optional
+            {path : distribution}, with path of an input from this instance (e.g. 'laser.energy').
+            Distributions are defined in ``pelpi.uncertainty``
+        n : int, optional
+            Number of samples
+        seed : int, optional
+            Seed of the random number generator
+        model_uncertainty : bool, optional
+            If True, also sample the model parameters that have a quoted uncertainty
+            (such as the coefficient and exponent of the Beg1997 ion energy cutoff)
+        **kargs
+            Model input parameters. They can also be distributions
+
+        Notes
+        -----
+        All the samples are computed in one vectorized evaluation of the estimate (instead of
+        building and evaluating `n` objects), as sampled inputs are set as arrays in the object graph.
+        Previous input values are restored afterwards.
+
+        The result gives access to the samples, and to their mean, standard deviation and percentiles.
+
+        Examples
+        --------
+        >>> from pelpi.uncertainty import Normal
+        >>> res = lpi.monte_carlo('ion.energy_cutoff:Beg1997',{
+        ...     'laser.energy'            : Normal(2.0 * pp.unit('J'),relative=0.03),
+        ...     'laser.space_profile.fwhm': Normal(10 * pp.unit('um'),relative=0.1),
+        ...     },n=10000,model_uncertainty=True)
+        >>> res.mean(), res.std(), res.percentile([5,50,95])
+        """
+        return _monte_carlo(self,estimate,inputs,n,seed,model_uncertainty,**kargs)
 
 
 class _LPIElectron(_PelpiObject):
@@ -83,24 +222,40 @@ class _LPIElectron(_PelpiObject):
     hot : object
         Containing properties of super-thermal electrons, in Ultra-High Intensity regime
     """
+    __slots__ = ("default","_lpi","_hot")
+
+    # Sub-objects, created on first access
+    hot         = _SubObject(lambda electron:_LPIElectronHot(electron._lpi))
+    # cold        = _SubObject(lambda electron:_LPIElectronCold(electron._lpi))
+
     def __init__(self,LaserPlasmaInteraction):
         # No need to check input because this method is only called in LaserPlasmaInteraction definition
 
         # Save reference to LaserPlasmaInteraction instance in a private variable
         self._lpi   = LaserPlasmaInteraction
 
-        # Add shortcuts to methods previously defined about electrons
-        # WARNING ! Change default here would not affect the program ? Or change ne/nc access to this point
-        self.number_density = self._lpi.target.material.electron.number_density
-        self.number_density_critical = self._lpi.laser.electron.number_density_critical
-
-        # Initialize default dict after the shortcuts have been defined
+        # Initialize default dict
         self.default = _Default(self)
 
-        # Instanciate sub-classes
-        self.hot    = _LPIElectronHot(self._lpi)
-        # self.cold   = self._Cold(self._lpi)
+    # Shortcuts to methods previously defined about electrons
+    # WARNING ! Change default here would not affect the program ? Or change ne/nc access to this point
+    def number_density(self):
+        """
+        Returns
+        -------
+        Target electron number density (see ``Material._Electron.number_density``) : 1/length**3 Quantity
+        """
+        return self._lpi.target.material.electron.number_density()
 
+    def number_density_critical(self):
+        """
+        Returns
+        -------
+        Laser critical electron number density (see ``Laser._Electron.number_density_critical``) : 1/length**3 Quantity
+        """
+        return self._lpi.laser.electron.number_density_critical()
+
+    @_memoize
     def efficiency_absorption(self,model,**kargs):
         """
         Return an estimate of the laser absorption efficiency into electrons.
@@ -108,7 +263,8 @@ class _LPIElectron(_PelpiObject):
         Arguments
         --------
         model : string
-            Model name
+            Model name. Registered models are listed by ``pelpi.models.available('electron.efficiency_absorption')``,
+            and new models can be added with ``pelpi.models.register``
         **kargs
             Model input parameters
 
@@ -128,14 +284,11 @@ class _LPIElectron(_PelpiObject):
             Physical Review Letters, 1995
         """
         dim = 'number'
-
-        if model == "Price1995":
-          eta_l = 0.1
-        else:
-          raise NameError('Unknown model name')
+        eta_l = _estimate(self._lpi,model,'electron.efficiency_absorption',**kargs)
 
         return self.default.result('efficiency_absorption',eta_l,dim)
 
+    @_memoize
     def number_total(self,model,**kargs):
         """
         Return an estimate of the total electron number.
@@ -143,7 +296,8 @@ class _LPIElectron(_PelpiObject):
         Arguments
         --------
         model : string
-            Model name
+            Model name. Registered models are listed by ``pelpi.models.available('electron.number_total')``,
+            and new models can be added with ``pelpi.models.register``
         **kargs
             Model input parameters
 
@@ -165,13 +319,7 @@ class _LPIElectron(_PelpiObject):
             Based on Maxwell-Boltzmann law
         """
         dim = 'number'
-
-        if model == "Common":
-          Te = kargs['temperature']
-          eta_l = kargs['efficiency_absorption']
-          ne = eta_l * self._lpi.laser.energy()/(3/2. * Te)
-        else:
-          raise NameError("Unknown model name")
+        ne = _estimate(self._lpi,model,'electron.number_total',**kargs)
 
         return self.default.result('number_total',ne,dim)
 
@@ -180,6 +328,8 @@ class _LPIElectronHot(_PelpiObject):
     """
     Super-thermal electrons, in Ultra-High Intensity regime.
     """
+    __slots__ = ("default","_lpi")
+
     def __init__(self,LaserPlasmaInteraction):
         # No need to check input because this method is only called in LaserPlasmaInteraction definition
 
@@ -189,6 +339,7 @@ class _LPIElectronHot(_PelpiObject):
         # Save reference to LaserPlasmaInteraction instance in a private variable
         self._lpi   = LaserPlasmaInteraction
 
+    @_memoize
     def temperature(self,model,**kargs):
         """
         Returns
@@ -198,7 +349,8 @@ class _LPIElectronHot(_PelpiObject):
         Arguments
         --------
         model : string
-            Model name
+            Model name. Registered models are listed by ``pelpi.models.available('electron.hot.temperature')``,
+            and new models can be added with ``pelpi.models.register``
         **kargs
             Model input parameters
 
@@ -250,27 +402,46 @@ class _LPIElectronHot(_PelpiObject):
             Physical Review Letters, 1992
         """
         dim = 'temperature'
-
-        if model == "Wilks1992":
-          a0 = self._lpi.laser.intensity_peak_normalized()
-          Teh = ((1.0 + (a0)**2)**(1/2.) - 1.0 ) * _u.m_e * _u.c**2 # TODO: a0 or a0/2 ?
-        elif model == "Haines2009":
-          a0 = self._lpi.laser.intensity_peak_normalized()
-          Teh = ((1.0 + 2.0**(1/2.) * a0)**(1/2.) - 1.0) * _u.m_e * _u.c**2
-        elif model == "Beg1997":
-          I0 = self._lpi.laser.intensity()
-          lambda_laser = self._lpi.laser.wavelength()
-          Teh = 100.*_u('keV') * ((I0 * lambda_laser**2) / (1e17*_u('W/cm**2')*_u('um**2')) )**(1/3.)
-        else:
-          raise NameError("Unknown model name")
+        Teh = _estimate(self._lpi,model,'electron.hot.temperature',**kargs)
 
         return self.default.result('temperature',Teh,dim)
 
+    def temperature_all(self,**kargs):
+        """
+        Returns
+        -------
+        Estimates of the hot electron temperature for all the registered models : structured ndarray
+
+        Arguments
+        --------
+        **kargs
+            Model input parameters
+
+        Notes
+        -----
+        The result has one row per model, with fields ``model`` (model name) and ``value``
+        (temperature magnitude in ``pelpi.default_unit['temperature']``, with the shape of laser & target
+        inputs if they are arrays). Intermediate results shared by several models, such as the laser
+        intensity or :math:`a_0`, are computed only once.
+
+        See ``temperature`` for models documentation.
+
+        Examples
+        --------
+        >>> Teh = lpi.electron.hot.temperature_all()
+        >>> for model,value in Teh:
+        ...     print("Hot electron temperature  (model = {})   : {:.4E} MeV".format(model,value))
+        >>> Teh[Teh['model']=='Wilks1992']['value']
+        """
+        return _models.table(self.temperature,'electron.hot.temperature',**kargs)
+
 
 class _LPIIon(_PelpiObject):
     """
     Ion properties.
     """
+    __slots__ = ("default","_lpi")
+
     def __init__(self,LaserPlasmaInteraction):
       # No need to check input because this method is only called in LaserPlasmaInteraction definition
 
@@ -280,6 +451,7 @@ class _LPIIon(_PelpiObject):
       # Initialize default dict after the shortcuts have been defined
       self.default = _Default(self)
 
+    @_memoize
     def energy_cutoff(self,model,**kargs):
         """
         Returns
@@ -289,7 +461,8 @@ class _LPIIon(_PelpiObject):
         Arguments
         --------
         model : string
-            Model name
+            Model name. Registered models are listed by ``pelpi.models.available('ion.energy_cutoff')``,
+            and new models can be added with ``pelpi.models.register``
         **kargs
             Model input parameters
 
@@ -299,7 +472,7 @@ class _LPIIon(_PelpiObject):
           Type :
             empirical
           kargs :
-            None
+            coefficient (optional, default 1.2e-2 keV), exponent (optional, default 0.313)
           Equation :
             :math:`E_{max} = 1.2 \pm (0.3) \\times 10^{-2} (I/W.cm^{-2})^{0.313 \pm 0.03} keV`
           Reference :
@@ -308,11 +481,6 @@ class _LPIIon(_PelpiObject):
             Physics of Plasmas, 1997
         """
         dim = 'energy'
-
-        if model == "Beg1997":
-          I0 = self._lpi.laser.intensity()
-          Emax = 1.2e-2 * _u('keV') * (I0/_u('W/cm**2'))**(0.313)
-        else:
-          raise NameError("Unknown model name")
+        Emax = _estimate(self._lpi,model,'ion.energy_cutoff',**kargs)
 
         return self.default.result('energy_cutoff',Emax,dim)
@@ -0,0 +1,201 @@
+#coding:utf8
+"""
+Registry of the models used in ``LaserPlasmaInteraction`` estimates.
+
+Each model declares its name, the quantity it estimates (path of the estimate
+method from a ``LaserPlasmaInteraction`` instance), its required parameters and
+its output dimension. Estimate methods find their model with a dict lookup.
+
+New models (scalings, fits, ...) can be registered from outside pelpi,
+and are then available from the corresponding estimate method.
+
+Examples
+--------
+>>> import pelpi as pp
+>>> u = pp.unit
+>>> @pp.models.register('electron.hot.temperature','MyScaling2020','temperature')
+... def my_scaling(lpi,**kargs):
+...     a0 = lpi.laser.intensity_peak_normalized()
+...     return 0.5 * a0 * u.m_e * u.c**2
+>>> Teh = lpi.electron.hot.temperature(model='MyScaling2020')
+>>> pp.models.available('electron.hot.temperature')
+['Beg1997', 'Haines2009', 'MyScaling2020', 'Wilks1992']
+"""
+from ._global import *
+from . import _compiled
+from ._constants import _Q,_SI
+
+__all__ = ["Model","register","get","available","table"]
+
+class Model(object):
+    """
+    Description of a registered model.
+
+    Parameters
+    ----------
+    name : str
+        Model name
+    quantity : str
+        Path of the estimated quantity from a ``LaserPlasmaInteraction`` instance, e.g. 'electron.hot.temperature'
+    function : callable
+        Function returning the estimate (Quantity), called as function(lpi,**kargs)
+    dimension : str
+        Output dimension (key of the default_unit dictionary)
+    kargs : tuple of str, optional
+        Names of the required model input parameters
+    vectorized : bool, optional
+        True if the model broadcasts over array inputs, False if it must be evaluated element-wise
+    kernel : callable, optional
+        SI magnitude version of the model, for compiled estimates (see ``LaserPlasmaInteraction.compile``)
+    parameters : dict, optional
+        {name : (value, standard deviation)} of the model parameters with a quoted uncertainty.
+        The model function accepts them as optional kargs (see ``pelpi.uncertainty``).
+        Quantities are given as str (e.g. '1.2e-2 keV'), so that they are built with the unit backend in use
+    """
+    def __init__(self,name,quantity,function,dimension,kargs=(),vectorized=True,kernel=None,parameters=None):
+        self.name       = name
+        self.quantity   = quantity
+        self.function   = function
+        self.dimension  = dimension
+        self.kargs      = tuple(kargs)
+        self.vectorized = vectorized
+        self.kernel     = kernel
+        self.parameters = dict(parameters or {})
+
+    def __call__(self,lpi,**kargs):
+        missing = [k for k in self.kargs if k not in kargs]
+        if missing:
+            raise TypeError("Model `%s` needs parameter(s) %s."%(self.name,", ".join("`%s`"%k for k in missing)))
+        return self.function(lpi,**kargs)
+
+    def __repr__(self):
+        return "<Model %s : %s>"%(self.name,self.quantity)
+
+# {quantity : {name : Model}}
+_registry = {}
+
+def register(quantity,name,dimension,kargs=(),vectorized=True,kernel=None,parameters=None):
+    """
+    Decorator registering a model function.
+
+    Parameters
+    ----------
+    See ``Model``. The decorated function is the model function.
+
+    Notes
+    -----
+    Registering a model with an existing (quantity, name) replaces the previous one.
+    """
+    def decorator(function):
+        _registry.setdefault(quantity,{})[name] = Model(name,quantity,function,dimension,kargs,vectorized,kernel,parameters)
+        if kernel is not None:
+            _compiled._KERNELS[quantity+':'+name] = (kernel,dimension)
+        return function
+    return decorator
+
+def get(quantity,name):
+    """
+    Returns
+    -------
+    Registered model `name` for `quantity` : ``Model`` instance
+
+    Raises
+    ------
+    NameError
+        If the model is not registered.
+    """
+    try:
+        return _registry[quantity][name]
+    except KeyError:
+        raise NameError("Unknown model name `%s` for `%s`. Available models are %s."%(name,quantity,available(quantity)))
+
+def available(quantity):
+    """
+    Returns
+    -------
+    Sorted names of the registered models for `quantity` : list of str
+    """
+    return sorted(_registry.get(quantity,{}))
+
+def table(method,quantity,**kargs):
+    """
+    Returns
+    -------
+    Results of all the registered models of `quantity` : structured ndarray
+
+    Parameters
+    ----------
+    method : callable
+        Estimate method of `quantity`, called as method(model=name,**kargs) for each model
+    quantity : str
+        Path of the estimated quantity from a ``LaserPlasmaInteraction`` instance
+    **kargs
+        Model input parameters. Models whose required parameters are not given are skipped
+
+    Notes
+    -----
+    The table has one row per model, with fields ``model`` (str) and ``value`` (float,
+    with the shape of the estimates if inputs are arrays). Values are magnitudes in
+    the default unit of the models dimension (see ``pelpi.default_unit``).
+
+    As estimate methods are memoized, intermediate results shared by
+    several models (such as the laser intensity) are computed only once.
+    """
+    models  = [_registry[quantity][name] for name in available(quantity)]
+    models  = [m for m in models if all(k in kargs for k in m.kargs)]
+    values  = [_np.asarray(method(model=m.name,**kargs).to(_du[m.dimension]).magnitude) for m in models]
+    shape   = _np.broadcast(*values).shape if values else ()
+    length  = max([len(m.name) for m in models] + [1])
+
+    res = _np.empty(len(models),dtype=[('model','U%i'%length),('value',float,shape)])
+    for i,(m,v) in enumerate(zip(models,values)):
+        res[i]['model'] = m.name
+        res[i]['value'] = _np.broadcast_to(v,shape)
+    return res
+
+################################################################################
+# Built-in models. Their documentation is in the docstring of the corresponding estimate method.
+
+# electron.efficiency_absorption
+@register('electron.efficiency_absorption','Price1995','number',
+    kernel=lambda p: 0.1)
+def _Price1995_efficiency_absorption(lpi,**kargs):
+    return 0.1 * _u('')
+
+# electron.number_total
+@register('electron.number_total','Common','number',kargs=('temperature','efficiency_absorption'),
+    kernel=lambda p: p['efficiency_absorption'] * p['energy']/(3/2. * p['temperature']))
+def _Common_number_total(lpi,**kargs):
+    Te = kargs['temperature']
+    eta_l = kargs['efficiency_absorption']
+    return eta_l * lpi.laser.energy()/(3/2. * Te)
+
+# electron.hot.temperature
+@register('electron.hot.temperature','Wilks1992','temperature',
+    kernel=lambda p: ((1.0 + p['laser.intensity_peak_normalized']**2)**(1/2.) - 1.0) * _SI['m_e c**2'])
+def _Wilks1992_temperature(lpi,**kargs):
+    a0 = lpi.laser.intensity_peak_normalized()
+    return ((1.0 + (a0)**2)**(1/2.) - 1.0 ) * _Q['m_e c**2'] # TODO: a0 or a0/2 ?
+
+@register('electron.hot.temperature','Haines2009','temperature',
+    kernel=lambda p: ((1.0 + 2.0**(1/2.) * p['laser.intensity_peak_normalized'])**(1/2.) - 1.0) * _SI['m_e c**2'])
+def _Haines2009_temperature(lpi,**kargs):
+    a0 = lpi.laser.intensity_peak_normalized()
+    return ((1.0 + 2.0**(1/2.) * a0)**(1/2.) - 1.0) * _Q['m_e c**2']
+
+@register('electron.hot.temperature','Beg1997','temperature',
+    kernel=lambda p: 100. * _SI['keV'] * ((p['laser.intensity'] * p['wavelength']**2)/(1e17 * _SI['W/cm**2'] * _SI['um**2']))**(1/3.))
+def _Beg1997_temperature(lpi,**kargs):
+    I0 = lpi.laser.intensity()
+    lambda_laser = lpi.laser.wavelength()
+    return 100.*_Q['keV'] * ((I0 * lambda_laser**2) / (1e17*_Q['W/cm**2 um**2']) )**(1/3.)
+
+# ion.energy_cutoff
+@register('ion.energy_cutoff','Beg1997','energy',
+    parameters={'coefficient':('1.2e-2 keV','0.3e-2 keV'),'exponent':(0.313,0.03)},
+    kernel=lambda p: p.get('coefficient',1.2e-2 * _SI['keV']) * (p['laser.intensity']/_SI['W/cm**2'])**p.get('exponent',0.313))
+def _Beg1997_energy_cutoff(lpi,coefficient=None,exponent=0.313,**kargs):
+    if coefficient is None:
+        coefficient = 1.2e-2 * _Q['keV']
+    I0 = lpi.laser.intensity()
+    return coefficient * (I0/_Q['W/cm**2'])**exponent
@@ -1,7 +1,14 @@
 #coding:utf8
 
 from ._global import *
-from ._tools import _PelpiObject,_Default
+from ._tools import _PelpiObject,_Default,_SubObject,_memoize
+from ._constants import _Q
+from ._plan import _Plan
+from .lpi import LaserPlasmaInteraction
+from ._smilei import _export,_patches,_namelist,_density,_load_balance,_balanced_patches
+
+# Number of double precision field arrays of the box size
+_FIELD_ARRAYS = 13
 
 class ParticleInCell(_PelpiObject):
     """
@@ -11,6 +18,16 @@ class ParticleInCell(_PelpiObject):
     ----------
     lpi : object
         pelpi ``LaserPlasmaInteraction`` instance
+    box : list of length Quantity, optional
+        Simulation box size in each dimension (1 to 3), the laser propagating along the first one
+    thickness : length Quantity, optional
+        Target thickness, along the first dimension
+    particles_per_cell : int, optional
+        Number of macro-particles per cell of each species
+    duration : time Quantity, optional
+        Simulated time
+    push_time : time Quantity, optional
+        Computation time of one particle push on one core, to calibrate on the cluster (see ``calibrate``), 100 ns by default
         
     Attributes
     ----------
@@ -18,20 +35,152 @@ class ParticleInCell(_PelpiObject):
         Input lpi instance
     code : object
         Contains specific code calculations
+
+    Notes
+    -----
+    `box`, `thickness`, `particles_per_cell`, `duration` and `push_time` are only needed for the
+    simulation cost estimates (``number_of_cells``, ``number_of_particles``, ``number_of_timesteps``,
+    ``memory_fields``, ``memory_particles`` and ``cost``). They can be arrays, as well as the lpi inputs,
+    for scanning resolution and cost tradeoffs in one call.
+
+    Examples
+    --------
+    >>> u = pp.unit
+    >>> pic = pp.ParticleInCell(lpi,box=[40 * u.um,40 * u.um],thickness=2 * u.um,
+    ...     particles_per_cell=np.array([8,16,32,64]),duration=500 * u.fs)
+    >>> pic.cost('both',True,temperature=1 * u.MeV)          # core-hours, for each particles_per_cell
+    >>> pic.memory_particles('both',temperature=1 * u.MeV,mpi=64).to('GB')
     """
-    def __init__(self,lpi):
+    __slots__ = ("default","lpi","_code")
+
+    # Sub-objects, created on first access
+    code        = _SubObject(lambda pic:ParticleInCell._Code(pic.lpi,pic))
+
+    def __init__(self,lpi,box=None,thickness=None,particles_per_cell=None,duration=None,push_time=None):
+        if push_time is None:
+            push_time = 100 * _u('ns')
         # Test user input
-        self._check_input('lpi',lpi,"<class 'pelpi.lpi.LaserPlasmaInteraction'>")
+        self._check_input('lpi',lpi,LaserPlasmaInteraction)
+        for L in box or []:
+            self._check_input('box',L,'length')
+        self._check_input('thickness',thickness,'length')
+        self._check_input('particles_per_cell',particles_per_cell,'number')
+        self._check_input('duration',duration,'time')
+        self._check_input('push_time',push_time,'time')
 
         # Initialize default dict
-        self.default = _Default(self)
+        self.default = _Default(self,input_dict={'box':box,'thickness':thickness,'particles_per_cell':particles_per_cell,
+                                                 'duration':duration,'push_time':push_time})
 
         # Save reference to lpi instance into attributes
         self.lpi       = lpi
 
-        # Instanciate sub-class
-        self.code       = self._Code(self.lpi)
+    def plan(self,targets,**kargs):
+        """
+        Returns
+        -------
+        Evaluation plan of several estimates : ``_Plan`` instance
+
+        Arguments
+        --------
+        targets : list of str
+            Estimate paths from this instance, with model name after ':' if needed.
+            An item can also be a tuple (path, kwargs) to give arguments to this estimate only
+        **kargs
+            Arguments given to all the estimates having a parameter of the same name (such as `temperature`)
+
+        Notes
+        -----
+        Nothing is computed until the ``evaluate`` method of the plan is called.
+        The plan then records the graph of estimate calls in its ``nodes`` and ``edges`` attributes,
+        each node being evaluated only once thanks to the estimates cache.
+        See ``evaluate`` for examples.
+        """
+        return _Plan(self,targets,**kargs)
+
+    def evaluate(self,targets,**kargs):
+        """
+        Returns
+        -------
+        Results of several estimates, sharing their common intermediate results : dict {target : result}
+
+        Arguments
+        --------
+        targets : list of str
+            Estimate paths from this instance, with model name after ':' if needed.
+            An item can also be a tuple (path, kwargs) to give arguments to this estimate only
+        **kargs
+            Arguments given to all the estimates having a parameter of the same name (such as `temperature`)
+
+        Examples
+        --------
+        >>> res = pic.evaluate([
+        ...     "lpi.laser.intensity_peak_normalized",
+        ...     "lpi.electron.hot.temperature:Wilks1992",
+        ...     "length_cell",
+        ...     ("time_step",{'CFL':True}),
+        ...     ],lim='both',temperature=1*pp.unit('MeV'))
+        >>> res["time_step"]
+        """
+        return self.plan(targets,**kargs).evaluate()
+
+    def box(self):
+        """
+        Returns
+        -------
+        User input `box` : list of length Quantity
+        """
+        return self.default.get('box')
+
+    def thickness(self):
+        """
+        Returns
+        -------
+        User input `thickness` : length Quantity
+        """
+        return self.default.get('thickness')
+
+    def particles_per_cell(self):
+        """
+        Returns
+        -------
+        User input `particles_per_cell` : int
+        """
+        return self.default.get('particles_per_cell')
+
+    def duration(self):
+        """
+        Returns
+        -------
+        User input `duration` : time Quantity
+        """
+        return self.default.get('duration')
+
+    def push_time(self):
+        """
+        Returns
+        -------
+        User input `push_time` : time Quantity
+        """
+        return self.default.get('push_time')
+
+    def _required(self,name):
+        """
+        Returns
+        -------
+        User input `name`
+
+        Raises
+        ------
+        TypeError
+            If the input was not given.
+        """
+        value = self.default.get(name)
+        if value is None:
+            raise TypeError("ParticleInCell input `%s` is needed for this estimate."%name)
+        return value
 
+    @_memoize
     def length_cell(self,lim,temperature=None):
         """
         Returns
@@ -57,6 +206,9 @@ class ParticleInCell(_PelpiObject):
         
         "both", for taking the minimum of the two previous results.
         `temperature` might then also be defined.
+
+        If laser or target inputs (or `temperature`) are array Quantities,
+        the minimum is taken element-wise.
  
         More informations can be found in Tskahya et al.
         
@@ -70,12 +222,14 @@ class ParticleInCell(_PelpiObject):
         elif lim =='laser':
           dx = self.lpi.laser.wavelength()/10.0
         elif lim =='both':
-          dx = min(self.length_cell('target',temperature),self.length_cell('laser'))
+          # Element-wise minimum, so that array inputs are broadcasted
+          dx = _np.minimum(self.length_cell('target',temperature),self.length_cell('laser'))
         else:
           raise NameError("Unknown value of parameter 'lim'.")
   
         return self.default.result('length_cell',dx,dim)
 
+    @_memoize
     def time_step(self,lim,CFL,temperature=None):
         """
         Returns
@@ -99,12 +253,13 @@ class ParticleInCell(_PelpiObject):
         """
         dim = 'time'
         if CFL:
-          dt = 1/_np.sqrt(2) *self.length_cell(lim,temperature)/_u.c
+          dt = 1/_np.sqrt(2) *self.length_cell(lim,temperature)/_Q['c']
         else:
-          dt = self.length_cell(lim,temperature)/_u.c
+          dt = self.length_cell(lim,temperature)/_Q['c']
           
         return self.default.result('time_step',dt,dim)
 
+    @_memoize
     def space_resolution(self,lim,temperature=None):
         """
         Returns
@@ -128,6 +283,7 @@ class ParticleInCell(_PelpiObject):
         
         return self.default.result('space_resolution',resx) 
 
+    @_memoize
     def time_resolution(self,lim,CFL,temperature=None):
         """
         Returns
@@ -154,6 +310,203 @@ class ParticleInCell(_PelpiObject):
         
         return self.default.result('time_resolution',rest)
 
+    @_memoize
+    def number_of_cells(self,lim,temperature=None):
+        """
+        Returns
+        -------
+        Total number of cells of the simulation box : dimensionless Quantity
+
+        Parameters
+        ----------
+        lim : str
+            Which limitation to choose
+        temperature : energy Quantity, optional
+            Choosen temperature for the estimate
+
+        Notes
+        -----
+        The number of cells in each dimension is rounded up, with the cell length of ``length_cell``.
+        """
+        dim = 'number'
+        dx = self.length_cell(lim,temperature)
+        Nc = 1.
+        for L in self._required('box'):
+            Nc = Nc * _np.ceil((L/dx).to('').magnitude)
+
+        return self.default.result('number_of_cells',Nc * _u(''),dim)
+
+    @_memoize
+    def number_of_particles(self,lim,temperature=None):
+        """
+        Returns
+        -------
+        Number of macro-particles of each species : dimensionless Quantity
+
+        Parameters
+        ----------
+        lim : str
+            Which limitation to choose
+        temperature : energy Quantity, optional
+            Choosen temperature for the estimate
+
+        Notes
+        -----
+        Macro-particles fill the target cells, i.e. `thickness` along the first dimension
+        and the whole box along the other ones, with `particles_per_cell` particles per cell.
+        """
+        dim = 'number'
+        dx = self.length_cell(lim,temperature)
+        Nc = _np.ceil((self._required('thickness')/dx).to('').magnitude)
+        for L in self._required('box')[1:]:
+            Nc = Nc * _np.ceil((L/dx).to('').magnitude)
+        Np = Nc * self._required('particles_per_cell')
+
+        return self.default.result('number_of_particles',Np * _u(''),dim)
+
+    @_memoize
+    def number_of_timesteps(self,lim,CFL,temperature=None):
+        """
+        Returns
+        -------
+        Number of timesteps of the simulation : dimensionless Quantity
+
+        Parameters
+        ----------
+        lim : str
+            Which limitation to choose
+        CFL : bool
+            True if CFL condition might be satisfied, False otherwise
+        temperature : energy Quantity, optional
+            Choosen temperature for the estimate
+        """
+        dim = 'number'
+        Nt = _np.ceil((self._required('duration')/self.time_step(lim,CFL,temperature)).to('').magnitude)
+
+        return self.default.result('number_of_timesteps',Nt * _u(''),dim)
+
+    @_memoize
+    def memory_fields(self,lim,temperature=None,mpi=1):
+        """
+        Returns
+        -------
+        Memory of the fields per MPI process : Quantity (bytes)
+
+        Parameters
+        ----------
+        lim : str
+            Which limitation to choose
+        temperature : energy Quantity, optional
+            Choosen temperature for the estimate
+        mpi : int, optional
+            Number of MPI processes
+
+        Notes
+        -----
+        Fields are stored in double precision, with the electric, magnetic (and time-centered magnetic),
+        current and charge density fields, i.e. 13 arrays of the box size.
+        """
+        Mf = self.number_of_cells(lim,temperature).magnitude * _FIELD_ARRAYS * 8/mpi
+
+        return self.default.result('memory_fields',Mf * _u('byte'))
+
+    @_memoize
+    def memory_particles(self,lim,temperature=None,mpi=1,species=2):
+        """
+        Returns
+        -------
+        Memory of the macro-particles per MPI process : Quantity (bytes)
+
+        Parameters
+        ----------
+        lim : str
+            Which limitation to choose
+        temperature : energy Quantity, optional
+            Choosen temperature for the estimate
+        mpi : int, optional
+            Number of MPI processes
+        species : int, optional
+            Number of species (electrons and ions by default)
+
+        Notes
+        -----
+        Each macro-particle stores its position (one double per dimension), momentum (3 doubles),
+        weight (double) and charge (short).
+        """
+        size = (len(self._required('box')) + 4) * 8 + 2
+        Mp = self.number_of_particles(lim,temperature).magnitude * species * size/mpi
+
+        return self.default.result('memory_particles',Mp * _u('byte'))
+
+    @_memoize
+    def cost(self,lim,CFL,temperature=None,species=2):
+        """
+        Returns
+        -------
+        Simulation cost : time Quantity (core-hours)
+
+        Parameters
+        ----------
+        lim : str
+            Which limitation to choose
+        CFL : bool
+            True if CFL condition might be satisfied, False otherwise
+        temperature : energy Quantity, optional
+            Choosen temperature for the estimate
+        species : int, optional
+            Number of species (electrons and ions by default)
+
+        Notes
+        -----
+        The cost is dominated by the particles, and is estimated as the number of particle pushes
+        times `push_time`, the time of one push on one core. The default `push_time` (100 ns)
+        is an order of magnitude, that should be calibrated on a previous run (see ``calibrate``).
+        """
+        Np = self.number_of_particles(lim,temperature).magnitude * species
+        C = Np * self.number_of_timesteps(lim,CFL,temperature).magnitude * self.push_time()
+
+        return self.default.result('cost',C.to('hour'))
+
+    def calibrate(self,core_hours,lim,CFL,temperature=None,species=2,index=None):
+        """
+        Set `push_time` from the measured cost of a simulation with the same inputs.
+
+        Returns
+        -------
+        Calibrated `push_time` : time Quantity
+
+        Parameters
+        ----------
+        core_hours : time Quantity
+            Measured simulation cost, e.g. 1200 * pp.unit('hour') for 1200 core-hours
+        lim, CFL, temperature, species
+            See ``cost``
+        index : int or tuple, optional
+            Index of the measured configuration, if the inputs are arrays
+
+        Raises
+        ------
+        ValueError
+            If the inputs are arrays and `index` is not given, or if `core_hours` is not a scalar.
+
+        Notes
+        -----
+        `push_time` is calibrated from one reference configuration, and stays a scalar, so that
+        ``cost`` still scales with the other configurations (e.g. with `particles_per_cell`).
+        """
+        self._check_input('core_hours',core_hours,'time')
+        if _np.ndim(core_hours):
+            raise ValueError("Calibration needs the measured cost of one configuration.")
+        Np = self.number_of_particles(lim,temperature).magnitude * species
+        pushes = Np * self.number_of_timesteps(lim,CFL,temperature).magnitude
+        if _np.ndim(pushes):
+            if index is None:
+                raise ValueError("Inputs are arrays : give the `index` of the measured configuration.")
+            pushes = pushes[index]
+        tp = (core_hours/float(pushes)).to('ns')
+        self.default.set('push_time',tp,verbose=False)
+        return tp
+
     class _Code(_PelpiObject):
         """
         Contains specific code calculations.
@@ -162,21 +515,29 @@ class ParticleInCell(_PelpiObject):
         ----------
         lpi : object
             pelpi ``LaserPlasmaInteraction`` instance
+        pic : object, optional
+            pelpi ``ParticleInCell`` instance
             
         Attributes
         ----------
         smilei : object
             Tools for Smilei PIC code
         """
-        def __init__(self,lpi):
+        __slots__ = ("_lpi","_pic","_smilei")
+
+        # Sub-objects, created on first access
+        smilei      = _SubObject(lambda code:ParticleInCell._Code._Smilei(code._lpi.laser.angular_frequency(),code._lpi,code._pic))
+
+        def __init__(self,lpi,pic=None):
             # Test user input
-            self._check_input('lpi',lpi,"<class 'pelpi.lpi.LaserPlasmaInteraction'>")
+            self._check_input('lpi',lpi,LaserPlasmaInteraction)
+            self._check_input('pic',pic,ParticleInCell)
 
             # Do not initialize default dict because there is no direct access to methods from this point
 
-            # Instanciate sub-class
-            wr              = lpi.laser.angular_frequency()
-            self.smilei     = self._Smilei(wr)
+            # Save references to lpi & pic instances in private variables
+            self._lpi   = lpi
+            self._pic   = pic
 
         class _Smilei(_PelpiObject):
             """
@@ -186,6 +547,10 @@ class ParticleInCell(_PelpiObject):
             ----------
             angular_frequency_reference : 1/time Quantity, optional
                 Reference angular frequency.
+            lpi : object, optional
+                pelpi ``LaserPlasmaInteraction`` instance, whose laser is exported by ``export_laser``
+            pic : object, optional
+                pelpi ``ParticleInCell`` instance, whose estimates are used by ``namelist``
             
             Notes
             -----    
@@ -200,14 +565,21 @@ class ParticleInCell(_PelpiObject):
             do not use it unless you know what you are doing.
             """
             # TODO: add pint unit for CU conversion ?
-            # TODO: add patches & OMP/MPI optimization calculations
-            def __init__(self,angular_frequency_reference):
+            __slots__ = ("default","_lpi","_pic")
+
+            def __init__(self,angular_frequency_reference,lpi=None,pic=None):
                 # Test user input
-                self._check_input('angular_frequency_reference',angular_frequency_reference,type(_du['angular_frequency']))
+                self._check_input('angular_frequency_reference',angular_frequency_reference,'angular_frequency')
+                self._check_input('lpi',lpi,LaserPlasmaInteraction)
+                self._check_input('pic',pic,ParticleInCell)
 
                 # Initialize default dict
                 self.default = _Default(self,input_dict={'angular_frequency':angular_frequency_reference})
 
+                # Save references to lpi & pic instances in private variables
+                self._lpi   = lpi
+                self._pic   = pic
+
             def angular_frequency(self):
                 """
                 Returns
@@ -216,6 +588,7 @@ class ParticleInCell(_PelpiObject):
                 """
                 return self.default.get('angular_frequency')
 
+            @_memoize
             def length(self):
                 """
                 Returns
@@ -223,10 +596,11 @@ class ParticleInCell(_PelpiObject):
                 Smilei reference length : length Quantity
                 """
                 dim = 'length'
-                Lr = _u.c/self.angular_frequency()
+                Lr = _Q['c']/self.angular_frequency()
                 
                 return self.default.result('length',Lr,dim)
 
+            @_memoize
             def time(self):
                 """
                 Returns
@@ -238,6 +612,7 @@ class ParticleInCell(_PelpiObject):
                 
                 return self.default.result('time',Tr,dim)
 
+            @_memoize
             def electric_field(self):
                 """
                 Returns
@@ -245,10 +620,11 @@ class ParticleInCell(_PelpiObject):
                 Smilei reference electric field : Quantity
                 """
                 dim = 'electric_field'
-                Er = _u.m_e * _u.c * self.angular_frequency()/_u.e
+                Er = _Q['m_e c/e'] * self.angular_frequency()
 
                 return self.default.result('electric_field',Er,dim)
 
+            @_memoize
             def magnetic_field(self):
                 """
                 Returns
@@ -256,10 +632,11 @@ class ParticleInCell(_PelpiObject):
                 Smilei reference magnetic field : Quantity
                 """
                 dim = 'magnetic_field'
-                Br = _u.m_e * self.angular_frequency()/_u.e
+                Br = _Q['m_e/e'] * self.angular_frequency()
 
                 return self.default.result('magnetic_field',Br,dim)
 
+            @_memoize
             def number_density(self):
                 """
                 Returns
@@ -267,10 +644,11 @@ class ParticleInCell(_PelpiObject):
                 Smilei reference number density : 1/length**3 Quantity
                 """
                 dim = 'number_density'
-                Nr = _u.m_e * _u.epsilon_0 *(self.angular_frequency()/_u.e)**2
+                Nr = _Q['m_e epsilon_0/e**2'] * self.angular_frequency()**2
                 
                 return self.default.result('number_density',Nr,dim)
 
+            @_memoize
             def current(self):
                 """
                 Returns
@@ -278,10 +656,11 @@ class ParticleInCell(_PelpiObject):
                 Smilei reference current : Quantity
                 """
                 dim = 'current'
-                Jr = _u.c * _u.e * self.number_density()
+                Jr = _Q['c e'] * self.number_density()
                 
                 return self.default.result('current',Jr,dim)
 
+            @_memoize
             def energy(self):
                 """
                 Returns
@@ -289,10 +668,11 @@ class ParticleInCell(_PelpiObject):
                 Smilei reference energy : energy Quantity
                 """
                 dim = 'energy'
-                Kr = 1 * _u.m_e * _u.c**2
+                Kr = _Q['m_e c**2']
                 
                 return self.default.result('energy',Kr,dim)
 
+            @_memoize
             def momentum(self):
                 """
                 Returns
@@ -300,6 +680,201 @@ class ParticleInCell(_PelpiObject):
                 Smilei reference momentum : Quantity
                 """
                 dim = 'momentum'
-                Pr = 1 * _u.m_e * _u.c
+                Pr = _Q['m_e c']
                 
                 return self.default.result('momentum',Pr,dim)
+
+            def export_laser(self,filename,quantity="envelope",r=None,t=None,x=None,y=None,z=None,dtype='float32',chunk_size=2**22):
+                """
+                Write the laser envelope or field map on a grid, in Smilei units.
+
+                Returns
+                -------
+                Metadata of the written array, also saved in the JSON file `filename` + ``.json`` : dict
+
+                Parameters
+                ----------
+                filename : str
+                    Output file name. ``.npy`` files are written in numpy format, other extensions as raw binary
+                quantity : str, optional
+                    ``envelope`` (field envelope, i.e. square root of the intensity envelope, maximum 1)
+                    or ``field`` (electric field amplitude, normalized by ``electric_field``)
+                r, t, x, y, z : Quantity
+                    1D axes of a (r,t) or (x,y,z,t) grid (see ``Laser.envelope_grid``)
+                dtype : str, optional
+                    Data type of the written array
+                chunk_size : int, optional
+                    Maximum number of grid points computed and written at once
+
+                Notes
+                -----
+                The array is computed and written chunk by chunk into a memory-mapped file,
+                so that multi-GB tables do not need to fit in memory.
+                Axes are saved in the metadata in Smilei units (``length`` and ``time``), with the reference units in SI.
+
+                The field amplitude assumes a linear polarization, :math:`I = \\epsilon_0 c E^2/2`.
+                With the laser angular frequency as reference, its maximum is :math:`a_0`.
+                Both quantities are field envelopes, as the ``time_envelope`` and ``space_envelope``
+                of Smilei lasers : their FWHM is :math:`\\sqrt{2}` times the FWHM of the intensity profiles.
+
+                Examples
+                --------
+                >>> r = np.linspace(0,30,3000) * pp.unit('um')
+                >>> t = np.linspace(-200,200,20000) * pp.unit('fs')
+                >>> meta = pic.code.smilei.export_laser("laser_field.npy",quantity="field",r=r,t=t)
+                >>> field = np.load("laser_field.npy",mmap_mode='r')
+                """
+                if self._lpi is None:
+                    raise TypeError("Laser export needs the `lpi` instance.")
+                axes = {key:val for key,val in (('r',r),('t',t),('x',x),('y',y),('z',z)) if val is not None}
+                return _export(self,self._lpi.laser,filename,quantity,axes,dtype,chunk_size)
+
+            def patches(self,cells,mpi=1,omp=1):
+                """
+                Returns
+                -------
+                Number of patches in each dimension : list of int
+
+                Parameters
+                ----------
+                cells : sequence of int
+                    Number of cells in each dimension
+                mpi : int, optional
+                    Number of MPI processes
+                omp : int, optional
+                    Number of OpenMP threads per MPI process
+
+                Notes
+                -----
+                Smilei needs a power of 2 of patches in each dimension. The layout aims at about
+                4 patches per core (for dynamic load balancing), with at least 8 cells per patch
+                in each dimension, splitting first the dimensions with the most cells per patch.
+                """
+                return _patches(cells,mpi * omp)
+
+            def load_balance(self,cells,patches,length_cell,density,mpi=1,omp=1,particles_per_cell=16,species=2,cell_load=1.):
+                """
+                Returns
+                -------
+                (macro-particles per patch, load imbalance factor) : (ndarray of shape `patches`, float)
+
+                Parameters
+                ----------
+                cells : sequence of int
+                    Number of cells in each dimension, multiple of the number of patches
+                patches : sequence of int
+                    Number of patches in each dimension
+                length_cell : length Quantity
+                    Cell length
+                density : tuple
+                    Target density along the first dimension : (x_front, thickness) length Quantities of a
+                    uniform slab, or (x, n) of a tabulated profile, with x a 1D length Quantity and n the density
+                mpi : int, optional
+                    Number of MPI processes
+                omp : int, optional
+                    Number of OpenMP threads per MPI process
+                particles_per_cell : int, optional
+                    Number of macro-particles per cell of each species, in cells of non-zero density
+                species : int, optional
+                    Number of species
+                cell_load : float, optional
+                    Computational load of one cell, relative to one particle (as Smilei ``cell_load``)
+
+                Notes
+                -----
+                Per-patch particle counts are histogrammed along the first dimension, the target being
+                uniform in the transverse dimensions. The imbalance factor is the time of the slowest
+                MPI process divided by the ideal time (total load over the number of cores), with patches
+                distributed in balanced contiguous chunks to the processes and dynamically to the threads.
+                A factor close to 1 means a good balance.
+
+                Examples
+                --------
+                >>> u = pp.unit
+                >>> particles,imbalance = pic.code.smilei.load_balance([2048,1024],[32,16],pic.length_cell('laser'),
+                ...     density=(20 * u.um,2 * u.um),mpi=16,omp=8)
+                """
+                dx = length_cell.to('m').magnitude
+                return _load_balance(cells,patches,dx,_density(density),mpi,omp,particles_per_cell * species,cell_load)
+
+            def balanced_patches(self,cells,length_cell,density,mpi=1,omp=1,particles_per_cell=16,species=2,cell_load=1.,patches_per_core=4):
+                """
+                Returns
+                -------
+                (number of patches in each dimension, imbalance factor) of the best balanced layout : (list of int, float)
+
+                Parameters
+                ----------
+                See ``load_balance``.
+                patches_per_core : int, optional
+                    Minimal number of patches per core, so that dynamic load balancing has room to work
+
+                Notes
+                -----
+                All the layouts with a power of 2 of patches in each dimension, at least `patches_per_core` patches
+                per core and at least 8 cells per patch are compared with ``load_balance`` (rounding up the number
+                of cells to a multiple of the number of patches), counting the load of 2 ghost cells on each side
+                of the patches, so that small or elongated patches are penalized. The one with the smallest imbalance
+                factor is returned, preferring the most square patches for equal factors.
+                For a thin target, it typically favours many patches along the first dimension, so that the
+                target is shared by all the cores.
+                """
+                dx = length_cell.to('m').magnitude
+                return _balanced_patches(cells,dx,_density(density),mpi,omp,particles_per_cell * species,cell_load,patches_per_core)
+
+            def namelist(self,box,mpi=1,omp=1,lim='both',temperature=None,thickness=None,x_target=None,
+                         particles_per_cell=16,duration=None,filename=None):
+                """
+                Returns
+                -------
+                Smilei namelist of the laser plasma interaction : str
+
+                Parameters
+                ----------
+                box : list of length Quantity
+                    Simulation box size in each dimension (1 to 3), the laser propagating along the first one
+                mpi : int, optional
+                    Number of MPI processes
+                omp : int, optional
+                    Number of OpenMP threads per MPI process
+                lim : str, optional
+                    Resolution limitation, see ``ParticleInCell.length_cell``
+                temperature : energy Quantity, optional
+                    Temperature for the target limitation of resolution
+                thickness : length Quantity, optional
+                    Target thickness. Default is up to the end of the box
+                x_target : length Quantity, optional
+                    Position of the target front surface, and of the laser focus. Default is the middle of the box
+                particles_per_cell : int, optional
+                    Number of particles per cell of each species
+                duration : time Quantity, optional
+                    Simulation time. Default is the light crossing time of the box, plus 3 laser durations
+                filename : str, optional
+                    If defined, the namelist is also written in this file
+
+                Notes
+                -----
+                The cell length and time step are the ``ParticleInCell`` estimates (with the CFL condition,
+                reduced by :math:`\\sqrt{2/3}` in 3D), and the number of cells is rounded up to a whole number of cells per patch.
+                The patch layout is the best balanced one for the target slab (see ``balanced_patches``).
+
+                The laser enters the box from xmin, with the a0, waist (1/e field radius) and duration
+                (field fwhm) of the lpi laser, which must have ``gaussian1D`` time and ``gaussian2D`` space profiles.
+                Electron and ion (fully ionized) species have the densities of the target material,
+                in units of ``number_density``.
+
+                Examples
+                --------
+                >>> u = pp.unit
+                >>> nml = pic.code.smilei.namelist([40 * u.um,40 * u.um],mpi=4,omp=8,
+                ...     temperature=1 * u.MeV,thickness=2 * u.um,filename="namelist.py")
+                """
+                if self._pic is None:
+                    raise TypeError("Namelist generation needs the `pic` instance.")
+                for L in box:
+                    self._check_input('box',L,'length')
+                nml = _namelist(self,self._pic,box,mpi,omp,lim,temperature,thickness,x_target,particles_per_cell,duration)
+                if filename is not None:
+                    with open(filename,'w') as f:
+                        f.write(nml)
+                return nml
@@ -1,12 +1,19 @@
 #coding:utf8
 
 from ._global import *
-from ._tools import _PelpiObject,_Default,_estimate
+from ._tools import _PelpiObject,_Default,_SubObject,_estimate,_memoize
+from ._constants import _Q
 
 class _PlasmaParameters(_PelpiObject):
     """
     Class containing usual plasma parameters.
     """
+    __slots__ = ("_lpi","_electron","_ion")
+
+    # Sub-objects, created on first access
+    electron    = _SubObject(lambda plasma:_PlasmaElectron(plasma._lpi))
+    ion         = _SubObject(lambda plasma:_PlasmaIon(plasma._lpi))
+
     def __init__(self,LaserPlasmaInteraction):
         # No need to check input because this method is only called in LaserPlasmaInteraction definition
 
@@ -15,15 +22,13 @@ class _PlasmaParameters(_PelpiObject):
         # Save reference to LaserPlasmaInteraction instance in a private variable
         self._lpi   = LaserPlasmaInteraction
 
-        # Instanciate sub-classes
-        self.electron         = _PlasmaElectron(self._lpi)
-        self.ion              = _PlasmaIon(self._lpi)
-
 
 class _PlasmaElectron(_PelpiObject):
     """
     Plasma parameters about electrons.
     """
+    __slots__ = ("default","_lpi")
+
     def __init__(self,LaserPlasmaInteraction):
         # No need to check input because this method is only called in _PlasmaParameters definition
 
@@ -33,6 +38,7 @@ class _PlasmaElectron(_PelpiObject):
         # Save reference to LaserPlasmaInteraction instance in a private variable
         self._lpi   = LaserPlasmaInteraction
 
+    @_memoize
     def length_Debye(self,temperature):
         """
         Returns
@@ -48,11 +54,12 @@ class _PlasmaElectron(_PelpiObject):
         dim = 'length'
         ne  = self._lpi.target.material.electron.number_density()
         Te  = temperature
-        LDe = _np.sqrt((_u.epsilon_0 * Te)/(ne * _u.e**2))
+        LDe = _np.sqrt(_Q['epsilon_0/e**2'] * Te/ne)
         
         return self.default.result('length_Debye',LDe,dim)
 
 
+    @_memoize
     def length_Landau(self,temperature):
         """
         Returns
@@ -67,10 +74,11 @@ class _PlasmaElectron(_PelpiObject):
         """
         dim = 'length'
         Te  = temperature
-        LLa = ((_u.e**2)/(4*_np.pi * _u.epsilon_0 * Te)) # TODO: OK ? check
+        LLa = _Q['e**2/(4 pi epsilon_0)']/Te # TODO: OK ? check
         
         return self.default.result('length_Landau',LLa,dim)
 
+    @_memoize
     def angular_frequency_plasma(self):
         """
         Returns
@@ -85,7 +93,7 @@ class _PlasmaElectron(_PelpiObject):
         """
         dim = 'angular_frequency'
         ne  = self._lpi.target.material.electron.number_density()
-        wpe = _np.sqrt((ne * _u.e**2)/(_u.m_e * _u.epsilon_0))
+        wpe = _np.sqrt(ne * _Q['e**2/(m_e epsilon_0)'])
         
         return self.default.result('angular_frequency_plasma',wpe,dim)
 
@@ -93,6 +101,8 @@ class _PlasmaIon(_PelpiObject):
     """
     Plasma parameters about ions.
     """
+    __slots__ = ("default","_lpi")
+
     def __init__(self,LaserPlasmaInteraction):
         # No need to check input because this method is only called in _PlasmaParameters definition
 
@@ -102,6 +112,7 @@ class _PlasmaIon(_PelpiObject):
         # Save reference to LaserPlasmaInteraction instance in a private variable
         self._lpi   = LaserPlasmaInteraction
 
+    @_memoize
     def angular_frequency_plasma(self):
         """
         Returns
@@ -118,6 +129,6 @@ class _PlasmaIon(_PelpiObject):
         ni  = self._lpi.target.material.ion.number_density()
         Z   = self._lpi.target.material.Z()
         mi  = self._lpi.target.material.atomic_mass()
-        wpi = _np.sqrt((ni * (Z * _u.e)**2)/(mi * _u.epsilon_0))
+        wpi = _np.sqrt(ni * Z**2 * _Q['e**2/epsilon_0']/mi)
         
         return self.default.result('angular_frequency_plasma',wpi,dim)
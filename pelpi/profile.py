@@ -1,6 +1,9 @@
 #coding:utf8
 from ._global import *
-from ._tools import _PelpiObject,_Default
+from ._tools import _PelpiObject,_Default,_memoize
+from ._quadrature import _is_shape,_shape,_shape_integral,_magnitude
+from ._table import _Table,_load
+from ._image import _Image
 
 __all__=["Profile"]
 
@@ -14,12 +17,20 @@ class Profile(_PelpiObject):
 
     Parameters
     ---------
-    profile : str
+    profile : str or callable
         Geometrical profile.
     fwhm : Quantity, optional
         Full Width Half Maximum of the profile.
     radius : Quantity, optional
         Radius of the profile
+    order : float, optional
+        Order of the ``super-gaussian`` profile
+    table : tuple, optional
+        (x, y) of the ``tabulated`` profile, with x the axis Quantity (1D array) and y the envelope (1D ndarray)
+    image : ndarray, optional
+        2D focal spot image of the ``image`` profile, with pixel values proportional to the fluence
+    pixel_size : Quantity, optional
+        Pixel size of the ``image`` profile, in the focal plane
 
     Notes
     -----
@@ -31,12 +42,49 @@ class Profile(_PelpiObject):
 
     ``top-hat``     : two dimensions top-hat isotropic profile. It equals 1 if |x|<radius, 0 otherwise.
 
+    ``super-gaussian`` : :math:`\\exp(-\\ln{2} |2x/x_{FWHM}|^{order})`. ``order=2`` is the gaussian profile.
+
+    ``sech2``       : :math:`\\mathrm{sech}^2(2 \\ln{(1+\\sqrt{2})} x/x_{FWHM})`.
+
+    ``lorentzian``  : :math:`1/(1 + (2x/x_{FWHM})^2)`. Its 2D integral diverges, so it can only be a time profile.
+
+    ``profile`` can also be a user function f(u) of the normalized axis :math:`u = x/x_{FWHM}`,
+    taking and returning float ndarrays, with f(0) = 1.
+
+    The ``super-gaussian``, ``sech2``, ``lorentzian`` and user profiles can be used both as time (1D) and
+    space (2D isotropic) profiles. Named profiles are centered at x=0, equal 1 there and 1/2 at x = fwhm/2.
+
     If ``profile`` is ``gaussian1D``, you must define ``fwhm``.
 
     If ``profile`` is ``gaussian2D``, you must define ``fwhm``.
 
     If ``profile`` is ``top-hat``, you must define ``radius``.
 
+    If ``profile`` is ``super-gaussian``, you must define ``fwhm`` and ``order``.
+
+    If ``profile`` is ``sech2``, ``lorentzian`` or a user function, you must define ``fwhm``.
+
+    ``tabulated``   : measured profile, linearly interpolated from a table. It equals 0 outside of the table,
+    and is normalized so that its maximum value is 1. If the table axis starts at 0 or more, the table is
+    a radial (space profile) or half (time profile) lineout of a symmetric profile.
+    Its integrals are computed from the table samples with the trapezoid rule (or Simpson rule,
+    see ``integral1D``), and cached.
+
+    If ``profile`` is ``tabulated``, you must define ``table``, or use ``Profile.from_file``
+    to load it from a memory-mapped file.
+
+    ``image``       : measured focal spot (space profile). Its envelope is the azimuthal average of the image
+    around its centroid, normalized by the maximum pixel value, and its 2D integral is the effective area
+    (sum of the pixels divided by the maximum pixel value), so that ``Laser.intensity`` is the effective
+    peak intensity of the measured spot. The camera background (median of the border pixels) is subtracted
+    from the pixel values first. The ``centroid``, ``encircled_energy`` and ``energy_fraction_fwhm``
+    methods are also available.
+
+    If ``profile`` is ``image``, you must define ``image`` and ``pixel_size``, or use ``Profile.from_images``.
+
+    ``fwhm``, ``radius`` and ``order`` can also be arrays, for parameter sweeps.
+    All the methods then broadcast and return array Quantities.
+
 
     Examples
     --------
@@ -48,22 +96,102 @@ class Profile(_PelpiObject):
     ...    fwhm     = 30 * pp.unit('fs')
     ...    )
     ...
+
+    or a flat-top focal spot with
+
+    >>> sprof = pp.Profile(
+    ...    profile  = "super-gaussian",
+    ...    fwhm     = 10 * pp.unit('um'),
+    ...    order    = 8
+    ...    )
+    ...
+
+    or a measured time profile with
+
+    >>> tprof = pp.Profile.from_file("autocorrelation.npy",unit="fs")
     """
-    def __init__(self,profile=None,fwhm=None,radius=None):
+    __slots__ = ("default",)
+
+    def __init__(self,profile=None,fwhm=None,radius=None,order=None,table=None,image=None,pixel_size=None):
         # Test user input
-        self._check_input('profile' , profile   , str)
-        self._check_input('fwhm'    , fwhm      , "<class 'pint.unit.Quantity'>") # Can be time or length
-        self._check_input('radius'  , radius    , "<class 'pint.unit.Quantity'>") # Can be time or length
+        if not callable(profile):
+            self._check_input('profile' , profile   , str)
+        self._check_input('fwhm'    , fwhm      , ('time','length'))
+        self._check_input('radius'  , radius    , ('time','length'))
+        self._check_input('order'   , order     , 'number')
+        if not isinstance(table,_Table):
+            self._check_input('table'   , table     , tuple)
+            if table is not None:
+                x,y = table
+                self._check_input('table x' , x         , ('time','length'))
+                table = _Table(x.magnitude,y,x.units)
+        self._check_input('pixel_size', pixel_size, 'length')
+        if not isinstance(image,_Image):
+            self._check_input('image'   , image     , _np.ndarray)
+            if image is not None:
+                image = _Image(image,pixel_size)
 
         # Initialize default dict
-        self.default = _Default(self,input_dict={'profile':profile,'fwhm':fwhm,'radius':radius})
+        self.default = _Default(self,input_dict={'profile':profile,'fwhm':fwhm,'radius':radius,'order':order,'table':table,
+                                                 'image':image,'pixel_size':pixel_size})
+
+    @classmethod
+    def from_file(cls,filename,unit,dtype='float64'):
+        """
+        Returns
+        -------
+        ``tabulated`` profile, with its table memory-mapped from filename : ``Profile`` instance
+
+        Parameters
+        ----------
+        filename : str
+            ``.npy`` file, or raw binary file, containing an array of shape (2,N)
+            with the axis in the first row and the envelope in the second one
+        unit : str
+            Units of the axis, e.g. 'fs' or 'um'
+        dtype : str, optional
+            Data type of the raw binary files
+
+        Notes
+        -----
+        The file is opened with ``np.load(mmap_mode='r')`` or ``np.memmap``, so that the table
+        is never copied in memory as a whole.
+        """
+        return cls(profile="tabulated",table=_load(filename,unit,dtype))
+
+    @classmethod
+    def from_images(cls,images,pixel_size):
+        """
+        Returns
+        -------
+        ``image`` profiles of a stack of focal spot images : list of ``Profile`` instances
+
+        Parameters
+        ----------
+        images : ndarray or sequence of ndarray
+            Stack of 2D images, e.g. a 3D (possibly memory-mapped) array of shape (shots,ny,nx)
+        pixel_size : Quantity
+            Pixel size in the focal plane
+
+        Notes
+        -----
+        Squared pixel offsets used for the radial binning are cached per image shape (see ``_image._squares``),
+        so the images of a shot campaign, taken with the same camera, share them whatever their centroid.
+
+        Examples
+        --------
+        >>> stack = np.load("shots.npy",mmap_mode='r')
+        >>> sprofs = pp.Profile.from_images(stack,pixel_size=0.2 * pp.unit('um'))
+        >>> fractions = [s.energy_fraction_fwhm() for s in sprofs]
+        """
+        return [cls(profile="image",image=image,pixel_size=pixel_size) for image in images]
 
 
     def profile(self):
         """
         Returns
         -------
-        User input `profile` : str
+        User input `profile` : str or callable
         """
         return self.default.get('profile')
 
@@ -83,6 +211,96 @@ class Profile(_PelpiObject):
         """
         return self.default.get('radius')
 
+    def order(self):
+        """
+        Returns
+        -------
+        User input `order` : float
+        """
+        return self.default.get('order')
+
+    def table(self):
+        """
+        Returns
+        -------
+        User input `table` : ``_table._Table`` instance
+        """
+        return self.default.get('table')
+
+    def image(self):
+        """
+        Returns
+        -------
+        User input `image` : ``_image._Image`` instance
+        """
+        return self.default.get('image')
+
+    def pixel_size(self):
+        """
+        Returns
+        -------
+        User input `pixel_size` : Quantity
+        """
+        return self.default.get('pixel_size')
+
+    def _image(self):
+        """
+        Returns
+        -------
+        Image of an ``image`` profile : ``_image._Image`` instance
+
+        Raises
+        ------
+        NameError
+            If the profile is not ``image``.
+        """
+        if self.profile()!="image":
+            raise NameError("Method only available for `image` profiles.")
+        return self.image()
+
+    @_memoize
+    def centroid(self):
+        """
+        Returns
+        -------
+        Centroid position (y,x) of the image, from the first pixel center : tuple of Quantity
+        """
+        cy,cx = self._image().centroid()
+        return cy * self.pixel_size(),cx * self.pixel_size()
+
+    @_memoize
+    def encircled_energy(self,r=None):
+        """
+        Returns
+        -------
+        Fraction of the energy inside radius r : dimensionless Quantity, or (radius, fraction) curve if r is None
+
+        Parameters
+        ----------
+        r : Quantity, optional
+            Radius from the centroid. Can be an array Quantity
+
+        Notes
+        -----
+        The curve is sampled every pixel, and linearly interpolated at r.
+        """
+        radius,fraction = self._image().encircled_energy()
+        if r is None:
+            return radius,fraction * _u('')
+        radius = _np.concatenate(([0.],radius.to(r.units).magnitude))
+        fraction = _np.concatenate(([0.],fraction))
+        return _np.interp(r.magnitude,radius,fraction) * _u('')
+
+    @_memoize
+    def energy_fraction_fwhm(self):
+        """
+        Returns
+        -------
+        Fraction of the energy in the pixels above half the maximum : dimensionless Quantity
+        """
+        return self._image().fraction_fwhm() * _u('')
+
+    @_memoize
     def envelope(self,x):
         """
         Returns
@@ -92,7 +310,7 @@ class Profile(_PelpiObject):
         Parameters
         ----------
         x : Quantity
-            Axis
+            Axis. Can be an array Quantity
 
         Notes
         -----
@@ -106,46 +324,67 @@ class Profile(_PelpiObject):
             x0=self.fwhm()/(2 * _np.sqrt(_np.log(2)))
             return _np.exp(-(x/x0)**2) * _u('')
         elif self.profile()=="top-hat":
-            if abs(x)<self.radius():
-                return 1.0 * _u('')
-            else:
-                return 0.0 * _u('')
-
+            # Element-wise comparison, so that x and radius can be arrays
+            return (abs(x)<self.radius()) * 1.0 * _u('')
+        elif self.profile()=="tabulated":
+            return self.table().envelope(x) * _u('')
+        elif self.profile()=="image":
+            return self.image().envelope(x) * _u('')
+        else:
+            shape = _shape(self.profile(),_magnitude(self.order()))
+            return shape(_np.asarray((x/self.fwhm()).to('').magnitude,dtype=float)) * _u('')
 
-    def integral1D(self):
+    @_memoize
+    def integral1D(self,method='trapezoid'):
         """
         Returns
         -------
         Integration of envelope under x : Quantity
 
+        Parameters
+        ----------
+        method : str, optional
+            Integration rule of ``tabulated`` profiles, ``trapezoid`` or ``simpson``
+
         Notes
         -----
-        Yet only analytical integrals are implemented, as the available profiles permit it.
-
         Analytical solutions are
 
         For ``gaussian1D``
 
         .. math:: I_x = \sqrt{\pi} \\frac{t_{FWHM}}{2 \sqrt{\ln{2}}}
 
+        Other profiles are integrated numerically in the normalized axis :math:`u = x/x_{FWHM}`
+        (see ``_quadrature._shape_integral``), so that the integral is only computed once per profile shape
+
+        .. math:: I_x = x_{FWHM} \\int f(u) du
+
         """
         if self.profile()=="gaussian1D":
             x0=self.fwhm()/(2 * _np.sqrt(_np.log(2)))
             Ix=x0 * _np.sqrt(_np.pi)
             return Ix
+        elif _is_shape(self.profile()):
+            return self.fwhm() * _shape_integral(self.profile(),1,_magnitude(self.order()))
+        elif self.profile()=="tabulated":
+            return self.table().integral(1,method)
         else:
             raise NameError("Unknown laser time profile name.")
 
-    def integral2D(self):
+    @_memoize
+    def integral2D(self,method='trapezoid'):
         """
         Returns
         -------
         Double integration of the envelope under x : Quantity
 
+        Parameters
+        ----------
+        method : str, optional
+            Integration rule of ``tabulated`` profiles, ``trapezoid`` or ``simpson``
+
         Notes
         -----
-        Yet only analytical integrals are implemented, as the available profiles permit it.
-
         Analytical solutions are
 
         For ``gaussian2D``
@@ -156,6 +395,11 @@ class Profile(_PelpiObject):
 
         .. math:: I_x = \pi r^2
 
+        Other profiles are integrated numerically as isotropic profiles, in the normalized
+        axis :math:`u = r/x_{FWHM}` (see ``_quadrature._shape_integral``)
+
+        .. math:: I_x = x_{FWHM}^2 \\int 2 \\pi u f(u) du
+
         """
         if self.profile()=="gaussian2D":
             x0=self.fwhm()/(2 * _np.sqrt(_np.log(2)))
@@ -163,5 +407,12 @@ class Profile(_PelpiObject):
             return Ix
         elif self.profile()=="top-hat":
             return _np.pi*self.radius()**2
+        elif _is_shape(self.profile()):
+            return self.fwhm()**2 * _shape_integral(self.profile(),2,_magnitude(self.order()))
+        elif self.profile()=="tabulated":
+            return self.table().integral(2,method)
+        elif self.profile()=="image":
+            return self.image().integral2D()
         else:
             raise NameError("Unknown laser space profile name.")
+
@@ -0,0 +1,331 @@
+#coding:utf8
+"""
+Instrumentation of the estimate methods.
+
+A ``Profiler`` collects, for each public estimate method (i.e. decorated with ``_tools._memoize``),
+the number of calls, cache hits and misses, the cumulative and self time (excluding the time spent
+in the estimates it calls), and the time spent in ``_Default.result`` (i.e. in the conversion of
+the results to default units).
+
+Instrumentation is opt-in : the estimate methods of the pelpi classes are replaced by timing
+wrappers only while a profiler is enabled, and restored when it is disabled. So it costs nothing
+when it is not used.
+
+Examples
+--------
+>>> import pelpi as pp
+>>> with pp.profiling.Profiler(trace=True) as prof:
+...     for model in ['Beg1997','Haines2009','Wilks1992']:
+...         lpi.electron.hot.temperature(model=model)
+>>> print(prof.table())
+>>> prof.chrome_trace("trace.json") # to open in chrome://tracing or https://ui.perfetto.dev
+"""
+import os as _os
+import json as _json
+import time as _time
+import inspect as _inspect
+import threading as _threading
+import functools as _functools
+import importlib as _importlib
+from ._tools import _Default,_PelpiObject
+
+__all__ = ["Profiler"]
+
+# Modules defining the instrumented classes
+_MODULES = ["profile","laser","target","plasma","lpi","pic"]
+
+# Name of the ``_Default.result`` row
+_RESULT = "_Default.result"
+
+# Profiler currently enabled, if any
+_enabled = None
+
+def _estimate_classes(cls):
+    """
+    Returns
+    -------
+    cls and its nested classes (recursively), having estimate methods : list of class
+    """
+    classes = []
+    if any(getattr(attr,'_estimate',False) is True for attr in vars(cls).values()):
+        classes.append(cls)
+    for attr in vars(cls).values():
+        if _inspect.isclass(attr) and issubclass(attr,_PelpiObject):
+            classes.extend(_estimate_classes(attr))
+    return classes
+
+def _classes():
+    """
+    Returns
+    -------
+    All the pelpi classes having estimate methods : list of class
+    """
+    classes = []
+    for name in _MODULES:
+        module = _importlib.import_module("."+name,__package__)
+        for attr in vars(module).values():
+            if _inspect.isclass(attr) and issubclass(attr,_PelpiObject) and attr.__module__==module.__name__:
+                classes.extend(_estimate_classes(attr))
+    return classes
+
+class _Stats(object):
+    """
+    Statistics of one estimate method.
+
+    Attributes
+    ----------
+    calls : int
+        Number of calls
+    hits : int
+        Number of calls returning a cached result
+    cumulative : float
+        Total time, in seconds
+    self : float
+        Total time excluding the estimates called, in seconds
+    conversion : float
+        Time spent in ``_Default.result``, in seconds
+    """
+    __slots__ = ("calls","hits","cumulative","self","conversion")
+
+    def __init__(self):
+        self.calls      = 0
+        self.hits       = 0
+        self.cumulative = 0.
+        self.self       = 0.
+        self.conversion = 0.
+
+    @property
+    def misses(self):
+        return self.calls - self.hits
+
+class _Frame(object):
+    """
+    Call being timed, accumulating the time of the calls it contains.
+    """
+    __slots__ = ("stats","children","conversion")
+
+    def __init__(self,stats):
+        self.stats      = stats
+        self.children   = 0.
+        self.conversion = 0.
+
+class Profiler(object):
+    """
+    Profiler of the estimate methods.
+
+    Parameters
+    ----------
+    classes : list of class, optional
+        Classes to instrument. Default is all the pelpi classes having estimate methods
+        (``Laser``, ``Material``, ``ParticleInCell``, and their sub-objects ...)
+    trace : bool, optional
+        If True, each call is also recorded as an event, for ``chrome_trace``.
+        Events are kept in memory, so it should be used on short runs only
+
+    Notes
+    -----
+    Only one profiler can be enabled at a time. It can be used as a context manager,
+    or with the ``enable`` and ``disable`` methods.
+
+    Times are measured with ``time.perf_counter`` and include the overhead of the instrumentation.
+    Cache hits and misses are counted from the calls of each method, so a miss of an estimate
+    calling other estimates also counts their hits and misses.
+    """
+    def __init__(self,classes=None,trace=False):
+        self.classes    = classes
+        self.trace      = trace
+        self.stats      = {}
+        self.events     = []
+        self._patched   = []
+        self._local     = _threading.local()
+        self._start     = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self,*exc):
+        self.disable()
+        return False
+
+    def enable(self):
+        """
+        Replace the estimate methods (and ``_Default.result``) by instrumented ones.
+
+        Raises
+        ------
+        RuntimeError
+            If a profiler is already enabled
+        """
+        global _enabled
+        if _enabled is not None:
+            raise RuntimeError("A profiler is already enabled.")
+        _enabled = self
+        if self._start is None:
+            self._start = _time.perf_counter()
+        classes = _classes() if self.classes is None else self.classes
+        for cls in classes:
+            for name,attr in list(vars(cls).items()):
+                if getattr(attr,'_estimate',False) is True:
+                    self._patch(cls,name,self._wrap_estimate(cls,attr))
+        self._patch(_Default,'result',self._wrap_result(_Default.result))
+
+    def disable(self):
+        """
+        Restore the original methods.
+        """
+        global _enabled
+        for cls,name,attr in reversed(self._patched):
+            setattr(cls,name,attr)
+        self._patched = []
+        if _enabled is self:
+            _enabled = None
+
+    def reset(self):
+        """
+        Remove all the collected statistics and events.
+        """
+        self.stats.clear()
+        del self.events[:]
+
+    def _patch(self,cls,name,wrapper):
+        self._patched.append((cls,name,vars(cls)[name]))
+        setattr(cls,name,wrapper)
+
+    def _stack(self):
+        stack = getattr(self._local,'stack',None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self,name,t0,t1,args):
+        self.events.append({
+            'name'  : name,
+            'cat'   : 'estimate' if name!=_RESULT else 'conversion',
+            'ph'    : 'X',
+            'ts'    : (t0 - self._start) * 1e6,
+            'dur'   : (t1 - t0) * 1e6,
+            'pid'   : _os.getpid(),
+            'tid'   : _threading.get_ident(),
+            'args'  : args,
+        })
+
+    def _wrap_estimate(self,cls,method):
+        """
+        Returns
+        -------
+        Instrumented version of the estimate method of cls
+        """
+        name = cls.__qualname__ + "." + method.__name__
+        stats = self.stats
+
+        @_functools.wraps(method)
+        def wrapper(obj,*args,**kwargs):
+            try:
+                hit = obj.default._lookup(method._cache_key(obj,*args,**kwargs)) is not None
+            except TypeError:
+                hit = False
+            s = stats.get(name)
+            if s is None:
+                s = stats[name] = _Stats()
+            stack = self._stack()
+            frame = _Frame(s)
+            stack.append(frame)
+            t0 = _time.perf_counter()
+            try:
+                return method(obj,*args,**kwargs)
+            finally:
+                t1 = _time.perf_counter()
+                stack.pop()
+                dt = t1 - t0
+                s.calls         += 1
+                s.hits          += hit
+                s.cumulative    += dt
+                s.self          += dt - frame.children
+                s.conversion    += frame.conversion
+                if stack:
+                    stack[-1].children += dt
+                if self.trace:
+                    self._record(name,t0,t1,{'cache':'hit' if hit else 'miss'})
+
+        # Keep the access to the uncached method (see ``_tools._memoize``)
+        wrapper.__wrapped__ = method.__wrapped__
+        return wrapper
+
+    def _wrap_result(self,method):
+        """
+        Returns
+        -------
+        Instrumented version of ``_Default.result``
+        """
+        stats = self.stats
+
+        @_functools.wraps(method)
+        def wrapper(default,key,result,dimension=None):
+            t0 = _time.perf_counter()
+            try:
+                return method(default,key,result,dimension)
+            finally:
+                t1 = _time.perf_counter()
+                dt = t1 - t0
+                s = stats.get(_RESULT)
+                if s is None:
+                    s = stats[_RESULT] = _Stats()
+                s.calls         += 1
+                s.cumulative    += dt
+                s.self          += dt
+                s.conversion    += dt
+                stack = self._stack()
+                if stack:
+                    stack[-1].conversion += dt
+                if self.trace:
+                    self._record(_RESULT,t0,t1,{'key':key,'dimension':dimension})
+        return wrapper
+
+    def table(self,sort="cumulative"):
+        """
+        Returns
+        -------
+        Table of the statistics, one line per method : str
+
+        Parameters
+        ----------
+        sort : str, optional
+            Column to sort by (in decreasing order), ``calls``, ``hits``, ``misses``, ``cumulative``, ``self`` or ``conversion``
+        """
+        if sort not in _Stats.__slots__ + ("misses",):
+            raise NameError("Unknown column `%s`."%sort)
+        rows = sorted(self.stats.items(),key=lambda item:getattr(item[1],sort),reverse=True)
+        width = max([len(name) for name in self.stats] + [len("method")])
+        line = "{:<%i} {:>8} {:>8} {:>8} {:>12} {:>12} {:>12}"%width
+        lines = [line.format("method","calls","hits","misses","cumul. (s)","self (s)","conv. (s)")]
+        for name,s in rows:
+            # ``_Default.result`` is not cached
+            hits,misses = ("-","-") if name==_RESULT else (s.hits,s.misses)
+            lines.append(line.format(name,s.calls,hits,misses,
+                "%.4e"%s.cumulative,"%.4e"%s.self,"%.4e"%s.conversion))
+        return "\n".join(lines)
+
+    def chrome_trace(self,filename=None):
+        """
+        Returns
+        -------
+        Recorded calls in the Chrome trace event format (``chrome://tracing``, Perfetto) : dict
+
+        Parameters
+        ----------
+        filename : str, optional
+            If defined, the trace is also written in this JSON file
+
+        Raises
+        ------
+        ValueError
+            If the profiler was not created with ``trace=True``
+        """
+        if not self.trace:
+            raise ValueError("Calls are recorded only if the profiler is created with `trace=True`.")
+        trace = {'traceEvents':self.events,'displayTimeUnit':'ms'}
+        if filename is not None:
+            with open(filename,'w') as f:
+                _json.dump(trace,f)
+        return trace
@@ -0,0 +1,256 @@
+#coding:utf8
+"""
+Parallel parameter scans.
+
+``run`` evaluates a list of estimates over a parameter grid (see ``grid``) or a list of samples,
+split into chunks which are evaluated by a pool of worker processes (or threads). Each chunk is
+evaluated at once as a batch (see ``pelpi.batch``), and the results are gathered into one array
+Quantity per estimate, in the order of the inputs.
+
+Only plain magnitude arrays and unit names are sent to and from the workers, so that the unit
+registry is never pickled. Each worker process sets up the unit backend once when it starts
+(see ``_initialize``) : with the pint backend, it builds one unit registry (inherited from the
+parent process when workers are forked) and sets it as the pint application registry.
+
+Examples
+--------
+>>> import numpy as np
+>>> import pelpi as pp
+>>> u = pp.unit
+>>> parameters = pp.scan.grid(energy=np.linspace(0.1,10,1000) * u.J,space_fwhm=np.linspace(2,20,1000) * u.um)
+>>> parameters.update(wavelength=0.8 * u.um,time_fwhm=30 * u.fs,density=2.7 * u('g/cm**3'),atomic_mass=27 * u.amu,Z=13)
+>>> res = pp.scan.run(parameters,['electron.hot.temperature:Wilks1992','ion.energy_cutoff:Beg1997'])
+>>> res['electron.hot.temperature:Wilks1992'].shape
+(1000000,)
+"""
+import os as _os
+import itertools as _itertools
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from ._global import *
+from . import units as _units
+from .batch import LaserBatch,MaterialBatch,LPIBatch
+
+__all__ = ["grid","samples","run"]
+
+def grid(**axes):
+    """
+    Returns
+    -------
+    Cartesian product of the axes, as columns of the same length : dict {name : 1D Quantity or ndarray}
+
+    Parameters
+    ----------
+    **axes
+        1D Quantities or arrays. The last axis varies the fastest
+    """
+    shape   = [len(axis) for axis in axes.values()]
+    columns = {}
+    for i,(name,axis) in enumerate(axes.items()):
+        # Each value is repeated for the points of the following axes, and tiled for the previous ones
+        index = _np.tile(_np.repeat(_np.arange(shape[i]),int(_np.prod(shape[i + 1:]))),int(_np.prod(shape[:i])))
+        columns[name] = axis[index]
+    return columns
+
+def samples(rows):
+    """
+    Returns
+    -------
+    Columns of a list of samples : dict {name : 1D Quantity or ndarray}
+
+    Parameters
+    ----------
+    rows : list of dict
+        Samples {name : scalar Quantity or number}, all with the same names
+    """
+    columns = {}
+    for name in rows[0]:
+        first = rows[0][name]
+        if hasattr(first,'units'):
+            columns[name] = _u.Quantity(_np.array([row[name].to(first.units).magnitude for row in rows]),first.units)
+        else:
+            columns[name] = _np.array([row[name] for row in rows])
+    return columns
+
+################################################################################
+# Values sent to and from the workers
+def _pack(value):
+    """
+    Returns
+    -------
+    Picklable version of value. Quantities are packed as their magnitude and unit name (None with the raw backend)
+    """
+    if hasattr(value,'units'):
+        units = None if _units.current()=='raw' else str(value.units)
+        return ('Quantity',_np.asarray(value.magnitude),units)
+    return ('value',value)
+
+def _unpack(packed):
+    """
+    Returns
+    -------
+    Value of a packed value (see ``_pack``), with the unit backend in use
+    """
+    if packed[0]=='Quantity':
+        magnitude,units = packed[1:]
+        return _u.Quantity(magnitude) if units is None else magnitude * _u(units)
+    return packed[1]
+
+def _slice(packed,start,stop):
+    """
+    Returns
+    -------
+    Rows start to stop of a packed column, or the packed value if it is not a column
+    """
+    if packed[0]=='Quantity' and packed[1].ndim==1:
+        return packed[:1] + (packed[1][start:stop],) + packed[2:]
+    if packed[0]=='value' and _np.ndim(packed[1])==1 and not isinstance(packed[1],(str,list,tuple)):
+        return ('value',packed[1][start:stop])
+    return packed
+
+################################################################################
+# Workers
+_LASER      = ('wavelength','energy','time_fwhm','space_fwhm','time_profile','space_profile')
+_MATERIAL   = ('density','atomic_mass','Z')
+
+def _lpi_batch(**parameters):
+    """
+    Returns
+    -------
+    Batch of laser plasma interactions of the parameters : ``LPIBatch`` instance
+
+    Parameters
+    ----------
+    **parameters
+        Columns of ``LaserBatch`` and ``MaterialBatch``, and profile names
+    """
+    unknown = set(parameters) - set(_LASER) - set(_MATERIAL)
+    if unknown:
+        raise TypeError("Unknown scan parameter(s) %s."%", ".join("`%s`"%k for k in sorted(unknown)))
+    laser    = LaserBatch(**{k:v for k,v in parameters.items() if k in _LASER})
+    material = MaterialBatch(**{k:v for k,v in parameters.items() if k in _MATERIAL})
+    return LPIBatch(laser,material)
+
+def _initialize(backend,default_units):
+    """
+    Set up the unit backend of a worker process, once when it starts.
+
+    Parameters
+    ----------
+    backend : str
+        Unit backend name
+    default_units : dict
+        {dimension : unit name} of the default units of the parent process
+    """
+    _units.use(backend)
+    registry = _units._current().registry
+    if backend=='pint':
+        import pint
+        pint.set_application_registry(registry)
+    for dim,name in default_units.items():
+        if str(_du[dim].units)!=name:
+            _du[dim] = registry(name)
+
+def _evaluate(backend,build,parameters,targets,kargs,length):
+    """
+    Returns
+    -------
+    Packed results of the targets, evaluated on one chunk of parameters : dict {target : packed result}
+    """
+    with _units.backend(backend):
+        root    = build(**{key:_unpack(val) for key,val in parameters.items()})
+        targets = [(t[0],{k:_unpack(v) for k,v in t[1].items()}) for t in targets]
+        kargs   = {key:_unpack(val) for key,val in kargs.items()}
+        results = root.evaluate(targets,**kargs)
+        packed  = {}
+        for target,res in results.items():
+            # Results which do not depend on the scanned parameters are broadcasted
+            magnitude = _np.broadcast_to(_np.asarray(res.magnitude),(length,))
+            packed[target] = _pack(_u.Quantity(magnitude,res.units)) if _units.current()!='raw' else ('Quantity',magnitude,None)
+        return packed
+
+################################################################################
+def run(parameters,targets,build=None,chunk_size=None,executor="process",max_workers=None,**kargs):
+    """
+    Returns
+    -------
+    Results of the targets for each row of the parameters, in the same order : dict {target : 1D Quantity}
+
+    Parameters
+    ----------
+    parameters : dict or list of dict
+        Columns {name : 1D Quantity or ndarray} of the same length (see ``grid``), or list of samples
+        (see ``samples``). Scalar values are shared by all the rows
+    targets : list
+        Estimate paths from the object returned by `build`, with model name after ':' if needed.
+        An item can also be a tuple (path, kwargs) to give arguments to this estimate only
+    build : callable, optional
+        Function returning the object from which estimates are evaluated, called with one chunk of the
+        parameters as keyword arguments. By default, the parameters are the columns of ``LaserBatch`` and
+        ``MaterialBatch`` (and the profile names), and it returns a ``LPIBatch`` instance
+    chunk_size : int, optional
+        Number of rows evaluated at once by a worker. By default, 4 chunks per worker
+    executor : str, optional
+        ``process`` (default) for a pool of processes, ``thread`` for a pool of threads,
+        or None to evaluate the chunks one after the other in this process
+    max_workers : int, optional
+        Number of workers. By default, the number of CPUs
+    **kargs
+        Arguments given to all the estimates having a parameter of the same name (such as `temperature`)
+
+    Notes
+    -----
+    With a pool of processes, `build` must be picklable (i.e. defined at the top level of a module).
+    The worker processes use the unit backend and the default units of this process.
+
+    Chunks are evaluated independently, so the scan scales with the number of workers as long as
+    chunks are large enough to amortize the communication with the workers (a few thousand rows).
+    An empty scan returns empty Quantities, evaluated in this process.
+    """
+    if executor not in (None,"thread","process"):
+        raise NameError("Unknown executor `%s`. Available executors are 'process', 'thread' and None."%executor)
+    if isinstance(parameters,(list,tuple)):
+        parameters = samples(parameters)
+    build   = build or _lpi_batch
+    backend = _units.current()
+
+    lengths = {len(val) for val in parameters.values() if _np.ndim(val)==1 and not isinstance(val,str)}
+    if len(lengths)>1:
+        raise ValueError("Scan parameters must have the same length, got lengths %s."%sorted(lengths))
+    length  = lengths.pop() if lengths else 1
+
+    if max_workers is None:
+        max_workers = 1 if executor is None else (_os.cpu_count() or 1)
+    if chunk_size is None:
+        chunk_size = max(1,-(-length//(4 * max_workers)))
+
+    # Inputs are packed once, then sliced into chunks
+    packed  = {key:_pack(val) for key,val in parameters.items()}
+    targets = [(t,{}) if isinstance(t,str) else (t[0],{k:_pack(v) for k,v in dict(t[1]).items()}) for t in targets]
+    kargs   = {key:_pack(val) for key,val in kargs.items()}
+    bounds  = [(start,min(start + chunk_size,length)) for start in range(0,length,chunk_size)]
+    chunks  = [{key:_slice(val,start,stop) for key,val in packed.items()} for start,stop in bounds]
+    args    = (_itertools.repeat(backend),_itertools.repeat(build),chunks,_itertools.repeat(targets),
+               _itertools.repeat(kargs),[stop - start for start,stop in bounds])
+
+    if length==0:
+        # Empty scan : the targets are evaluated on the empty columns in this process, for their units
+        results = [_evaluate(backend,build,packed,targets,kargs,0)]
+    elif executor is None:
+        results = list(map(_evaluate,*args))
+    elif executor=="thread":
+        with _ThreadPoolExecutor(max_workers) as pool:
+            results = list(pool.map(_evaluate,*args))
+    else:
+        # The registry is built before the workers are forked, so that they inherit it
+        _units._current().registry
+        default_units = {} if backend=='raw' else {dim:str(val.units) for dim,val in _du.items()}
+        with _ProcessPoolExecutor(max_workers,initializer=_initialize,initargs=(backend,default_units)) as pool:
+            results = list(pool.map(_evaluate,*args))
+
+    # Chunks are gathered in input order
+    gathered = {}
+    for target in results[0]:
+        magnitude = _np.concatenate([res[target][1] for res in results])
+        gathered[target] = _unpack(('Quantity',magnitude,results[0][target][2]))
+    return gathered
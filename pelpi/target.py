@@ -1,6 +1,6 @@
 #coding:utf8
 from ._global import *
-from ._tools import _PelpiObject,_Default
+from ._tools import _PelpiObject,_Default,_SubObject,_memoize
 
 
 __all__ = ["Material","Target"]
@@ -17,20 +17,27 @@ class Material(_PelpiObject):
         Atomic or molecular mass
     Z : dimensionless Quantity
         Atomic number or number of charges per molecule
+
+    Notes
+    -----
+    All the input parameters can be array Quantities (for parameter sweeps).
+    Estimates are then broadcasted over these arrays.
     """
+    __slots__ = ("default","_electron","_ion")
+
+    # Sub-objects, created on first access
+    electron    = _SubObject(lambda material:Material._Electron(material))
+    ion         = _SubObject(lambda material:Material._Ion(material))
+
     def __init__(self,density=None,atomic_mass=None,Z=None):
         # Test user input
-        self._check_input('density'     ,density    ,type(_du['density']))
-        self._check_input('atomic_mass' ,atomic_mass,type(_du['mass']))
-        self._check_input('Z'           ,Z          ,type(_du['number']))
+        self._check_input('density'     ,density    ,'density')
+        self._check_input('atomic_mass' ,atomic_mass,'mass')
+        self._check_input('Z'           ,Z          ,'number')
 
         # Initialize default dict
         self.default = _Default(self,input_dict={'density':density,'atomic_mass':atomic_mass,'Z':Z})
 
-        # Instanciate sub-classes
-        self.electron      = self._Electron(self)
-        self.ion           = self._Ion(self)
-
     def density(self):
         """
         Returns
@@ -59,6 +66,8 @@ class Material(_PelpiObject):
         """
         Electron properties.
         """
+        __slots__ = ("default","_mat")
+
         def __init__(self,material):
             # No need to check input because this method is only called in Material definition.
 
@@ -68,6 +77,7 @@ class Material(_PelpiObject):
             # Save reference to Material instance in a private variable
             self._mat = material
 
+        @_memoize
         def number_density(self):
             """
             Returns
@@ -93,6 +103,8 @@ class Material(_PelpiObject):
         """
         Ion properties.
         """
+        __slots__ = ("default","_mat")
+
         def __init__(self,material):
             # No need to check input because this method is only called in Material definition.
 
@@ -102,6 +114,7 @@ class Material(_PelpiObject):
             # Save reference to Material instance in a private variable
             self._mat = material
 
+        @_memoize
         def number_density(self):
             """
             Returns
@@ -137,9 +150,11 @@ class Target(_PelpiObject):
     material : object
         Reference to the input `material` instance
     """
+    __slots__ = ("default","material")
+
     def __init__(self,material):
         # Test user input
-        self._check_input('material',material,"<class 'pelpi.target.Material'>")
+        self._check_input('material',material,Material)
 
         # Initialize default dict
         self.default = _Default(self)
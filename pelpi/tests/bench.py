@@ -0,0 +1,308 @@
+#coding:utf8
+"""
+Benchmarks of pelpi.
+
+Times the import of pelpi, the construction of the ``ExampleLPI`` object graph,
+each public estimate of ``lpiGGAl`` (cold, i.e. on a new object graph, and cached),
+the loop over the hot electron temperature models, ``ParticleInCell.length_cell('both')``
+and array sweeps of 1e3 to 1e6 points.
+
+It also measures with tracemalloc the memory of one instance of each public class
+(inputs excluded), of the ``ExampleLPI`` object graph, and of this graph after an estimate.
+
+Results (best time per call in seconds, and memory per instance in bytes) are appended
+to a JSON history file, and can be compared to a previous run to flag regressions.
+
+Usage
+-----
+python bench.py                         # run, print and save results
+python bench.py --quick                 # fewer repeats, sweeps up to 1e5 points
+python bench.py --compare               # also compare with the previous run of the history
+python bench.py --compare --baseline 0  # compare with the first run of the history
+python bench.py --compare-only          # compare the last two runs, without running the benchmarks
+
+The command exits with status 1 if a regression is found in compare mode.
+"""
+import sys
+Modules_path="../../"
+if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
+import os
+import json
+import time
+import timeit
+import argparse
+import platform
+import subprocess
+import gc
+import tracemalloc
+
+# Default history file, next to this script
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),"bench_history.json")
+# Ratio of times above which a benchmark is flagged as a regression
+THRESHOLD = 1.25
+
+################################################################################
+# Benchmarks
+def best_time(func,repeat,setup=None):
+    """
+    Returns
+    -------
+    Best time of one call of func, in seconds : float
+
+    If setup is defined, it is called before each call of func, out of the timed region,
+    and its result is given to func.
+    """
+    if setup is None:
+        timer = timeit.Timer(func)
+        number,_ = timer.autorange()
+        return min(timer.repeat(repeat=repeat,number=number))/number
+    times = []
+    for i in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def import_time(repeat):
+    """
+    Returns
+    -------
+    Best time of ``import pelpi`` in a new interpreter, in seconds : float
+    """
+    environ = dict(os.environ,PYTHONPATH=os.path.abspath(os.path.join(os.path.dirname(__file__),Modules_path)))
+    code = "import time;t0=time.perf_counter();import pelpi;print(time.perf_counter()-t0)"
+    return min(float(subprocess.check_output([sys.executable,"-c",code],env=environ)) for i in range(repeat))
+
+def instance_memory(factory,number):
+    """
+    Returns
+    -------
+    Memory allocated per object returned by factory (kept alive), in bytes : float
+
+    factory is called once before the measure, so that class-level caches are not counted.
+    """
+    factory()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before  = tracemalloc.get_traced_memory()[0]
+        objects = [factory() for i in range(number)]
+        size    = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del objects
+    return size/number
+
+def resolve(root,path):
+    """
+    Returns
+    -------
+    Estimate method of path (with model name after ':' if needed), from root, and its kwargs : (callable, dict)
+    """
+    path,_,model = path.partition(':')
+    method = root
+    for name in path.split('.'):
+        method = getattr(method,name)
+    return method,({'model':model} if model else {})
+
+# Public estimates of lpiGGAl, with their arguments
+ESTIMATES = [
+    ("laser.angular_frequency",{}),
+    ("laser.power",{}),
+    ("laser.intensity",{}),
+    ("laser.intensity_peak_normalized",{}),
+    ("laser.photon.energy",{}),
+    ("laser.electron.number_density_critical",{}),
+    ("target.material.electron.number_density",{}),
+    ("target.material.ion.number_density",{}),
+    ("electron.efficiency_absorption:Price1995",{}),
+    ("electron.hot.temperature:Beg1997",{}),
+    ("electron.hot.temperature:Haines2009",{}),
+    ("electron.hot.temperature:Wilks1992",{}),
+    ("ion.energy_cutoff:Beg1997",{}),
+    ("plasma.electron.length_Debye",{'temperature':'1 MeV'}),
+    ("plasma.electron.angular_frequency_plasma",{}),
+    ("plasma.ion.angular_frequency_plasma",{}),
+]
+
+SWEEP_SIZES = [10**3,10**4,10**5,10**6]
+
+def run(repeat=5,sizes=SWEEP_SIZES):
+    """
+    Returns
+    -------
+    Benchmark results {name : best time per call in seconds} : dict
+    """
+    import numpy as np
+    import pelpi as pp
+    from examples import ExampleLPI
+    u = pp.unit
+
+    res = {}
+    res['import'] = import_time(repeat)
+    res['construct ExampleLPI'] = best_time(ExampleLPI,repeat)
+
+    for path,kwargs in ESTIMATES:
+        kwargs = {key:u(val) for key,val in kwargs.items()}
+        def cold(lpi,path=path,kwargs=kwargs):
+            method,extra = resolve(lpi,path)
+            method(**dict(kwargs,**extra))
+        res['estimate cold '+path] = best_time(cold,repeat,setup=lambda:ExampleLPI().lpiGGAl)
+        lpi = ExampleLPI().lpiGGAl
+        method,extra = resolve(lpi,path)
+        res['estimate cached '+path] = best_time(lambda:method(**dict(kwargs,**extra)),repeat)
+
+    def models(lpi):
+        for model in pp.models.available('electron.hot.temperature'):
+            lpi.electron.hot.temperature(model=model)
+    res['temperature models loop'] = best_time(models,repeat,setup=lambda:ExampleLPI().lpiGGAl)
+
+    Te = 1 * u('MeV')
+    res["length_cell('both')"] = best_time(lambda pic:pic.length_cell('both',temperature=Te),repeat,
+                                           setup=lambda:ExampleLPI().picGGAl)
+
+    for n in sizes:
+        def sweep(n=n):
+            ex  = ExampleLPI()
+            las = pp.Laser(
+                wavelength      = 0.8 * u.um,
+                energy          = np.linspace(0.1,10.,n) * u.J,
+                time_profile    = ex.tprofG,
+                space_profile   = ex.sprofG,
+            )
+            return pp.LaserPlasmaInteraction(las,ex.targAl)
+        res['sweep %.0e intensity_peak_normalized'%n] = best_time(
+            lambda lpi:lpi.laser.intensity_peak_normalized(),repeat,setup=sweep)
+        res['sweep %.0e temperature Wilks1992'%n] = best_time(
+            lambda lpi:lpi.electron.hot.temperature(model='Wilks1992'),repeat,setup=sweep)
+    return res
+
+def memory(number=1000):
+    """
+    Returns
+    -------
+    Memory benchmark results {name : bytes per instance} : dict
+    """
+    import pelpi as pp
+    from examples import ExampleLPI
+    u = pp.unit
+
+    # Inputs are shared by all the instances, so that only the pelpi objects are measured
+    ex      = ExampleLPI()
+    fwhm    = 30 * u.fs
+    wl,E    = 0.8 * u.um,2.0 * u.J
+    rho,A,Z = 2.69890e3 * u('kg/m**3'),26.98154 * u('amu'),13 * u('')
+
+    def estimate():
+        lpi = ExampleLPI().lpiGGAl
+        lpi.electron.hot.temperature(model='Wilks1992')
+        return lpi
+
+    return {
+        'memory Profile'                : instance_memory(lambda:pp.Profile(profile="gaussian1D",fwhm=fwhm),number),
+        'memory Laser'                  : instance_memory(lambda:pp.Laser(time_profile=ex.tprofG,space_profile=ex.sprofG,
+                                                                          wavelength=wl,energy=E),number),
+        'memory Material'               : instance_memory(lambda:pp.Material(density=rho,atomic_mass=A,Z=Z),number),
+        'memory Target'                 : instance_memory(lambda:pp.Target(ex.matAl),number),
+        'memory LaserPlasmaInteraction' : instance_memory(lambda:pp.LaserPlasmaInteraction(ex.lasGG,ex.targAl),number),
+        'memory ParticleInCell'         : instance_memory(lambda:pp.ParticleInCell(ex.lpiGGAl),number),
+        'memory ExampleLPI'             : instance_memory(ExampleLPI,number),
+        'memory ExampleLPI + Wilks1992' : instance_memory(estimate,number//10),
+    }
+
+################################################################################
+# History
+def environment():
+    """
+    Returns
+    -------
+    Description of the run environment : dict
+    """
+    import numpy,pint
+    try:
+        commit = subprocess.check_output(["git","rev-parse","--short","HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError,subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date'      : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit'    : commit,
+        'python'    : platform.python_version(),
+        'numpy'     : numpy.__version__,
+        'pint'      : pint.__version__,
+        'machine'   : platform.machine(),
+    }
+
+def load(filename):
+    """
+    Returns
+    -------
+    Benchmark history : list of dict
+    """
+    if not os.path.exists(filename):
+        return []
+    with open(filename) as f:
+        return json.load(f)
+
+def save(filename,history):
+    with open(filename,'w') as f:
+        json.dump(history,f,indent=1)
+
+def compare(old,new,threshold=THRESHOLD):
+    """
+    Print the comparison of two runs.
+
+    Returns
+    -------
+    Names of the benchmarks slower than threshold times the old ones : list of str
+    """
+    regressions = []
+    for section,unit in [('results','s'),('memory','B')]:
+        print("{:<60} {:>12} {:>12} {:>8}".format("benchmark","old (%s)"%unit,"new (%s)"%unit,"ratio"))
+        for name,t in new.get(section,{}).items():
+            if name not in old.get(section,{}):
+                continue
+            ratio = t/old[section][name]
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append(name)
+            print("{:<60} {:>12.3e} {:>12.3e} {:>8.2f}{}".format(name,old[section][name],t,ratio,flag))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pelpi benchmarks")
+    parser.add_argument("--history",default=HISTORY,help="JSON history file")
+    parser.add_argument("--quick",action="store_true",help="fewer repeats, sweeps up to 1e5 points")
+    parser.add_argument("--compare",action="store_true",help="compare with a previous run")
+    parser.add_argument("--compare-only",action="store_true",help="compare the last run with a previous one, without running")
+    parser.add_argument("--baseline",type=int,default=-2,help="index of the run to compare with in the history (default: previous run)")
+    parser.add_argument("--threshold",type=float,default=THRESHOLD,help="time ratio flagged as regression")
+    parser.add_argument("--no-save",action="store_true",help="do not append results to the history")
+    args = parser.parse_args(argv)
+
+    history = load(args.history)
+    if not args.compare_only:
+        repeat,sizes = (3,SWEEP_SIZES[:3]) if args.quick else (5,SWEEP_SIZES)
+        entry = dict(environment(),results=run(repeat,sizes),memory=memory(200 if args.quick else 1000))
+        for name,t in entry['results'].items():
+            print("{:<60} {:>12.3e} s".format(name,t))
+        for name,size in entry['memory'].items():
+            print("{:<60} {:>12.0f} B".format(name,size))
+        history.append(entry)
+        if not args.no_save:
+            save(args.history,history)
+
+    if args.compare or args.compare_only:
+        if len(history) < 2:
+            print("Nothing to compare with.")
+            return 0
+        regressions = compare(history[args.baseline],history[-1],args.threshold)
+        if regressions:
+            print("\n{} regression(s) found.".format(len(regressions)))
+            return 1
+    return 0
+
+if __name__== '__main__':
+    sys.exit(main())
@@ -41,6 +41,7 @@ class ExampleLPI(object):
         self.picGGAl = pp.ParticleInCell(self.lpiGGAl)
         
 import unittest
+import numpy as np
 
 class PelpiTest(unittest.TestCase):
     relative_precision=1e-7 # Class attribute, for all tests
@@ -56,3 +57,9 @@ class PelpiTest(unittest.TestCase):
         else:
             relative_difference = 0.0 # both magnitudes = 0.0
         self.assertAlmostEqual(relative_difference,0.0,delta=self.relative_precision)
+
+    def assertAllCloseQuantity(self,Q1,Q2): # array version of assertAlmostEqualQuantity
+        q1 = Q1.to_base_units()
+        q2 = Q2.to_base_units()
+        self.assertEqual(q1.units,q2.units)
+        np.testing.assert_allclose(q1.magnitude,q2.magnitude,rtol=self.relative_precision)
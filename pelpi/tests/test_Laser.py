@@ -75,6 +75,77 @@ class test_Laser(PelpiTest):
         func(),\
         2.483057104086628E-19 * u.J)
 
+    def test_vectorized(self):
+        energy = np.linspace(0.5,5.0,7) * u.J
+        fwhm   = np.linspace(20.,60.,7) * u.fs
+        las = pp.Laser(
+            wavelength      = 0.8 * u.um,
+            energy          = energy,
+            time_profile    = pp.Profile(profile="gaussian1D",fwhm=fwhm),
+            space_profile   = self.lasGG.space_profile,
+        )
+        a0 = las.intensity_peak_normalized()
+        self.assertEqual(a0.shape,(7,))
+        for i in range(7):
+            las_i = pp.Laser(
+                wavelength      = 0.8 * u.um,
+                energy          = energy[i],
+                time_profile    = pp.Profile(profile="gaussian1D",fwhm=fwhm[i]),
+                space_profile   = self.lasGG.space_profile,
+            )
+            self.assertAlmostEqualQuantity(las.intensity()[i],las_i.intensity())
+            self.assertAlmostEqualQuantity(a0[i],las_i.intensity_peak_normalized())
+
+    def test_intensity_image(self):
+        y,x   = np.mgrid[:256,:256]
+        image = np.exp(-4 * np.log(2) * ((x - 128.)**2 + (y - 128.)**2) * 0.2**2/10.**2)
+        las = pp.Laser(
+            wavelength      = 0.8 * u.um,
+            energy          = 2.0 * u.J,
+            time_profile    = self.lasGG.time_profile,
+            space_profile   = pp.Profile(profile="image",image=image,pixel_size=0.2 * u.um),
+        )
+        self.assertTrue(abs(las.intensity()/self.lasGG.intensity() - 1) < 1e-3)
+
+    def test_intensity_grid(self):
+        las = self.lasGG
+        r = np.linspace(0.,20.,50) * u.um
+        t = np.linspace(-100.,100.,40) * u.fs
+        chunks = list(las.intensity_grid(r=r,t=t,chunk_size=100))
+        self.assertEqual(len(chunks),25)
+        self.assertEqual(chunks[0][1].shape,(2,40))
+        I = np.concatenate([chunk.to('W/cm**2').magnitude for sl,chunk in chunks]) * u('W/cm**2')
+        self.assertAllCloseQuantity(I,las.intensity(r[:,None],t[None,:]))
+
+    def test_intensity_grid_off_centre(self):
+        tt = np.linspace(-150.,250.,4001)
+        las = pp.Laser(
+            wavelength      = 0.8 * u.um,
+            energy          = 2.0 * u.J,
+            time_profile    = pp.Profile(profile="tabulated",table=(tt * u.fs,np.exp(-4 * np.log(2) * ((tt - 50.)/30.)**2))),
+            space_profile   = self.lasGG.space_profile,
+        )
+        r = np.linspace(0.,20.,5) * u.um
+        t = np.array([0.,50.]) * u.fs
+        I = np.concatenate([chunk.to('W/m**2').magnitude for sl,chunk in las.intensity_grid(r=r,t=t)]) * u('W/m**2')
+        self.assertAllCloseQuantity(I,las.intensity(r[:,None],t[None,:]))
+        # Peak intensity is at t=50 fs
+        self.assertAlmostEqualQuantity(I[0,1],self.lasGG.intensity())
+
+    def test_envelope_grid_xyzt(self):
+        las = self.lasGG
+        x = y = np.linspace(-20.,20.,41) * u.um
+        z = np.linspace(-10.,10.,11) * u.um
+        t = np.array([0.,20.]) * u.fs
+        env = np.zeros((41,41,11,2))
+        for sl,chunk in las.envelope_grid(x=x,y=y,z=z,t=t,chunk_size=5000):
+            self.assertTrue(chunk.size <= 5000)
+            env[sl] = chunk.magnitude
+        i,j,k = 5,30,7
+        self.assertAlmostEqual(env[i,j,k,1],
+            las.envelope(np.hypot(x[i],y[j]),t[1] - z[k]/u.c).magnitude)
+        with self.assertRaises(TypeError):
+            next(las.envelope_grid(r=x,x=x,t=t))
 
 if __name__== '__main__':
     unittest.main()
@@ -5,6 +5,7 @@ if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
 
 from examples import ExampleLPI,PelpiTest
 
+import numpy as np
 import pelpi as pp
 u=pp.unit
 
@@ -18,6 +19,96 @@ class test_LaserPlasmaInteraction(PelpiTest):
     def tearDown(self):
         del self.lpiGGAl
 
+    def test_evaluate(self):
+        targets = [
+            "laser.intensity_peak_normalized",
+            "laser.electron.number_density_critical",
+            "electron.hot.temperature:Beg1997",
+            "electron.hot.temperature:Haines2009",
+            "electron.hot.temperature:Wilks1992",
+            "plasma.electron.length_Debye",
+        ]
+        Te = 1 * u('MeV')
+        plan = self.lpiGGAl.plan(targets,temperature=Te)
+        self.assertEqual(plan.nodes,{})
+        res = plan.evaluate()
+
+        ref = ExampleLPI().lpiGGAl
+        self.assertAlmostEqualQuantity(res["electron.hot.temperature:Beg1997"],ref.electron.hot.temperature(model="Beg1997"))
+        self.assertAlmostEqualQuantity(res["plasma.electron.length_Debye"],ref.plasma.electron.length_Debye(Te))
+
+        # Shared nodes are evaluated only once (or not at all if already cached)
+        for node in plan.order():
+            self.assertLessEqual(node.evaluations,1)
+        intensity = [n for n in plan.nodes.values() if n.name=="Laser.intensity"]
+        self.assertEqual(len(intensity),1)
+        self.assertEqual(intensity[0].calls,2)
+
+    def test_temperature_all(self):
+        plan = self.lpiGGAl.plan(["electron.hot.temperature_all"])
+        Teh  = plan.evaluate()["electron.hot.temperature_all"]
+        self.assertEqual(list(Teh['model']),['Beg1997','Haines2009','Wilks1992'])
+        for model,value in Teh:
+            self.assertAlmostEqualQuantity(
+                value * pp.default_unit['temperature'],
+                ExampleLPI().lpiGGAl.electron.hot.temperature(model=model))
+        for node in plan.nodes.values():
+            if node.name=="Laser.intensity":
+                self.assertEqual((node.calls,node.evaluations),(2,1))
+
+    def test_temperature_all_vectorized(self):
+        self.lpiGGAl.laser.default.set('energy',np.array([0.5,1.0,2.0]) * u.J,verbose=False)
+        Teh = self.lpiGGAl.electron.hot.temperature_all()
+        self.assertEqual(Teh['value'].shape,(3,3))
+        self.assertAllCloseQuantity(
+            Teh[Teh['model']=='Wilks1992']['value'][0] * pp.default_unit['temperature'],
+            self.lpiGGAl.electron.hot.temperature(model='Wilks1992'))
+
+    def test_vectorized(self):
+        las = self.lpiGGAl.laser
+        energy  = np.array([0.5,1.0,2.0]) * u.J
+        density = np.array([1.0,2.0,4.0]) * 2.69890e3 * u('kg/m**3')
+        lpi = pp.LaserPlasmaInteraction(
+            pp.Laser(wavelength=las.wavelength(),energy=energy,
+                     time_profile=las.time_profile,space_profile=las.space_profile),
+            pp.Target(pp.Material(density=density,atomic_mass=26.98154 * u('amu'),Z=13 * u(''))),
+        )
+        for model in ['Beg1997','Haines2009','Wilks1992']:
+            Teh = lpi.electron.hot.temperature(model=model)
+            self.assertEqual(Teh.shape,(3,))
+        LDe = lpi.plasma.electron.length_Debye(Teh)
+        self.assertAllCloseQuantity(
+            LDe,
+            np.sqrt(u.epsilon_0 * Teh/(lpi.target.material.electron.number_density() * u.e**2)))
+
+    def test_monte_carlo(self):
+        las = self.lpiGGAl.laser
+        E0  = las.energy()
+        d0  = las.default.get('energy')
+        res = self.lpiGGAl.monte_carlo('electron.hot.temperature:Wilks1992',{
+            'laser.energy'              : pp.uncertainty.Normal(E0,relative=0.03),
+            'laser.space_profile.fwhm'  : pp.uncertainty.Uniform(9 * u.um,11 * u.um),
+            },n=500,seed=0)
+        self.assertEqual(res.samples.shape,(500,))
+        self.assertTrue(res.std().magnitude > 0)
+        # Same samples with the same seed
+        res2 = self.lpiGGAl.monte_carlo('electron.hot.temperature:Wilks1992',{
+            'laser.energy'              : pp.uncertainty.Normal(E0,relative=0.03),
+            'laser.space_profile.fwhm'  : pp.uncertainty.Uniform(9 * u.um,11 * u.um),
+            },n=500,seed=0)
+        self.assertAllCloseQuantity(res.samples,res2.samples)
+        # Previous input values are restored
+        self.assertEqual(las.energy(),E0)
+        self.assertEqual(las.default.get('energy'),d0)
+
+    def test_monte_carlo_model_uncertainty(self):
+        Emax = self.lpiGGAl.ion.energy_cutoff(model='Beg1997')
+        res = self.lpiGGAl.monte_carlo('ion.energy_cutoff:Beg1997',n=2000,seed=1,model_uncertainty=True)
+        self.assertEqual(res.samples.shape,(2000,))
+        self.assertTrue(0.5 < (res.percentile(50)/Emax).to('').magnitude < 1.5)
+        res = self.lpiGGAl.monte_carlo('ion.energy_cutoff:Beg1997',n=10,seed=1)
+        self.assertAllCloseQuantity(res.samples,Emax * np.ones(10))
+
 
 
 if __name__== '__main__':
@@ -3,12 +3,14 @@ import sys
 Modules_path="../../"
 if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
 
+import numpy as np
 import pelpi as pp
 u=pp.unit
 
 from examples import ExampleLPI,PelpiTest
 
 import unittest
+import tempfile,os,json
 
 class test_ParticleInCell(PelpiTest):
     def setUp(self):
@@ -31,5 +33,142 @@ class test_ParticleInCell(PelpiTest):
         min(func('laser'),func('target',temperature=1*u('MeV'))),\
         func('both',temperature=1*u('MeV')))
 
+    def test_evaluate(self):
+        res = self.picGGAl.evaluate(["length_cell",("time_step",{'CFL':True})],lim='both',temperature=1*u('MeV'))
+        self.assertAlmostEqualQuantity(res["length_cell"],self.picGGAl.length_cell('both',temperature=1*u('MeV')))
+        self.assertAlmostEqualQuantity(res["time_step"],res["length_cell"]/np.sqrt(2)/u.c)
+
+    def test_length_cell_vectorized(self):
+        func=self.picGGAl.length_cell
+        Te = np.logspace(-3,1,5) * u('MeV')
+        dx = func('both',temperature=Te)
+        self.assertEqual(dx.shape,(5,))
+        for i in range(5):
+            self.assertAlmostEqualQuantity(dx[i],func('both',temperature=Te[i]))
+
+    def test_export_laser(self):
+        smilei = self.picGGAl.code.smilei
+        las = self.picGGAl.lpi.laser
+        r = np.linspace(0.,20.,30) * u.um
+        t = np.linspace(-60.,60.,51) * u.fs
+        with tempfile.TemporaryDirectory() as tmp:
+            for filename in ["field.npy","field.bin"]:
+                path = os.path.join(tmp,filename)
+                meta = smilei.export_laser(path,quantity="field",r=r,t=t,dtype='float64',chunk_size=200)
+                with open(path + ".json") as f:
+                    self.assertEqual(json.load(f),meta)
+                if filename.endswith(".npy"):
+                    field = np.load(path,mmap_mode='r')
+                else:
+                    field = np.memmap(path,dtype=meta['dtype'],mode='r',shape=tuple(meta['shape']))
+                self.assertEqual(field.shape,(30,51))
+                # Peak field is a0 in Smilei units
+                self.assertAlmostEqual(field.max(),las.intensity_peak_normalized().magnitude,places=6)
+                self.assertAlmostEqual(meta['axes']['r'][-1],(r[-1]/smilei.length()).to('').magnitude)
+                del field
+            # Metadata of field.npy and field.bin do not overwrite each other
+            self.assertEqual(sorted(f for f in os.listdir(tmp) if f.endswith(".json")),["field.bin.json","field.npy.json"])
+            path = os.path.join(tmp,"envelope.npy")
+            smilei.export_laser(path,r=r,t=t,dtype='float64')
+            envelope = np.load(path)
+            self.assertAlmostEqual(envelope.max(),1.,places=6)
+            # Field envelopes, as Smilei time_envelope and space_envelope
+            np.testing.assert_allclose(envelope,np.sqrt(las.envelope(r[:,None],t[None,:]).magnitude),rtol=1e-10)
+            np.testing.assert_allclose(np.load(os.path.join(tmp,"field.npy")),
+                envelope * las.intensity_peak_normalized().magnitude,rtol=1e-10)
+
+    def test_patches(self):
+        smilei = self.picGGAl.code.smilei
+        patches = smilei.patches([1024,256],mpi=4,omp=8)
+        self.assertEqual(np.prod(patches),128)
+        self.assertEqual(patches,[32,4])
+        # Patches keep at least 8 cells in each dimension
+        self.assertEqual(smilei.patches([64,16],mpi=64,omp=4),[8,2])
+
+    def test_namelist(self):
+        smilei = self.picGGAl.code.smilei
+        Te = 1 * u.MeV
+        nml = smilei.namelist([40 * u.um,20 * u.um],mpi=4,omp=8,temperature=Te,thickness=2 * u.um)
+        # Execute the namelist with dummy Smilei blocks
+        blocks = {}
+        block = lambda name:(lambda **kwargs:blocks.setdefault(name,[]).append(kwargs))
+        namespace = {name:block(name) for name in ["Main","LaserGaussian2D","Species"]}
+        namespace.update(tgaussian=lambda **kwargs:kwargs,trapezoidal=lambda n0,**kwargs:n0)
+        exec(nml,namespace)
+        main = blocks["Main"][0]
+        dx = (self.picGGAl.length_cell('both',Te)/smilei.length()).to('').magnitude
+        self.assertAlmostEqual(main['cell_length'][0],dx,places=6)
+        for L,p in zip(main['grid_length'],main['number_of_patches']):
+            self.assertAlmostEqual(L/dx/p,round(L/dx/p),places=3)
+        self.assertAlmostEqual(blocks["LaserGaussian2D"][0]['a0'],
+            self.picGGAl.lpi.laser.intensity_peak_normalized().magnitude,places=6)
+        self.assertAlmostEqual(blocks["Species"][0]['number_density'],
+            (self.picGGAl.lpi.target.material.electron.number_density()/smilei.number_density()).to('').magnitude,places=4)
+
+    def test_cost(self):
+        Te  = 1 * u.MeV
+        ppc = np.array([8,16,32])
+        pic = pp.ParticleInCell(self.picGGAl.lpi,box=[40 * u.um,20 * u.um],thickness=2 * u.um,
+                                particles_per_cell=ppc,duration=500 * u.fs)
+        dx = pic.length_cell('both',Te)
+        nx,ny,nt = np.ceil((40 * u.um/dx).to('').magnitude),np.ceil((20 * u.um/dx).to('').magnitude),np.ceil((2 * u.um/dx).to('').magnitude)
+        self.assertEqual(pic.number_of_cells('both',Te).magnitude,nx * ny)
+        self.assertAllCloseQuantity(pic.number_of_particles('both',Te),nt * ny * ppc * u(''))
+        self.assertEqual(pic.number_of_timesteps('both',True,Te).magnitude,
+            np.ceil((500 * u.fs/pic.time_step('both',True,Te)).to('').magnitude))
+        # 2 species, 50 bytes per particle in 2D, on 4 MPI processes
+        self.assertAllCloseQuantity(
+            pic.memory_particles('both',Te,mpi=4),
+            nt * ny * ppc * 2 * 50/4. * u.byte)
+        self.assertAlmostEqualQuantity(pic.memory_fields('both',Te,mpi=4),nx * ny * 13 * 8/4. * u.byte)
+        cost = pic.cost('both',True,Te)
+        self.assertEqual(cost.shape,(3,))
+        self.assertAlmostEqualQuantity(cost[1],2 * cost[0])
+        # Calibration from the measured cost of the 16 particles per cell configuration
+        self.assertRaises(ValueError,pic.calibrate,100 * u.hour,'both',True,Te)
+        push_time = pic.calibrate(100 * u.hour,'both',True,Te,index=1)
+        self.assertEqual(np.ndim(push_time.magnitude),0)
+        self.assertAlmostEqualQuantity(pic.push_time(),push_time)
+        self.assertAllCloseQuantity(pic.cost('both',True,Te),np.array([50.,100.,200.]) * u.hour)
+        # Missing inputs
+        pic = pp.ParticleInCell(self.picGGAl.lpi,box=[40 * u.um,20 * u.um])
+        self.assertEqual(pic.number_of_cells('both',Te).magnitude,nx * ny)
+        for method,args in [(pic.number_of_particles,('both',Te)),(pic.number_of_timesteps,('both',True,Te)),(pic.cost,('both',True,Te))]:
+            with self.assertRaisesRegex(TypeError,"thickness|duration"):
+                method(*args)
+
+    def test_load_balance(self):
+        smilei = self.picGGAl.code.smilei
+        dx = 0.1 * u.um
+        slab = (20 * u.um,2 * u.um)
+        particles,imbalance = smilei.load_balance([400,160],[8,4],dx,slab,mpi=4,omp=2,particles_per_cell=10,species=1)
+        self.assertEqual(particles.shape,(8,4))
+        # 20 cells thick target, in the 5th patch along x
+        self.assertEqual(particles.sum(),20 * 160 * 10)
+        self.assertEqual(particles[4,0],20 * 40 * 10)
+        self.assertEqual(particles[0,0],0)
+        # The whole target in one patch
+        particles,imbalance = smilei.load_balance([400,160],[8,1],dx,slab,mpi=4,omp=2,particles_per_cell=10,species=1)
+        load = 20 * 160 * 10 + 50 * 160
+        self.assertAlmostEqual(imbalance,load/((20 * 160 * 10 + 400 * 160)/8.))
+        # Tabulated slab gives the same counts
+        x = np.linspace(0.,40.,4001) * u.um
+        n = ((x>=20 * u.um) & (x<=22 * u.um)) * 1.
+        self.assertTrue(abs(smilei.load_balance([400,160],[8,4],dx,(x,n),particles_per_cell=10,species=1)[0].sum()/particles.sum() - 1) < 0.1)
+        # Splitting the transverse dimension balances the load
+        patches,imbalance = smilei.balanced_patches([400,160],dx,slab,mpi=4,omp=2,patches_per_core=1)
+        self.assertTrue(imbalance < 1.1)
+        self.assertTrue(np.prod(patches) >= 8)
+        # At least 4 patches per core by default, as square as possible
+        for cells,mpi,omp in [([400,160],4,2),([400,160],8,1),([4096,2048],16,8)]:
+            patches,imbalance = smilei.balanced_patches(cells,dx,slab,mpi=mpi,omp=omp)
+            self.assertTrue(np.prod(patches) >= 4 * mpi * omp)
+            per_patch = [c/p for c,p in zip(cells,patches)]
+            self.assertTrue(max(per_patch)/min(per_patch) <= 4,patches)
+            self.assertTrue(imbalance < 1.2)
+        with self.assertRaises(ValueError):
+            smilei.load_balance([400,160],[3,4],dx,slab)
+
+
 if __name__== '__main__':
     unittest.main()
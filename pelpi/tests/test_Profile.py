@@ -3,12 +3,14 @@ import sys
 Modules_path="../../"
 if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
 
+import numpy as np
 import pelpi as pp
 u=pp.unit
 
 from examples import ExampleLPI,PelpiTest
 
 import unittest
+import tempfile,os
 
 class test_Profile(PelpiTest):
     def setUp(self):
@@ -28,6 +30,14 @@ class test_Profile(PelpiTest):
             func(self.tprofG.fwhm()/2),
             1/2. * u(''))
 
+    def test_envelope_top_hat(self):
+        func = pp.Profile(profile="top-hat",radius=5*u.um).envelope
+        self.assertAlmostEqualQuantity(func(1*u.um),1 * u(''))
+        self.assertAlmostEqualQuantity(func(-6*u.um),0 * u(''))
+        self.assertAllCloseQuantity(
+            func(np.array([-6.,-1.,0.,4.,6.])*u.um),
+            np.array([0.,1.,1.,1.,0.]) * u(''))
+
     def test_integral1D(self):
         func = self.tprofG.integral1D
         self.assertAlmostEqualQuantity(
@@ -40,5 +50,122 @@ class test_Profile(PelpiTest):
             func(),
             1.133090035456799E+02 * u.um**2)
 
+    def test_integral_numerical(self):
+        fwhm = 30 * u.fs
+        # Gaussian as a super-gaussian of order 2, and as a user profile
+        for prof in [
+            pp.Profile(profile="super-gaussian",fwhm=fwhm,order=2),
+            pp.Profile(profile=lambda x:np.exp(-np.log(2) * (2 * x)**2),fwhm=fwhm)]:
+            self.assertAlmostEqualQuantity(prof.integral1D(),3.193401058293678E+01 * u.fs)
+        self.assertAlmostEqualQuantity(
+            pp.Profile(profile="sech2",fwhm=fwhm).integral1D(),
+            fwhm/np.log(1 + np.sqrt(2)))
+        self.assertAlmostEqualQuantity(
+            pp.Profile(profile="lorentzian",fwhm=fwhm).integral1D(),
+            np.pi/2 * fwhm)
+        self.assertAlmostEqualQuantity(
+            pp.Profile(profile="super-gaussian",fwhm=10 * u.um,order=2).integral2D(),
+            1.133090035456799E+02 * u.um**2)
+        with self.assertRaises(ArithmeticError):
+            pp.Profile(profile="lorentzian",fwhm=10 * u.um).integral2D()
+
+    def test_integral_numerical_vectorized(self):
+        prof = pp.Profile(profile="super-gaussian",fwhm=np.array([10.,20.]) * u.um,order=np.array([2,8]))
+        Ix = prof.integral2D()
+        self.assertEqual(Ix.shape,(2,))
+        self.assertAlmostEqualQuantity(Ix[0],1.133090035456799E+02 * u.um**2)
+        # Flat-top profiles are close to a top-hat of radius fwhm/2
+        self.assertTrue(abs(Ix[1]/(np.pi * (10 * u.um)**2) - 1) < 0.05)
+
+    def test_envelope_numerical(self):
+        for name in ["super-gaussian","sech2","lorentzian"]:
+            func = pp.Profile(profile=name,fwhm=10 * u.um,order=6).envelope
+            self.assertAlmostEqualQuantity(func(0 * u.um),1 * u(''))
+            self.assertAlmostEqualQuantity(func(5 * u.um),1/2. * u(''))
+
+    def test_tabulated(self):
+        t = np.linspace(-150.,150.,20001)
+        y = 3. * np.exp(-4 * np.log(2) * (t/30.)**2) # arbitrary units
+        prof = pp.Profile(profile="tabulated",table=(t * u.fs,y))
+        self.assertAllCloseQuantity(
+            prof.envelope(np.array([0.,15.,-15.,1000.]) * u.fs),
+            np.array([1.,0.5,0.5,0.]) * u(''))
+        for method in ['trapezoid','simpson']:
+            self.assertAlmostEqualQuantity(prof.integral1D(method=method),self.tprofG.integral1D())
+
+    def test_tabulated_from_file(self):
+        r = np.linspace(0.,50.,10001)
+        y = np.exp(-4 * np.log(2) * (r/10.)**2)
+        with tempfile.TemporaryDirectory() as tmp:
+            np.save(os.path.join(tmp,"spot.npy"),np.array([r,y]))
+            np.array([r,y]).tofile(os.path.join(tmp,"spot.bin"))
+            for filename in ["spot.npy","spot.bin"]:
+                prof = pp.Profile.from_file(os.path.join(tmp,filename),unit="um")
+                self.assertIsInstance(prof.table().y,np.memmap)
+                # Radial lineout, evaluated at |r|
+                self.assertAlmostEqualQuantity(prof.envelope(-5 * u.um),0.5 * u(''))
+                self.assertAlmostEqualQuantity(prof.integral2D(method='simpson'),self.sprofG.integral2D())
+                del prof
+
+    def test_tabulated_chunks(self):
+        x = np.linspace(0.,40.,1001)
+        y = np.exp(-4 * np.log(2) * (x/10.)**2)
+        table = pp._table._Table(x,y,u.um)
+        expected = {m:table.integral(2,m) for m in ['trapezoid','simpson']}
+        chunk = pp._table._CHUNK
+        try:
+            pp._table._CHUNK = 8
+            table = pp._table._Table(x,y,table.units)
+            for m in ['trapezoid','simpson']:
+                self.assertAlmostEqualQuantity(table.integral(2,m),expected[m])
+        finally:
+            pp._table._CHUNK = chunk
+
+    def gaussian_image(self,center=(100.3,90.7),n=256,pixel_size=0.2):
+        y,x = np.mgrid[:n,:n]
+        r2  = ((x - center[1])**2 + (y - center[0])**2) * pixel_size**2
+        return (60000 * np.exp(-4 * np.log(2) * r2/10.**2)).astype(np.uint16)
+
+    def test_image(self):
+        prof = pp.Profile(profile="image",image=self.gaussian_image(),pixel_size=0.2 * u.um)
+        cy,cx = prof.centroid()
+        self.assertAlmostEqual(cy.to('um').magnitude,100.3 * 0.2,places=3)
+        self.assertAlmostEqual(cx.to('um').magnitude,90.7 * 0.2,places=3)
+        # Gaussian spot : effective area, and half of the energy inside the FWHM
+        self.assertTrue(abs(prof.integral2D()/self.sprofG.integral2D() - 1) < 1e-3)
+        self.assertAlmostEqual(prof.energy_fraction_fwhm().magnitude,0.5,places=2)
+        self.assertAlmostEqual(prof.encircled_energy(5 * u.um).magnitude,0.5,places=2)
+        r,fraction = prof.encircled_energy()
+        self.assertTrue(np.all(np.diff(fraction.magnitude)>=0))
+        self.assertAlmostEqual(fraction[-1].magnitude,1.0)
+        self.assertAlmostEqualQuantity(prof.envelope(0 * u.um),1 * u(''))
+        with self.assertRaises(NameError):
+            self.sprofG.centroid()
+
+    def test_image_stack(self):
+        stack = np.array([self.gaussian_image(center=(100.,90.)),self.gaussian_image(center=(100.,90.)) // 2])
+        profs = pp.Profile.from_images(stack,pixel_size=0.2 * u.um)
+        self.assertEqual(len(profs),2)
+        pp._image._squares.cache_clear()
+        fractions = [prof.energy_fraction_fwhm() for prof in profs] + [prof.encircled_energy(5 * u.um) for prof in profs]
+        self.assertAlmostEqual(fractions[2].magnitude,fractions[3].magnitude,places=3)
+        # Images of the same shape share the squared offsets, whatever their centroid
+        jitter = pp.Profile(profile="image",image=self.gaussian_image(center=(120.2,70.6)),pixel_size=0.2 * u.um)
+        self.assertAlmostEqual(jitter.encircled_energy(5 * u.um).magnitude,fractions[2].magnitude,places=2)
+        info = pp._image._squares.cache_info()
+        self.assertEqual((info.misses,info.hits),(1,2))
+
+    def test_image_background(self):
+        image = self.gaussian_image()
+        prof  = pp.Profile(profile="image",image=image,pixel_size=0.2 * u.um)
+        dark  = pp.Profile(profile="image",image=image + np.uint16(1000),pixel_size=0.2 * u.um)
+        self.assertEqual(dark.image().background(),1000.)
+        # The dark level of the camera does not change the effective area, centroid and energy fractions
+        self.assertAlmostEqualQuantity(dark.integral2D(),prof.integral2D())
+        self.assertAlmostEqualQuantity(dark.centroid()[1],prof.centroid()[1])
+        self.assertAlmostEqualQuantity(dark.energy_fraction_fwhm(),prof.energy_fraction_fwhm())
+        self.assertAlmostEqualQuantity(dark.encircled_energy(5 * u.um),prof.encircled_energy(5 * u.um))
+        self.assertAlmostEqualQuantity(dark.envelope(3 * u.um),prof.envelope(3 * u.um))
+
 if __name__== '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+# coding:utf8
+import sys
+Modules_path="../../"
+if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
+
+import numpy as np
+import pelpi as pp
+u=pp.unit
+
+from examples import ExampleLPI,PelpiTest
+
+import unittest
+
+class test_Batch(PelpiTest):
+    def setUp(self):
+        self.n = 7
+        self.lasers = pp.LaserBatch(
+            wavelength  = 0.8 * u.um,
+            energy      = np.linspace(0.5,4,self.n) * u.J,
+            time_fwhm   = 30 * u.fs,
+            space_fwhm  = np.linspace(5,15,self.n) * u.um,
+        )
+        self.materials = pp.MaterialBatch(
+            density     = 2.69890e3 * u.kg/u.m**3,
+            atomic_mass = 26.98154 * u('amu'),
+            Z           = 13,
+        )
+        self.lpis = pp.LPIBatch(self.lasers,self.materials)
+
+    def tearDown(self):
+        del self.lasers,self.materials,self.lpis
+
+    def test_columns(self):
+        self.assertEqual(len(self.lpis),self.n)
+        self.assertEqual(len(self.materials),1)
+        for batch in (self.lasers,self.lpis.material):
+            for value in batch.columns.values():
+                self.assertEqual(value.shape,(self.n,) if batch is self.lasers else (len(batch),))
+                self.assertTrue(value.magnitude.flags['C_CONTIGUOUS'])
+        self.assertEqual(len(self.lpis.material),self.n)
+        self.assertRaises(ValueError,pp.LaserBatch,energy=np.ones(3) * u.J,space_fwhm=np.ones(2) * u.um)
+        self.assertRaises(TypeError,pp.MaterialBatch,density=np.ones(3) * u.J)
+
+    def test_estimates(self):
+        Teh = self.lpis.electron.hot.temperature(model='Wilks1992')
+        ne  = self.lpis.target.material.electron.number_density()
+        self.assertEqual(Teh.shape,(self.n,))
+        for i in [0,3,-1]:
+            # Rows are LaserPlasmaInteraction instances
+            lpi = self.lpis[i]
+            self.assertIsInstance(lpi,pp.LaserPlasmaInteraction)
+            self.assertAlmostEqualQuantity(lpi.electron.hot.temperature(model='Wilks1992'),Teh[i])
+            self.assertAlmostEqualQuantity(lpi.laser.intensity(),self.lasers.intensity()[i])
+            self.assertAlmostEqualQuantity(lpi.target.material.electron.number_density(),ne[i])
+        self.assertAlmostEqualQuantity(ExampleLPI().lpiGGAl.electron.hot.temperature(model='Beg1997'),
+            pp.LPIBatch(pp.LaserBatch(0.8 * u.um,2 * u.J,30 * u.fs,10 * u.um),self.materials).electron.hot.temperature(model='Beg1997')[0])
+        self.assertRaises(IndexError,self.lpis.__getitem__,self.n)
+
+    def test_select(self):
+        Teh = self.lpis.electron.hot.temperature(model='Wilks1992')
+        mask = np.asarray(Teh > Teh[3])
+        hot = self.lpis.filter(mask)
+        self.assertEqual(len(hot),mask.sum())
+        self.assertAllCloseQuantity(hot.electron.hot.temperature(model='Wilks1992'),Teh[mask])
+        self.assertAllCloseQuantity(self.lpis[::2].laser.energy(),self.lasers.columns['energy'][::2])
+        self.assertEqual(len(self.lasers.filter(lambda b:b.energy() > 2 * u.J)),4)
+        self.assertRaises(ValueError,self.lpis.filter,[True])
+
+if __name__== '__main__':
+    unittest.main()
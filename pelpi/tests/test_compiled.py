@@ -0,0 +1,71 @@
+# coding:utf8
+import sys
+Modules_path="../../"
+if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
+
+from examples import ExampleLPI,PelpiTest
+
+import numpy as np
+import pelpi as pp
+u=pp.unit
+
+import unittest
+
+class test_compile(PelpiTest):
+    def setUp(self):
+        self.lpiGGAl = ExampleLPI().lpiGGAl
+
+    def tearDown(self):
+        del self.lpiGGAl
+
+    def test_laser(self):
+        las = self.lpiGGAl.laser
+        for name in ['angular_frequency','power','intensity','intensity_peak_normalized']:
+            self.assertAlmostEqualQuantity(
+                self.lpiGGAl.compile('laser.'+name)(),
+                getattr(las,name)())
+        self.assertAlmostEqualQuantity(
+            self.lpiGGAl.compile('laser.electron.number_density_critical')(),
+            las.electron.number_density_critical())
+
+    def test_numerical_profiles(self):
+        las = self.lpiGGAl.laser
+        las.time_profile.default.set('profile','sech2',verbose=False)
+        las.space_profile.default.set('profile','super-gaussian',verbose=False)
+        las.space_profile.default.set('order',8,verbose=False)
+        self.assertAlmostEqualQuantity(
+            self.lpiGGAl.compile('laser.intensity')(),
+            las.intensity())
+
+    def test_plasma(self):
+        Te = 1 * u('MeV')
+        self.assertAlmostEqualQuantity(
+            self.lpiGGAl.compile('plasma.electron.length_Debye',temperature=Te)(),
+            self.lpiGGAl.plasma.electron.length_Debye(Te))
+        self.assertAlmostEqualQuantity(
+            self.lpiGGAl.compile('plasma.ion.angular_frequency_plasma')(),
+            self.lpiGGAl.plasma.ion.angular_frequency_plasma())
+
+    def test_models(self):
+        for model in ['Beg1997','Haines2009','Wilks1992']:
+            self.assertAlmostEqualQuantity(
+                self.lpiGGAl.compile('electron.hot.temperature',model=model)(),
+                self.lpiGGAl.electron.hot.temperature(model=model))
+
+    def test_overrides(self):
+        f      = self.lpiGGAl.compile('electron.hot.temperature:Wilks1992')
+        energy = np.array([0.5,1.0,4.0]) * u.J
+        Teh    = f(energy=energy)
+        self.assertAllCloseQuantity(Teh,f(energy=energy.to('J').magnitude))
+        self.assertAllCloseQuantity(Teh.to('J'),f.si(energy=energy.magnitude) * u.J)
+        self.lpiGGAl.laser.default.set('energy',energy[1],verbose=False)
+        self.assertAlmostEqualQuantity(Teh[1],self.lpiGGAl.electron.hot.temperature(model='Wilks1992'))
+
+    def test_defaults(self):
+        self.lpiGGAl.laser.default.set('intensity_peak_normalized',2.0 * u(''),verbose=False)
+        self.assertAlmostEqualQuantity(
+            self.lpiGGAl.compile('electron.hot.temperature:Haines2009')(),
+            self.lpiGGAl.electron.hot.temperature(model='Haines2009'))
+
+if __name__== '__main__':
+    unittest.main()
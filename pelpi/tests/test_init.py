@@ -2,6 +2,18 @@ import sys
 Modules_path="../../"
 if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
 import unittest
+import subprocess
+import os
+
+# Import time budget of pelpi, in seconds (see pelpi documentation)
+IMPORT_TIME_BUDGET = 0.05
+
+def run_python(code,**env):
+    """
+    Run python code in a new interpreter (with pelpi in its path), and returns its stdout.
+    """
+    environ = dict(os.environ,PYTHONPATH=os.path.abspath(os.path.join(os.path.dirname(__file__),Modules_path)),**env)
+    return subprocess.check_output([sys.executable,"-c",code],env=environ).decode()
 
 class test_Import(unittest.TestCase):
     def test_import_pint(self):
@@ -14,6 +26,39 @@ class test_Import(unittest.TestCase):
     def test_import_pelpi(self):
         import pelpi as pp
         
+    def test_lazy_import(self):
+        out = run_python(
+            "import sys,pelpi;"
+            "print('pint' in sys.modules,'pelpi.laser' in sys.modules);"
+            "pelpi.Laser;"
+            "print('pint' in sys.modules,'pelpi.laser' in sys.modules);"
+            "pelpi.unit.m;"
+            "print('pint' in sys.modules)")
+        self.assertEqual(out.split(),['False','False','False','True','True'])
+
+    def test_lazy_import_lite(self):
+        # pint is never loaded with the other unit backends
+        out = run_python(
+            "import sys,pelpi;u=pelpi.unit;"
+            "las=pelpi.Laser(wavelength=0.8*u.um,energy=1*u.J,time_profile=pelpi.Profile('gaussian1D',fwhm=40*u.fs),space_profile=pelpi.Profile('gaussian2D',fwhm=5*u.um));"
+            "print(las.intensity_peak_normalized().units,'pint' in sys.modules)",
+            PELPI_UNITS='lite')
+        self.assertEqual(out.split(),['dimensionless','False'])
+
+    def test_import_time(self):
+        out = run_python(
+            "import time;t0=time.perf_counter();"
+            "import pelpi;"
+            "print(time.perf_counter()-t0)")
+        self.assertLess(float(out),IMPORT_TIME_BUDGET)
+
+    def test_unit_cache(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as folder:
+            code = "import pelpi;print(pelpi.default_unit['length'].to('um').magnitude)"
+            for i in range(2): # Second run loads the cached definitions, if supported by pint
+                self.assertEqual(float(run_python(code,PELPI_UNIT_CACHE=folder)),1e6)
+
     def test_examples(self):
         from examples import ExampleLPI,PelpiTest
 
@@ -98,6 +98,39 @@ class test_Common(PelpiTest):
         
         
         
+################################################################################
+class test_registry(PelpiTest):
+    def setUp(self):
+        self.lpiGGAl=ExampleLPI().lpiGGAl
+
+    def tearDown(self):
+        del self.lpiGGAl
+        pp.models._registry['electron.hot.temperature'].pop('Test2020',None)
+        pp._compiled._KERNELS.pop('electron.hot.temperature:Test2020',None)
+
+    def test_available(self):
+        self.assertEqual(pp.models.available('electron.hot.temperature'),['Beg1997','Haines2009','Wilks1992'])
+        self.assertEqual(pp.models.available('unknown.quantity'),[])
+
+    def test_unknown_model(self):
+        self.assertRaises(NameError,self.lpiGGAl.electron.hot.temperature,model="Unknown")
+
+    def test_required_kargs(self):
+        self.assertRaises(TypeError,self.lpiGGAl.electron.number_total,model="Common",temperature=1*u('MeV'))
+
+    def test_register(self):
+        @pp.models.register('electron.hot.temperature','Test2020','temperature',
+            kernel=lambda p: 2 * p['laser.intensity_peak_normalized'] * pp._compiled._SI['m_e c**2'])
+        def test2020(lpi,**kargs):
+            return 2 * lpi.laser.intensity_peak_normalized() * u.m_e * u.c**2
+
+        model = pp.models.get('electron.hot.temperature','Test2020')
+        self.assertEqual(model.dimension,'temperature')
+        self.assertTrue(model.vectorized)
+        Teh = self.lpiGGAl.electron.hot.temperature(model="Test2020")
+        self.assertAlmostEqualQuantity(Teh,2 * self.lpiGGAl.laser.intensity_peak_normalized() * u.m_e * u.c**2)
+        self.assertAlmostEqualQuantity(self.lpiGGAl.compile('electron.hot.temperature',model="Test2020")(),Teh)
+
 ################################################################################
 if __name__== '__main__':
     unittest.main()
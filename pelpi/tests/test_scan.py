@@ -0,0 +1,67 @@
+# coding:utf8
+import sys
+Modules_path="../../"
+if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
+
+import numpy as np
+import pelpi as pp
+u=pp.unit
+
+from examples import ExampleLPI,PelpiTest
+
+import unittest
+
+TARGETS = ["laser.intensity","electron.hot.temperature:Wilks1992","ion.energy_cutoff:Beg1997",
+           ("plasma.electron.length_Debye",{'temperature':1 * u.MeV})]
+
+class test_scan(PelpiTest):
+    def setUp(self):
+        self.parameters = pp.scan.grid(energy=np.linspace(0.5,4,5) * u.J,space_fwhm=np.linspace(5,15,3) * u.um)
+        self.parameters.update(wavelength=0.8 * u.um,time_fwhm=30 * u.fs,
+            density=2.69890e3 * u.kg/u.m**3,atomic_mass=26.98154 * u('amu'),Z=13)
+
+    def tearDown(self):
+        del self.parameters
+
+    def test_grid(self):
+        self.assertEqual(len(self.parameters['energy']),15)
+        self.assertAlmostEqualQuantity(self.parameters['energy'][2],0.5 * u.J)
+        self.assertAlmostEqualQuantity(self.parameters['energy'][3],1.375 * u.J)
+        self.assertAlmostEqualQuantity(self.parameters['space_fwhm'][3],5 * u.um)
+        self.assertAlmostEqualQuantity(self.parameters['space_fwhm'][4],10 * u.um)
+        columns = pp.scan.grid(a=np.arange(2),b=np.arange(3) * u.um,c=np.arange(4))
+        for name,index in zip('abc',np.indices((2,3,4))):
+            self.assertEqual(np.asarray(getattr(columns[name],'magnitude',columns[name])).tolist(),index.ravel().tolist())
+        rows = [{'energy':e * u.J,'Z':13} for e in [1,2]] + [{'energy':3e3 * u.mJ,'Z':13}]
+        self.assertAllCloseQuantity(pp.scan.samples(rows)['energy'],np.array([1,2,3]) * u.J)
+
+    def test_run(self):
+        reference = pp.LPIBatch(
+            pp.LaserBatch(*(self.parameters[k] for k in ['wavelength','energy','time_fwhm','space_fwhm'])),
+            pp.MaterialBatch(*(self.parameters[k] for k in ['density','atomic_mass','Z']))).evaluate(TARGETS)
+        for executor in [None,'thread','process']:
+            res = pp.scan.run(self.parameters,TARGETS,chunk_size=4,executor=executor,max_workers=2)
+            for target,ref in reference.items():
+                with self.subTest(executor=executor,target=target):
+                    self.assertEqual(res[target].shape,(15,))
+                    self.assertAllCloseQuantity(res[target],ref * np.ones(15))
+        self.assertRaises(TypeError,pp.scan.run,dict(self.parameters,unknown=1),TARGETS,executor=None)
+        self.assertRaises(NameError,pp.scan.run,self.parameters,TARGETS,executor='unknown')
+        # Empty scan
+        empty = {key:val[:0] if np.ndim(val)==1 else val for key,val in self.parameters.items()}
+        res = pp.scan.run(empty,TARGETS)
+        self.assertEqual(set(res),set(reference))
+        for target,ref in reference.items():
+            self.assertEqual(res[target].shape,(0,))
+            self.assertEqual(res[target].units,ref.units)
+
+    def test_samples(self):
+        lpi = ExampleLPI().lpiGGAl
+        rows = [dict(wavelength=0.8 * u.um,energy=2 * u.J,time_fwhm=30 * u.fs,space_fwhm=10 * u.um,
+            density=2.69890e3 * u.kg/u.m**3,atomic_mass=26.98154 * u('amu'),Z=13)] * 3
+        res = pp.scan.run(rows,["electron.hot.temperature:Beg1997"],chunk_size=2)
+        self.assertAllCloseQuantity(res["electron.hot.temperature:Beg1997"],
+            lpi.electron.hot.temperature(model='Beg1997') * np.ones(3))
+
+if __name__== '__main__':
+    unittest.main()
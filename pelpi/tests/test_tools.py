@@ -3,12 +3,13 @@ import sys
 Modules_path="../../"
 if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
 
+import numpy as np
 import pelpi as pp
 u=pp.unit
 
 _Default = pp._tools._Default
 
-from examples import ExampleLPI
+from examples import ExampleLPI,PelpiTest
 
 import unittest
 
@@ -23,7 +24,31 @@ class test_PelpiObject(unittest.TestCase):
         self.po._check_input('int',1,int)
         self.po._check_input('float',1.0,float)
         self.po._check_input('str','test',str)
-        self.po._check_input('float',1.0,"<type 'float'>")
+        self.po._check_input('none',None,'length')
+        self.assertRaises(TypeError,self.po._check_input,'int',1.0,int)
+
+    def test_check_input_dimensionality(self):
+        self.po._check_input('length',1.0 * u.um,'length')
+        self.po._check_input('length',np.ones(3) * u.m,'length')
+        self.po._check_input('fwhm',30. * u.fs,('time','length'))
+        self.po._check_input('Z',13 * u(''),'number')
+        self.po._check_input('Z',13,'number')
+        self.assertRaises(TypeError,self.po._check_input,'length',1.0 * u.J,'length')
+        self.assertRaises(TypeError,self.po._check_input,'length',1.0,'length')
+        self.assertRaises(TypeError,pp.Laser,wavelength=0.8 * u.J)
+        self.assertRaises(TypeError,pp.Material,density=np.ones(3) * u('kg/m**2'))
+
+    def test_slots(self):
+        ex = ExampleLPI()
+        lpi = pp.LaserPlasmaInteraction(ex.lasGG,ex.targAl)
+        # Sub-objects are created on first access only
+        self.assertRaises(AttributeError,getattr,lpi,'_electron')
+        self.assertIs(lpi.electron.hot,lpi.electron.hot)
+        self.assertIs(lpi._electron,lpi.electron)
+        self.assertIs(lpi.electron.number_density(),ex.matAl.electron.number_density())
+        for obj in [ex.tprofG,ex.lasGG,ex.lasGG.photon,ex.matAl.ion,ex.targAl,lpi,lpi.electron.hot,
+                    lpi.plasma.electron,ex.picGGAl,ex.picGGAl.code.smilei,lpi.electron.default]:
+            self.assertFalse(hasattr(obj,'__dict__'),type(obj).__name__)
     """
     def test_estimate(self):
         self.po._estimate(ExampleLPI().lpiGGAl,"Common","electron.number_total",temperature=1.0 * u.MeV, efficiency_absorption=0.1 * u(''))
@@ -44,10 +69,182 @@ class test_Default(unittest.TestCase):
         self.assertEqual(self.empty.default.get(key='all'),{'test_input':1.0})
         
         self.empty.test_attribute = 0.0
-        self.empty.test_method = self.setUp # instance method
+        self.empty.test_method = self.setUp # instance method, not an estimate
         self.empty.default = _Default(self.empty,input_dict={"test_input":1.0})
-        self.assertEqual(self.empty.default.get(key='all'),{'test_input':1.0,'test_method':None})
+        self.assertEqual(self.empty.default.get(key='all'),{'test_input':1.0})
+
+        estimate = Estimate()
+        estimate.default = _Default(estimate,input_dict={"test_input":1.0})
+        self.assertEqual(estimate.default.get(key='all'),{'test_input':1.0,'test_method':None})
+        self.assertEqual(estimate.test_method(),2.0)
+        estimate.default.set('test_method',3.0,verbose=False)
+        self.assertEqual(estimate.test_method(),3.0)
+        self.assertRaises(KeyError,estimate.default.get,'helper')
+
+    def test_estimate_names(self):
+        self.assertEqual(pp._tools._estimate_names(Estimate),frozenset(['test_method']))
+        self.assertIs(pp._tools._estimate_names(Estimate),pp._tools._estimate_names(Estimate))
+        self.assertIn('intensity',pp._tools._estimate_names(pp.Laser))
+        self.assertNotIn('wavelength',pp._tools._estimate_names(pp.Laser))
         
+class test_memoize(PelpiTest):
+    def setUp(self):
+        self.lpiGGAl = ExampleLPI().lpiGGAl
+
+    def tearDown(self):
+        del self.lpiGGAl
+
+    def test_cache_hit(self):
+        las = self.lpiGGAl.laser
+        I0 = las.intensity()
+        self.assertIs(las.intensity(),I0)
+        self.assertTrue(cached(las,'intensity'))
+        self.assertIs(las.intensity(r=0*u.m,t=0*u.s),I0)
+
+    def test_eviction(self):
+        lpi = self.lpiGGAl
+        las = lpi.laser
+        mat = lpi.target.material
+        Teh = lpi.electron.hot.temperature(model='Wilks1992')
+        ne  = mat.electron.number_density()
+        wr  = las.angular_frequency()
+
+        las.time_profile.default.set('fwhm',60 * u.fs,verbose=False)
+        # Only the results downstream of fwhm are evicted
+        self.assertEqual(lpi.electron.hot.default._cache,{})
+        self.assertFalse(cached(las,'intensity'))
+        self.assertIs(las.angular_frequency(),wr)
+        self.assertIs(mat.electron.number_density(),ne)
+
+        # and recomputed with the new input value
+        self.assertLess(lpi.electron.hot.temperature(model='Wilks1992'),Teh)
+
+        mat.default.set('Z',1 * u(''),verbose=False)
+        self.assertAlmostEqual((mat.electron.number_density()/ne).to('').magnitude,1/13.)
+
+    def test_readonly(self):
+        for backend in ['pint','lite','raw']:
+            with pp.units.backend(backend):
+                energy = np.array([1.,2.]) * u.J
+                las = pp.Laser(wavelength=0.8 * u.um,energy=energy,
+                    time_profile=ExampleLPI().tprofG,space_profile=ExampleLPI().sprofG)
+                I  = las.intensity()
+                I0 = np.array(I.magnitude)
+                try:
+                    I *= 2
+                except ValueError:
+                    # read-only array (the lite backend is not in-place)
+                    pass
+                self.assertEqual(np.asarray(las.intensity().magnitude).tolist(),I0.tolist())
+                # User inputs are not made read-only
+                energy *= 2
+
+    def test_array_arguments(self):
+        las = ExampleLPI().lasGG
+        las.intensity()
+        entries = len(las.default._cache)
+        for i in range(50):
+            r = np.linspace(0,10,1000) * u.um
+            I = las.intensity(r=r,t=0 * u.s)
+        # Calls with array arguments are not cached
+        self.assertEqual(len(las.default._cache),entries)
+        self.assertAllCloseQuantity(I[:1],las.intensity() * np.ones(1))
+
+    def test_weak_dependents(self):
+        import gc
+        ex = ExampleLPI()
+        for i in range(200):
+            pp.Laser(wavelength=0.8 * u.um,energy=2 * u.J,
+                time_profile=ex.tprofG,space_profile=ex.sprofG).intensity()
+        gc.collect()
+        # Lasers sharing the profiles are not kept alive by their dependencies,
+        # and the references to dead ones are pruned
+        for dependents in ex.sprofG.default._dependents.values():
+            self.assertLessEqual(sum(ref() is not None for ref in dependents),1)
+            self.assertLess(len(dependents),64)
+        las = pp.Laser(wavelength=0.8 * u.um,energy=2 * u.J,time_profile=ex.tprofG,space_profile=ex.sprofG)
+        I = las.intensity()
+        ex.sprofG.default.set('fwhm',2 * ex.sprofG.fwhm(),verbose=False)
+        self.assertFalse(cached(las,'intensity'))
+        self.assertAlmostEqualQuantity(las.intensity(),I/4)
+
+    def test_default_result(self):
+        las = self.lpiGGAl.laser
+        a0  = las.intensity_peak_normalized()
+        las.default.set('intensity',las.intensity()*4,verbose=False)
+        self.assertAlmostEqual((las.intensity_peak_normalized()/a0).to('').magnitude,2.)
+        las.default.set('intensity',None,verbose=False)
+        self.assertAlmostEqual((las.intensity_peak_normalized()/a0).to('').magnitude,1.)
+
+    def test_default_unit(self):
+        Teh = self.lpiGGAl.electron.hot.temperature(model='Wilks1992')
+        self.assertTrue(pp.default_unit._factors)
+        pp.default_unit['temperature'] = u('keV')
+        try:
+            # Cached conversion factors are refreshed when default units are modified
+            self.assertEqual(pp.default_unit._factors,{})
+            # and so are the results cached by existing objects
+            T = self.lpiGGAl.electron.hot.temperature(model='Wilks1992')
+            self.assertEqual(T.units,u.keV)
+            self.assertAlmostEqual(T.magnitude,Teh.to('keV').magnitude)
+            self.assertIs(self.lpiGGAl.electron.hot.temperature(model='Wilks1992'),T)
+            T = ExampleLPI().lpiGGAl.electron.hot.temperature(model='Wilks1992')
+            self.assertEqual(T.units,u.keV)
+            self.assertAlmostEqual(T.magnitude,Teh.to('keV').magnitude)
+        finally:
+            pp.default_unit['temperature'] = u('MeV')
+        T = ExampleLPI().lpiGGAl.electron.hot.temperature(model='Wilks1992')
+        self.assertEqual(T.units,u.MeV)
+        self.assertEqual(self.lpiGGAl.electron.hot.temperature(model='Wilks1992').units,u.MeV)
+
+    def test_profiler(self):
+        lpi = self.lpiGGAl
+        original = pp.Laser.intensity
+        result   = pp._tools._Default.result
+        with pp.profiling.Profiler(trace=True) as prof:
+            self.assertIsNot(pp.Laser.intensity,original)
+            self.assertIsNot(pp._tools._Default.result,result)
+            self.assertRaises(RuntimeError,pp.profiling.Profiler().enable)
+            for model in ['Beg1997','Haines2009','Wilks1992']:
+                lpi.electron.hot.temperature(model=model)
+            lpi.electron.hot.temperature(model='Wilks1992')
+        # Zero-cost when disabled : original methods are restored
+        self.assertIs(pp.Laser.intensity,original)
+        self.assertIs(pp._tools._Default.result,result)
+        lpi.electron.hot.temperature(model='Beg1997')
+
+        s = prof.stats['_LPIElectronHot.temperature']
+        self.assertEqual((s.calls,s.hits,s.misses),(4,1,3))
+        self.assertLessEqual(s.self,s.cumulative)
+        self.assertGreater(s.conversion,0.)
+        s = prof.stats['Laser.intensity']
+        self.assertEqual(s.misses,1)
+        self.assertGreater(s.hits,0)
+        self.assertIn('_Default.result',prof.table())
+        self.assertRaises(NameError,prof.table,'unknown')
+
+        events = prof.chrome_trace()['traceEvents']
+        self.assertEqual(len(events),sum(s.calls for s in prof.stats.values()))
+        self.assertEqual({e['ph'] for e in events},{'X'})
+        self.assertRaises(ValueError,pp.profiling.Profiler().chrome_trace)
+
+def cached(inst,name):
+    """
+    Returns True if a result of inst method `name` is cached.
+    """
+    return any(key[0]==name for key in inst.default._cache)
+
+class Estimate(object):
+    """
+    Class with one estimate method, for testing defaults.
+    """
+    @pp._tools._memoize
+    def test_method(self):
+        return self.default.result('test_method',2.0)
+
+    def helper(self):
+        pass
+
 class Empty():
     """
     Empty class, for testing defaults.
@@ -0,0 +1,120 @@
+# coding:utf8
+import sys
+Modules_path="../../"
+if sys.path[0]!=Modules_path:sys.path.insert(0, Modules_path)
+
+import numpy as np
+import pelpi as pp
+u=pp.unit
+
+from examples import ExampleLPI,PelpiTest
+
+import unittest
+
+# Estimates compared between unit backends : (path from a ParticleInCell instance, arguments as function of the unit registry)
+ESTIMATES = [
+    ("lpi.laser.wavelength"                             , lambda u:{}),
+    ("lpi.laser.energy"                                 , lambda u:{}),
+    ("lpi.laser.angular_frequency"                      , lambda u:{}),
+    ("lpi.laser.envelope"                               , lambda u:{'r':np.linspace(0,10,5) * u.um,'t':20 * u.fs}),
+    ("lpi.laser.power"                                  , lambda u:{}),
+    ("lpi.laser.power"                                  , lambda u:{'r':3 * u.um,'t':np.linspace(-50,50,5) * u.fs}),
+    ("lpi.laser.intensity"                              , lambda u:{}),
+    ("lpi.laser.intensity"                              , lambda u:{'r':np.linspace(0,10,5) * u.um}),
+    ("lpi.laser.intensity_peak_normalized"              , lambda u:{}),
+    ("lpi.laser.time_profile.envelope"                  , lambda u:{'x':np.linspace(-50,50,5) * u.fs}),
+    ("lpi.laser.time_profile.integral1D"                , lambda u:{}),
+    ("lpi.laser.space_profile.integral2D"               , lambda u:{}),
+    ("lpi.laser.photon.energy"                          , lambda u:{}),
+    ("lpi.laser.electron.number_density_critical"       , lambda u:{}),
+    ("lpi.target.material.density"                      , lambda u:{}),
+    ("lpi.target.material.atomic_mass"                  , lambda u:{}),
+    ("lpi.target.material.electron.number_density"      , lambda u:{}),
+    ("lpi.target.material.ion.number_density"           , lambda u:{}),
+    ("lpi.plasma.electron.length_Debye"                 , lambda u:{'temperature':np.array([0.1,1,10]) * u.MeV}),
+    ("lpi.plasma.electron.length_Landau"                , lambda u:{'temperature':1 * u.MeV}),
+    ("lpi.plasma.electron.angular_frequency_plasma"     , lambda u:{}),
+    ("lpi.plasma.ion.angular_frequency_plasma"          , lambda u:{}),
+    ("lpi.electron.efficiency_absorption"               , lambda u:{'model':'Price1995'}),
+    ("lpi.electron.number_total"                        , lambda u:{'model':'Common','temperature':1 * u.MeV,'efficiency_absorption':0.1 * u('')}),
+    ("lpi.electron.hot.temperature"                     , lambda u:{'model':'Beg1997'}),
+    ("lpi.electron.hot.temperature"                     , lambda u:{'model':'Haines2009'}),
+    ("lpi.electron.hot.temperature"                     , lambda u:{'model':'Wilks1992'}),
+    ("lpi.ion.energy_cutoff"                            , lambda u:{'model':'Beg1997'}),
+    ("length_cell"                                      , lambda u:{'lim':'both','temperature':1 * u.MeV}),
+    ("time_step"                                        , lambda u:{'lim':'both','CFL':True,'temperature':1 * u.MeV}),
+    ("number_of_cells"                                  , lambda u:{'lim':'both','temperature':1 * u.MeV}),
+    ("number_of_particles"                              , lambda u:{'lim':'both','temperature':1 * u.MeV}),
+    ("number_of_timesteps"                              , lambda u:{'lim':'both','CFL':True,'temperature':1 * u.MeV}),
+    ("memory_fields"                                    , lambda u:{'lim':'both','temperature':1 * u.MeV,'mpi':4}),
+    ("memory_particles"                                 , lambda u:{'lim':'both','temperature':1 * u.MeV,'mpi':4}),
+    ("cost"                                             , lambda u:{'lim':'both','CFL':True,'temperature':1 * u.MeV}),
+    ("code.smilei.length"                               , lambda u:{}),
+    ("code.smilei.time"                                 , lambda u:{}),
+    ("code.smilei.electric_field"                       , lambda u:{}),
+    ("code.smilei.number_density"                       , lambda u:{}),
+    ("code.smilei.current"                              , lambda u:{}),
+    ("code.smilei.energy"                               , lambda u:{}),
+    ("code.smilei.momentum"                             , lambda u:{}),
+]
+
+def estimates(backend):
+    """
+    Returns
+    -------
+    SI magnitudes of the ESTIMATES with unit backend `backend` : list of ndarray
+    """
+    with pp.units.backend(backend):
+        lpi = ExampleLPI().lpiGGAl
+        pic = pp.ParticleInCell(lpi,box=[40 * u.um,20 * u.um],thickness=2 * u.um,
+            particles_per_cell=np.array([8,16]),duration=500 * u.fs)
+        res = []
+        for path,kwargs in ESTIMATES:
+            obj,name = pp._tools._resolve(pic,path)
+            res.append(np.asarray(getattr(obj,name)(**kwargs(u)).to_base_units().magnitude,dtype=float))
+        return res
+
+class test_units(PelpiTest):
+    def test_backend(self):
+        self.assertEqual(pp.units.available(),['lite','pint','raw'])
+        self.assertEqual(pp.units.current(),'pint')
+        with pp.units.backend('lite'):
+            self.assertEqual(pp.units.current(),'lite')
+            self.assertEqual(pp.default_unit['temperature'],u.MeV)
+            with pp.units.backend('raw'):
+                self.assertEqual(pp.units.current(),'raw')
+                self.assertEqual(float((1 * u.um).to('m')),1e-6)
+            self.assertRaises(TypeError,pp.Laser,wavelength=0.8 * u.J)
+        self.assertEqual(pp.units.current(),'pint')
+        self.assertRaises(NameError,pp.units.use,'unknown')
+
+        pp.units.use('lite')
+        try:
+            self.assertEqual(pp.units.current(),'lite')
+            with pp.units.backend('pint'):
+                self.assertEqual(pp.units.current(),'pint')
+            self.assertEqual(type(1 * u.m).__module__,'pelpi._lite')
+        finally:
+            pp.units.use('pint')
+
+    def test_lite(self):
+        with pp.units.backend('lite'):
+            I = 2 * u('W/cm**2') * np.ones(3)
+            self.assertEqual(I.to('W/m**2').magnitude.tolist(),[2e4] * 3)
+            self.assertEqual((1 * u.keV).to('J').magnitude,1.602176634e-16)
+            self.assertEqual(float(np.sqrt(4 * u('m**2'))/u.m),2.)
+            self.assertEqual(u('1.2e-2 keV').to('eV').magnitude,12.)
+            self.assertEqual('{:.1f}'.format(1.5 * u.um),'1.5 um')
+            self.assertRaises(TypeError,lambda:(1 * u.m).to('s'))
+            self.assertRaises(TypeError,lambda:1 * u.m + 1 * u.s)
+            self.assertRaises(AttributeError,lambda:u.unknown_unit)
+
+    def test_agreement(self):
+        reference = estimates('pint')
+        for backend in ['lite','raw']:
+            for (path,kwargs),ref,res in zip(ESTIMATES,reference,estimates(backend)):
+                with self.subTest(backend=backend,estimate=path):
+                    np.testing.assert_allclose(res,ref,rtol=1e-12)
+
+if __name__== '__main__':
+    unittest.main()
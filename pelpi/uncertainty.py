@@ -0,0 +1,188 @@
+#coding:utf8
+"""
+Monte Carlo propagation of input uncertainties.
+
+Input distributions (shot-to-shot jitter on laser energy, duration, focal spot, ...)
+and model parameters uncertainties are sampled as arrays, and the estimate is
+computed in one vectorized evaluation of the object graph (see ``LaserPlasmaInteraction.monte_carlo``).
+
+Examples
+--------
+>>> import pelpi as pp
+>>> u = pp.unit
+>>> res = lpi.monte_carlo('electron.hot.temperature:Wilks1992',{
+...     'laser.energy'                : pp.uncertainty.Normal(2.0 * u.J, relative=0.03),
+...     'laser.time_profile.fwhm'     : pp.uncertainty.Normal(30 * u.fs, relative=0.05),
+...     'laser.space_profile.fwhm'    : pp.uncertainty.Uniform(9 * u.um, 11 * u.um),
+...     },n=10000,seed=0)
+>>> print(res.mean(),res.std(),res.percentile([5,95]))
+"""
+from ._global import *
+from ._tools import _resolve
+from ._plan import _Plan
+from . import models as _models
+
+__all__ = ["Normal","Uniform","Result","monte_carlo"]
+
+class Normal(object):
+    """
+    Normal distribution.
+
+    Parameters
+    ----------
+    mean : Quantity or float
+        Mean value
+    std : Quantity or float, optional
+        Standard deviation
+    relative : float, optional
+        Relative standard deviation, used if `std` is not defined
+    """
+    def __init__(self,mean,std=None,relative=None):
+        if std is None:
+            if relative is None:
+                raise TypeError("Normal distribution needs `std` or `relative` parameter.")
+            std = relative * mean
+        self.mean   = mean
+        self.std    = std
+
+    def sample(self,n,rng):
+        """
+        Returns
+        -------
+        `n` samples of the distribution, drawn with the numpy Generator `rng`
+        """
+        return self.mean + self.std * rng.standard_normal(n)
+
+class Uniform(object):
+    """
+    Uniform distribution.
+
+    Parameters
+    ----------
+    low : Quantity or float
+        Lower boundary
+    high : Quantity or float
+        Upper boundary
+    """
+    def __init__(self,low,high):
+        self.low    = low
+        self.high   = high
+
+    def sample(self,n,rng):
+        """
+        Returns
+        -------
+        `n` samples of the distribution, drawn with the numpy Generator `rng`
+        """
+        return self.low + (self.high - self.low) * rng.random(n)
+
+class Result(object):
+    """
+    Result of a Monte Carlo propagation.
+
+    Attributes
+    ----------
+    samples : Quantity
+        Array of the estimate samples
+    """
+    def __init__(self,samples):
+        self.samples = samples
+
+    def mean(self):
+        """
+        Returns
+        -------
+        Mean of the samples
+        """
+        return _np.mean(self.samples)
+
+    def std(self):
+        """
+        Returns
+        -------
+        Standard deviation of the samples
+        """
+        return _np.std(self.samples)
+
+    def percentile(self,q):
+        """
+        Returns
+        -------
+        q-th percentile(s) of the samples
+
+        Parameters
+        ----------
+        q : float or sequence of float
+            Percentile(s), between 0 and 100
+        """
+        return _np.percentile(self.samples,q)
+
+    def __repr__(self):
+        return "<Result : mean = {}, std = {}, {} samples>".format(self.mean(),self.std(),len(self.samples))
+
+def monte_carlo(root_inst,estimate,inputs=None,n=1000,seed=None,model_uncertainty=False,**kargs):
+    """
+    Returns
+    -------
+    Monte Carlo propagation of input uncertainties on estimate : ``Result`` instance
+
+    Parameters
+    ----------
+    root_inst : object
+        Instance from which paths are resolved. Typically a LaserPlasmaInteraction instance
+    estimate : str
+        Estimate path, with model name after ':' if needed
+    inputs : dict, optional
+        {path : distribution}, with path of an input or estimate from root_inst (e.g. 'laser.energy')
+    n : int, optional
+        Number of samples
+    seed : int, optional
+        Seed of the random number generator
+    model_uncertainty : bool, optional
+        If True, the model parameters declared with an uncertainty (see ``pelpi.models.Model``)
+        and not given in kargs are also sampled
+    **kargs
+        Model input parameters. They can also be distributions
+
+    Notes
+    -----
+    Sampled inputs are set as default values of the corresponding objects during the evaluation,
+    and the previous default values are restored afterwards.
+    If the model is not vectorized, the estimate is evaluated sample by sample.
+    """
+    rng = _np.random.default_rng(seed)
+    inputs = dict(inputs or {})
+
+    path,_,name = estimate.partition(':')
+    model = _models.get(path,name) if name else None
+    if model is not None and model_uncertainty:
+        for key,(value,std) in model.parameters.items():
+            if isinstance(value,str):
+                value,std = _u(value),_u(std)
+            kargs.setdefault(key,Normal(value,std))
+
+    samples = {key:dist.sample(n,rng) for key,dist in inputs.items()}
+    kargs   = {key:(val.sample(n,rng) if hasattr(val,'sample') else val) for key,val in kargs.items()}
+
+    targets = {key:_resolve(root_inst,key) for key in inputs}
+    previous = {key:obj.default._dict.get(attr) for key,(obj,attr) in targets.items()}
+
+    def evaluate(values,kwargs):
+        for key,(obj,attr) in targets.items():
+            obj.default.set(attr,values[key],verbose=False)
+        return _Plan(root_inst,[(estimate,kwargs)]).evaluate()[estimate]
+
+    try:
+        if model is None or model.vectorized:
+            res = evaluate(samples,kargs)
+        else:
+            sampled = [k for k,v in kargs.items() if _np.ndim(v)==1 and len(v)==n]
+            res = [evaluate({k:v[i] for k,v in samples.items()},
+                            dict(kargs,**{k:kargs[k][i] for k in sampled})) for i in range(n)]
+            res = _np.array([r.to(res[0].units).magnitude for r in res]) * res[0].units
+    finally:
+        for key,(obj,attr) in targets.items():
+            obj.default.set(attr,previous[key],verbose=False)
+
+    # Broadcast, in case the estimate does not depend on the sampled inputs
+    return Result(res * _np.ones(n))
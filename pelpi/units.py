@@ -0,0 +1,211 @@
+#coding:utf8
+"""
+Unit backends.
+
+pelpi estimates are written with ``pelpi.unit`` (the unit registry) and ``pelpi.default_unit``
+(the default units dictionary), which are forwarded to the unit backend in use :
+
+- ``'pint'`` (default) : the pint unit registry. Complete and safe, but each operation on a
+  Quantity has a significant cost
+- ``'lite'`` : a lightweight registry of pelpi, with Quantities made of a magnitude (float or ndarray)
+  and an interned unit (SI factor and dimensionality). Units are checked as with pint, and
+  operations are much cheaper. It only knows the units and physical constants of SI,
+  common non-SI units (eV, erg, deg, hour, byte, ...) and their prefixes
+- ``'raw'`` : trusted SI magnitudes, for production scans. Values are ndarrays in SI units,
+  ``to`` does nothing and dimensions are not checked, so results are always in SI units
+  (whatever ``default_unit``) and the inputs must be correct. Axis of tabulated profiles
+  (see ``Profile.from_file``) must also be in SI units
+
+The backend is selected for the whole process with the ``PELPI_UNITS`` environment variable,
+or with ``use``, or for a block of code (and the threads or coroutines it creates) with ``backend``.
+Objects must be used with the backend they were created with, as Quantities of different
+backends can not be mixed.
+
+Examples
+--------
+>>> import pelpi as pp
+>>> with pp.units.backend('lite'):
+...     u = pp.unit
+...     las = pp.Laser(wavelength = 0.8 * u.um, ...)
+...     a0 = las.intensity_peak_normalized()
+"""
+import os as _os
+import contextlib as _contextlib
+import contextvars as _contextvars
+from collections.abc import MutableMapping as _MutableMapping
+
+__all__ = ["available","current","use","backend"]
+
+class _Backend(object):
+    """
+    Unit backend, i.e. a unit registry and its default units dictionary, built on first access.
+
+    Parameters
+    ----------
+    name : str
+        Backend name
+    factory : callable
+        Function returning the unit registry
+    """
+    def __init__(self,name,factory):
+        self.name           = name
+        self._factory       = factory
+        self._registry      = None
+        self._default_unit  = None
+
+    @property
+    def registry(self):
+        if self._registry is None:
+            self._registry = self._factory()
+        return self._registry
+
+    @property
+    def default_unit(self):
+        if self._default_unit is None:
+            from . import _default_unit
+            self._default_unit = _default_unit(self.registry)
+        return self._default_unit
+
+    def __repr__(self):
+        return "<Unit backend %s>"%self.name
+
+def _pint_registry():
+    from . import _unit_registry
+    return _unit_registry()
+
+def _lite_registry():
+    from ._lite import _Registry
+    return _Registry()
+
+def _raw_registry():
+    from ._lite import _RawRegistry
+    return _RawRegistry()
+
+_backends = {
+    'pint'  : _Backend('pint',_pint_registry),
+    'lite'  : _Backend('lite',_lite_registry),
+    'raw'   : _Backend('raw',_raw_registry),
+}
+
+def _get(name):
+    try:
+        return _backends[name]
+    except KeyError:
+        raise NameError("Unknown unit backend `%s`. Available backends are %s."%(name,available()))
+
+# Backend of the process, and of the current context if selected with ``backend``
+_process = _get(_os.environ.get("PELPI_UNITS","pint"))
+_context = _contextvars.ContextVar("pelpi_units",default=None)
+
+def _current():
+    """
+    Returns
+    -------
+    Unit backend in use : ``_Backend`` instance
+    """
+    return _context.get() or _process
+
+def available():
+    """
+    Returns
+    -------
+    Names of the unit backends : list of str
+    """
+    return sorted(_backends)
+
+def current():
+    """
+    Returns
+    -------
+    Name of the unit backend in use : str
+    """
+    return _current().name
+
+def use(name):
+    """
+    Select the unit backend of the process.
+
+    Parameters
+    ----------
+    name : str
+        Backend name ('pint', 'lite' or 'raw')
+
+    Notes
+    -----
+    It does not change the backend of the contexts selected with ``backend``.
+    """
+    global _process
+    _process = _get(name)
+
+@_contextlib.contextmanager
+def backend(name):
+    """
+    Context manager selecting the unit backend inside a block of code.
+
+    Parameters
+    ----------
+    name : str
+        Backend name ('pint', 'lite' or 'raw')
+
+    Notes
+    -----
+    The selection is stored in a context variable, so it applies to the current thread
+    (or coroutine) only.
+    """
+    token = _context.set(_get(name))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+class _UnitRegistryProxy(object):
+    """
+    ``pelpi.unit`` : unit registry of the backend in use.
+    """
+    __slots__ = ()
+
+    def __getattr__(self,name):
+        return getattr(_current().registry,name)
+
+    def __call__(self,*args,**kwargs):
+        return _current().registry(*args,**kwargs)
+
+    def __dir__(self):
+        return dir(_current().registry)
+
+    def __repr__(self):
+        return repr(_current().registry)
+
+class _DefaultUnitsProxy(_MutableMapping):
+    """
+    ``pelpi.default_unit`` : default units dictionary of the backend in use.
+    """
+    __slots__ = ()
+
+    def __getitem__(self,key):
+        return _current().default_unit[key]
+
+    def __setitem__(self,key,value):
+        _current().default_unit[key] = value
+
+    def __delitem__(self,key):
+        del _current().default_unit[key]
+
+    def __iter__(self):
+        return iter(_current().default_unit)
+
+    def __len__(self):
+        return len(_current().default_unit)
+
+    def __contains__(self,key):
+        return key in _current().default_unit
+
+    def __getattr__(self,name):
+        # e.g. the conversion factors cache ``_factors``
+        return getattr(_current().default_unit,name)
+
+    def __repr__(self):
+        return repr(_current().default_unit)
+
+unit            = _UnitRegistryProxy()
+default_unit    = _DefaultUnitsProxy()